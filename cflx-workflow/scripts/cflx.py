@@ -5,13 +5,110 @@ A standalone Python implementation of essential OpenSpec operations.
 """
 
 import argparse
+import contextlib
+import functools
+import hashlib
+import importlib.util
+import io
+import itertools
 import json
+import math
 import os
 import re
 import shutil
+import subprocess
 import sys
-from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+import tempfile
+import threading
+import time
+import types
+import zipfile
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Iterable, Iterator, List, Literal, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # advisory locking is POSIX-only
+    fcntl = None
+
+try:
+    import sqlite3
+except ImportError:  # optional: only cflx query needs it
+    sqlite3 = None
+
+
+EvidenceMode = Literal["off", "warn", "error"]
+
+
+DIAGNOSTIC_CODES = {
+    "CFLX001": "change-not-found",
+    "CFLX002": "openspec-root-unavailable",
+    "CFLX101": "missing-proposal",
+    "CFLX102": "missing-tasks",
+    "CFLX103": "proposal-missing-title",
+    "CFLX201": "checkbox-in-excluded-section",
+    "CFLX202": "task-without-checkbox",
+    "CFLX203": "missing-verification-note",
+    "CFLX204": "verification-without-evidence",
+    "CFLX205": "cited-path-missing",
+    "CFLX206": "cited-test-missing",
+    "CFLX207": "cited-path-unchanged",
+    "CFLX301": "no-spec-deltas",
+    "CFLX302": "missing-delta-spec",
+    "CFLX303": "missing-delta-markers",
+    "CFLX304": "requirements-without-scenarios",
+    "CFLX305": "requirement-without-scenario",
+    "CFLX306": "unknown-canonical-requirement",
+    "CFLX307": "duplicate-canonical-requirement",
+    "CFLX308": "conflicting-delta-requirement",
+}
+
+
+class Diagnostic:
+    """A single validation finding with a stable code.
+
+    ``file`` is relative to the change directory; ``path`` is relative to
+    the repository root. ``str()`` renders the legacy error text.
+    """
+
+    __slots__ = ("code", "severity", "message", "change_id", "file", "path", "line")
+
+    def __init__(
+        self,
+        code: str,
+        severity: str,
+        message: str,
+        change_id: Optional[str] = None,
+        file: Optional[str] = None,
+        line: Optional[int] = None,
+    ):
+        self.code = code
+        self.severity = severity
+        self.message = message
+        self.change_id = change_id
+        self.file = file
+        self.path = file
+        self.line = line
+
+    def __str__(self) -> str:
+        prefix = f"{self.change_id}: " if self.change_id else ""
+        if self.line is not None:
+            return f"{prefix}{self.file}:{self.line}: {self.message}"
+        return f"{prefix}{self.message}"
+
+    def to_dict(self) -> Dict:
+        return {
+            "code": self.code,
+            "rule": DIAGNOSTIC_CODES.get(self.code, self.code),
+            "severity": self.severity,
+            "change": self.change_id,
+            "file": self.path,
+            "line": self.line,
+            "message": self.message,
+        }
 
 
 class Colors:
@@ -26,425 +123,4235 @@ class Colors:
     CYAN = "\033[96m"
 
 
-class OpenSpecManager:
-    """Manage OpenSpec changes and specifications."""
+class LockTimeout(TimeoutError):
+    """Raised when an advisory lock cannot be acquired before its timeout."""
 
-    def __init__(self, root_dir: str = "."):
-        self.root_dir = Path(root_dir).resolve()
-        self.changes_dir = self.root_dir / "openspec" / "changes"
-        self.archive_dir = self.changes_dir / "archive"
-        self.specs_dir = self.root_dir / "openspec" / "specs"
 
-    def list_changes(self, show_specs: bool = False) -> List[Dict]:
-        """List all changes or specs."""
-        if show_specs:
-            return self._list_specs()
+class ArchivePack:
+    """Compressed, indexed store for archived changes.
 
-        changes = []
-        if not self.changes_dir.exists():
-            return changes
+    A zip file holding ``<change-id>/<relative path>`` members plus an
+    ``index.json`` member with per-change list metadata. Listing reads the
+    index only; showing a change reads just its members through the zip
+    central directory, so nothing is ever unpacked to disk.
+    """
 
-        for item in self.changes_dir.iterdir():
-            if item.is_dir() and item.name != "archive":
-                change_info = self._get_change_info(item)
-                if change_info:
-                    changes.append(change_info)
+    FILENAME = "archive-pack.zip"
+    INDEX_MEMBER = "index.json"
 
-        # Also check archive
-        if self.archive_dir.exists():
-            for item in self.archive_dir.iterdir():
-                if item.is_dir():
-                    change_info = self._get_change_info(item, archived=True)
-                    if change_info:
-                        changes.append(change_info)
+    def __init__(self, path: Path):
+        self.path = path
+        self._cache_key: Optional[Tuple[float, int]] = None
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._index: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
 
-        return sorted(changes, key=lambda x: x.get("id", ""))
+    def _load(self) -> None:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._close()
+            self._cache_key, self._index = None, {}
+            return
+        key = (stat.st_mtime, stat.st_size)
+        if key == self._cache_key:
+            return
+        self._close()
+        if isinstance(self.path, GitTreePath):
+            self._zip = zipfile.ZipFile(io.BytesIO(self.path.read_bytes()))
+        else:
+            self._zip = zipfile.ZipFile(str(self.path))
+        self._index = json.loads(self._zip.read(self.INDEX_MEMBER))["changes"]
+        self._cache_key = key
 
-    def _list_specs(self) -> List[Dict]:
-        """List all specs."""
-        specs = []
-        if not self.specs_dir.exists():
-            return specs
+    def _close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
 
-        for item in self.specs_dir.iterdir():
-            if item.is_dir():
-                spec_file = item / "spec.md"
-                if spec_file.exists():
-                    specs.append(
-                        {
-                            "name": item.name,
-                            "path": str(spec_file.relative_to(self.root_dir)),
-                        }
+    def index(self) -> Dict[str, Dict]:
+        """Return ``{change_id: metadata}`` for all packed changes."""
+        with self._lock:
+            self._load()
+            return self._index
+
+    def member_path(self, change_id: str, root_dir: Path) -> str:
+        """Display path for a packed change."""
+        return f"{self.path.relative_to(root_dir)}#{change_id}"
+
+    def read(self, change_id: str) -> Dict[str, bytes]:
+        """Read all members of one packed change, keyed by relative path."""
+        with self._lock:
+            self._load()
+            entry = self._index[change_id]
+            prefix = f"{change_id}/"
+            return {name: self._zip.read(prefix + name) for name in entry["files"]}
+
+    def read_member(self, change_id: str, name: str) -> bytes:
+        """Read one member of a packed change."""
+        with self._lock:
+            self._load()
+            return self._zip.read(f"{change_id}/{name}")
+
+    def add(self, entries: Dict[str, Tuple[Dict, Dict[str, bytes]]]) -> None:
+        """Add or replace changes given as ``{change_id: (metadata, members)}``."""
+        self._rewrite(entries, set(entries))
+
+    def remove(self, change_ids: List[str]) -> None:
+        """Drop changes from the pack, deleting the file once it is empty."""
+        self._rewrite({}, set(change_ids))
+
+    def _rewrite(
+        self, entries: Dict[str, Tuple[Dict, Dict[str, bytes]]], replaced: set
+    ) -> None:
+        with self._lock:
+            self._load()
+            index = {key: value for key, value in self._index.items() if key not in replaced}
+            for change_id, (meta, members) in entries.items():
+                index[change_id] = dict(meta, files=sorted(members))
+
+            if not index:
+                self._close()
+                if self.path.exists():
+                    self.path.unlink()
+                self._cache_key, self._index = None, {}
+                return
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=str(self.path.parent), prefix=".archive-pack.")
+            os.close(fd)
+            try:
+                with zipfile.ZipFile(tmp_name, "w", zipfile.ZIP_DEFLATED) as out:
+                    for change_id in sorted(index):
+                        if change_id in entries:
+                            members = entries[change_id][1]
+                        else:
+                            members = {
+                                name: self._zip.read(f"{change_id}/{name}")
+                                for name in index[change_id]["files"]
+                            }
+                        for name in sorted(members):
+                            out.writestr(f"{change_id}/{name}", members[name])
+                    out.writestr(
+                        self.INDEX_MEMBER,
+                        json.dumps({"version": 1, "changes": index}, indent=2, sort_keys=True),
                     )
+                self._close()
+                os.replace(tmp_name, str(self.path))
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+            self._cache_key = None
 
-        return sorted(specs, key=lambda x: x["name"])
 
-    def _get_change_info(
-        self, change_dir: Path, archived: bool = False
-    ) -> Optional[Dict]:
-        """Extract change information from directory."""
-        proposal_file = change_dir / "proposal.md"
-        tasks_file = change_dir / "tasks.md"
+class GitTree:
+    """Read-only view of a commit through one long-lived ``git cat-file --batch``.
 
-        info = {
-            "id": change_dir.name,
-            "path": str(change_dir.relative_to(self.root_dir)),
-            "archived": archived,
-        }
+    The ``openspec/`` subtree is resolved up front, one pipelined batch per
+    directory level, so even thousands of archived changes cost a handful of
+    round trips. Blobs are read on demand over the same process and cached.
+    """
 
-        # Extract title from proposal.md
-        if proposal_file.exists():
-            content = proposal_file.read_text(encoding="utf-8")
-            # Look for first heading
-            match = re.search(r"^#\s+(.+)$", content, re.MULTILINE)
-            if match:
-                info["title"] = match.group(1).strip()
+    def __init__(self, repo_dir: Path, ref: str, prefix: str = "openspec"):
+        self.ref = ref
+        self._process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=str(repo_dir),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._lock = threading.Lock()
+        self._blobs: Dict[str, bytes] = {}
+        self._dirs: Dict[Tuple[str, ...], Dict[str, Tuple[str, str]]] = {}
+        self._oid_size = 20
 
-        # Count tasks
-        if tasks_file.exists():
-            info.update(self._count_tasks(tasks_file))
+        commit = self._fetch([f"{ref}^{{commit}}"])[0]
+        if commit is None:
+            self.close()
+            raise ValueError(f"Unknown git ref: {ref}")
+        header = commit[1].split(b"\n\n", 1)[0]
+        tree_oid = re.search(rb"^tree ([0-9a-f]+)", header, re.MULTILINE).group(1).decode()
+        self._oid_size = len(tree_oid) // 2
+        committed = re.search(rb"^committer .* (\d+) [+-]\d{4}$", header, re.MULTILINE)
+        self.commit_time = int(committed.group(1)) if committed else 0
+        self._resolve(tree_oid, prefix)
 
-        return info
+    def root(self) -> "GitTreePath":
+        return GitTreePath(self, ())
 
-    def _count_tasks(self, tasks_file: Path) -> Dict:
-        """Count completed and total tasks."""
-        content = tasks_file.read_text(encoding="utf-8")
+    def close(self) -> None:
+        if self._process.poll() is None:
+            self._process.stdin.close()
+            self._process.wait()
 
-        # Exclude Future Work, Out of Scope, Notes sections
-        sections_to_exclude = ["future work", "out of scope", "notes"]
-        lines = content.split("\n")
+    def _fetch(self, names: List[str]) -> List[Optional[Tuple[str, bytes]]]:
+        """Request objects in one pipelined batch; None for missing objects."""
+        request = "".join(f"{name}\n" for name in names).encode("utf-8")
+        with self._lock:
+            stdin, stdout = self._process.stdin, self._process.stdout
+            writer = None
+            if len(request) > 16384:
+                # Large batches are written concurrently so neither pipe can fill up.
+                writer = threading.Thread(target=self._write, args=(request,))
+                writer.start()
+            else:
+                self._write(request)
+            results: List[Optional[Tuple[str, bytes]]] = []
+            for _ in names:
+                header = stdout.readline().split()
+                if len(header) != 3 or header[-1] in (b"missing", b"ambiguous"):
+                    results.append(None)
+                    continue
+                results.append((header[1].decode(), stdout.read(int(header[2]))))
+                stdout.read(1)
+            if writer:
+                writer.join()
+            return results
 
-        in_excluded_section = False
-        completed = 0
-        total = 0
+    def _write(self, request: bytes) -> None:
+        self._process.stdin.write(request)
+        self._process.stdin.flush()
 
-        for line in lines:
-            # Check if we're entering an excluded section
-            if line.startswith("##"):
-                section_name = line.lstrip("#").strip().lower()
-                in_excluded_section = any(
-                    excluded in section_name for excluded in sections_to_exclude
+    def _resolve(self, tree_oid: str, prefix: str) -> None:
+        self._dirs[()] = self._parse_tree(self._fetch([tree_oid])[0][1])
+        entry = self.lookup((prefix,))
+        frontier = [(prefix,)] if entry and entry[0] == "tree" else []
+        while frontier:
+            objects = self._fetch([self.lookup(parts)[1] for parts in frontier])
+            next_frontier = []
+            for parts, obj in zip(frontier, objects):
+                entries = self._parse_tree(obj[1])
+                self._dirs[parts] = entries
+                next_frontier.extend(
+                    parts + (name,) for name, (kind, _) in entries.items() if kind == "tree"
                 )
+            frontier = next_frontier
+
+    def _parse_tree(self, data: bytes) -> Dict[str, Tuple[str, str]]:
+        entries = {}
+        position = 0
+        while position < len(data):
+            space = data.index(b" ", position)
+            nul = data.index(b"\0", space)
+            mode = data[position:space]
+            name = data[space + 1 : nul].decode("utf-8", "surrogateescape")
+            position = nul + 1 + self._oid_size
+            if mode == b"160000":  # submodule
                 continue
+            entries[name] = ("tree" if mode == b"40000" else "blob", data[nul + 1 : position].hex())
+        return entries
 
-            if in_excluded_section:
+    def lookup(self, parts: Tuple[str, ...]) -> Optional[Tuple[str, str]]:
+        """Return (kind, oid) for a path, or None if it is not in the resolved tree."""
+        if not parts:
+            return ("tree", "")
+        parent = self._dirs.get(parts[:-1])
+        return parent.get(parts[-1]) if parent else None
+
+    def listdir(self, parts: Tuple[str, ...]) -> List[str]:
+        entries = self._dirs.get(parts)
+        if entries is None:
+            raise NotADirectoryError("/".join(parts))
+        return list(entries)
+
+    def read(self, parts: Tuple[str, ...]) -> bytes:
+        entry = self.lookup(parts)
+        if entry is None:
+            raise FileNotFoundError(f"{self.ref}:{'/'.join(parts)}")
+        kind, oid = entry
+        if kind != "blob":
+            raise IsADirectoryError(f"{self.ref}:{'/'.join(parts)}")
+        data = self._blobs.get(oid)
+        if data is None:
+            obj = self._fetch([oid])[0]
+            if obj is None:
+                raise FileNotFoundError(f"{self.ref}:{'/'.join(parts)}")
+            data = self._blobs[oid] = obj[1]
+        return data
+
+
+class GitTreePath:
+    """Read-only stand-in for ``pathlib.Path`` inside a GitTree.
+
+    Supports what list, show and validate use. ``stat`` reports the blob
+    size and the commit time.
+    """
+
+    __slots__ = ("_tree", "_parts")
+
+    def __init__(self, tree: GitTree, parts: Tuple[str, ...]):
+        self._tree = tree
+        self._parts = parts
+
+    def __truediv__(self, other) -> "GitTreePath":
+        parts = [part for part in str(other).split("/") if part and part != "."]
+        return GitTreePath(self._tree, self._parts + tuple(parts))
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, GitTreePath)
+            and other._tree is self._tree
+            and other._parts == self._parts
+        )
+
+    def __hash__(self) -> int:
+        return hash(self._parts)
+
+    def __str__(self) -> str:
+        return f"{self._tree.ref}:{'/'.join(self._parts)}"
+
+    __repr__ = __str__
+
+    @property
+    def name(self) -> str:
+        return self._parts[-1] if self._parts else ""
+
+    @property
+    def parent(self) -> "GitTreePath":
+        return GitTreePath(self._tree, self._parts[:-1])
+
+    @property
+    def parts(self) -> Tuple[str, ...]:
+        return self._parts
+
+    def relative_to(self, other: "GitTreePath") -> PurePosixPath:
+        if self._parts[: len(other._parts)] != other._parts:
+            raise ValueError(f"{self} is not in {other}")
+        return PurePosixPath(*self._parts[len(other._parts) :])
+
+    def exists(self) -> bool:
+        return self._tree.lookup(self._parts) is not None
+
+    def is_dir(self) -> bool:
+        entry = self._tree.lookup(self._parts)
+        return entry is not None and entry[0] == "tree"
+
+    def is_file(self) -> bool:
+        entry = self._tree.lookup(self._parts)
+        return entry is not None and entry[0] == "blob"
+
+    def iterdir(self) -> Iterator["GitTreePath"]:
+        for name in self._tree.listdir(self._parts):
+            yield GitTreePath(self._tree, self._parts + (name,))
+
+    def read_bytes(self) -> bytes:
+        return self._tree.read(self._parts)
+
+    def read_text(self, encoding: str = "utf-8", errors: str = "strict") -> str:
+        # Universal newlines, as Path.read_text, so --ref output matches the work tree.
+        text = self.read_bytes().decode(encoding, errors)
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    def open(
+        self,
+        mode: str = "r",
+        encoding: Optional[str] = None,
+        errors: Optional[str] = None,
+        newline: Optional[str] = None,
+    ):
+        if mode not in ("r", "rt", "rb"):
+            raise PermissionError(f"{self} is read-only")
+        if mode == "rb":
+            return io.BytesIO(self.read_bytes())
+        # Text is newline-translated like read_text, whatever ``newline`` asks for.
+        return io.StringIO(self.read_text(encoding or "utf-8", errors or "strict"))
+
+    def stat(self) -> types.SimpleNamespace:
+        if not self.exists():
+            raise FileNotFoundError(str(self))
+        size = len(self.read_bytes()) if self.is_file() else 0
+        committed = self._tree.commit_time
+        return types.SimpleNamespace(
+            st_size=size, st_mtime=committed, st_mtime_ns=committed * 1_000_000_000
+        )
+
+
+class EvidenceChecker:
+    """Resolve file paths and test node IDs cited in verification notes.
+
+    All lookups go through one in-memory index of repository paths (built
+    once from ``git ls-files``, or a directory walk outside git), so checking
+    thousands of notes costs no extra filesystem calls. With ``diff_base``,
+    cited files are also compared against ``git diff --name-only <base>``.
+
+    A token is a citation when it contains ``/``, or when it is a filename
+    quoted in backticks; prose such as "Next.js" or "config.yaml" is left
+    alone. Bare quoted filenames are found by basename anywhere in the tree.
+    """
+
+    _FILE_EXTENSIONS = frozenset(
+        "c cc cfg cpp cs css go h hpp html ini java js json jsx kt lock md mjs php py rb rs "
+        "sh sql swift toml ts tsx txt vue yaml yml".split()
+    )
+    _TOKEN_SPLIT = re.compile(r"[\s,;()\[\]`'\"<>]+")
+    _QUOTED_SPLIT = re.compile(r"(`[^`]+`)")
+    _WALK_SKIP = frozenset((".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv"))
+
+    def __init__(self, root_dir: Path, diff_base: Optional[str] = None):
+        self.root_dir = Path(root_dir)
+        self.diff_base = diff_base
+        self._files: Optional[set] = None
+        self._dirs: Optional[set] = None
+        self._by_name: Dict[str, List[str]] = {}
+        self._changed: Optional[set] = None
+        self._texts: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _git_lines(self, *args: str) -> Optional[List[str]]:
+        try:
+            result = subprocess.run(
+                ["git", "-C", str(self.root_dir), *args],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return [line for line in result.stdout.decode("utf-8").split("\0") if line]
+
+    def _build_index(self) -> None:
+        with self._lock:
+            if self._files is not None:
+                return
+            files = self._git_lines("ls-files", "-z", "--cached", "--others", "--exclude-standard")
+            if files is None:
+                files = []
+                for dirpath, dirnames, filenames in os.walk(str(self.root_dir)):
+                    dirnames[:] = [name for name in dirnames if name not in self._WALK_SKIP]
+                    rel = os.path.relpath(dirpath, str(self.root_dir))
+                    prefix = "" if rel == "." else rel.replace(os.sep, "/") + "/"
+                    files.extend(prefix + name for name in filenames)
+            dirs = set()
+            for path in sorted(files):
+                parts = path.split("/")
+                self._by_name.setdefault(parts[-1], []).append(path)
+                for depth in range(1, len(parts)):
+                    dirs.add("/".join(parts[:depth]))
+            self._dirs = dirs
+            self._files = set(files)
+
+    def _changed_files(self) -> set:
+        if self._changed is None:
+            changed = set(self._git_lines("diff", "-z", "--name-only", self.diff_base) or [])
+            changed.update(self._git_lines("ls-files", "-z", "--others", "--exclude-standard") or [])
+            self._changed = changed
+        return self._changed
+
+    def citations(self, note: str) -> List[Tuple[str, Optional[str]]]:
+        """Extract (path, test name or None) citations from a verification note.
+
+        Paths are as written; bare filenames are resolved by ``resolve``.
+        """
+        self._build_index()
+        cited = []
+        for part in self._QUOTED_SPLIT.split(note):
+            quoted = part.startswith("`") and part.endswith("`")
+            for token in self._TOKEN_SPLIT.split(part):
+                token = token.rstrip(".:")
+                if token.startswith("./"):
+                    token = token[2:]
+                if not token or "://" in token or token.startswith(("-", "/", "$", "../")):
+                    continue
+                test = None
+                if "::" in token:
+                    token, _, test = token.partition("::")
+                    test = re.sub(r"\[.*$", "", test.split("::")[-1]) or None
+                token = re.sub(r":\d+(?::\d+)?$", "", token)
+                name = token.split("/")[-1]
+                extension = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+                if "/" in token:
+                    first = token.split("/", 1)[0]
+                    if not (
+                        extension in self._FILE_EXTENSIONS
+                        or first in self._dirs
+                        or first in self._files
+                    ):
+                        continue
+                elif not (quoted and extension in self._FILE_EXTENSIONS):
+                    continue
+                cited.append((token.rstrip("/"), test))
+        return cited
+
+    def resolve(self, path: str) -> List[str]:
+        """Repository paths a citation refers to: itself, or every file with a bare name."""
+        self._build_index()
+        if path in self._files or path in self._dirs:
+            return [path]
+        if "/" not in path:
+            return self._by_name.get(path, [])
+        return []
+
+    def check(self, note: str) -> List[Tuple[str, str]]:
+        """Return (diagnostic code, message) pairs for unresolvable citations."""
+        problems = []
+        for path, test in self.citations(note):
+            matches = self.resolve(path)
+            if not matches:
+                problems.append(("CFLX205", f"Cited path does not exist: {path}"))
                 continue
+            files = [match for match in matches if match in self._files]
+            if test and files and not any(self._mentions(match, test) for match in files):
+                problems.append(("CFLX206", f"Cited test not found: {path}::{test}"))
+            if self.diff_base and files and not set(files) & self._changed_files():
+                problems.append(
+                    ("CFLX207", f"Cited path is not changed relative to {self.diff_base}: {path}")
+                )
+        return problems
 
-            # Count tasks
-            if re.match(r"^\s*[-*]\s*\[[ x]\]", line):
-                total += 1
-                if re.match(r"^\s*[-*]\s*\[x\]", line):
-                    completed += 1
+    def _mentions(self, path: str, name: str) -> bool:
+        text = self._texts.get(path)
+        if text is None:
+            try:
+                text = (self.root_dir / path).read_text(encoding="utf-8", errors="replace")
+            except OSError:
+                text = ""
+            self._texts[path] = text
+        return re.search(r"\b" + re.escape(name) + r"\b", text) is not None
 
-        return {"tasks_completed": completed, "tasks_total": total}
 
-    def show_change(
-        self, change_id: str, json_output: bool = False, deltas_only: bool = False
-    ) -> Optional[Dict]:
-        """Show detailed information about a change."""
-        change_dir = self._find_change_dir(change_id)
-        if not change_dir:
+_RULE_SCOPES = ("change", "tasks", "specs")
+_EXCLUDED_TASK_SECTIONS = ("future work", "out of scope", "notes")
+_EXCLUDED_CHECKBOX_RE = re.compile(r"^\s*[-*]\s*\[[ x]\]")
+_TASK_MARK_RE = re.compile(r"^\s*[-*]\s*\[([ x])\]")
+# Groups: mark, the gap after the box, task text. A task counts whatever follows
+# its box; validation only looks at tasks whose text is set off by whitespace.
+_CHECKBOX_RE = re.compile(_TASK_MARK_RE.pattern + r"(\s*)(.*)$")
+_BULLET_RE = re.compile(r"^\s*[-*]\s+[^[]")
+_VERIFICATION_RE = re.compile(r"\(verification:\s*(.+?)\)\s*[.。]?$", re.IGNORECASE)
+_TITLE_RE = re.compile(r"^#\s+.+$", re.MULTILINE)
+_DELTA_MARKER_RE = re.compile(r"## (ADDED|MODIFIED|REMOVED) Requirements")
+_DELTA_SECTION_RE = re.compile(r"## (ADDED|MODIFIED|REMOVED) Requirements\s*$")
+_BLOCK_HEADING_RE = re.compile(r"#{1,3}\s")
+
+
+def outline_spec_delta(text: str) -> Dict:
+    """Outline a spec delta in a single pass over its lines.
+
+    Returns ``markers`` (whether any ADDED/MODIFIED/REMOVED section exists),
+    the total ``scenarios`` count and ``requirements`` as
+    ``[operation, name, line, scenarios]`` lists, where ``operation`` is
+    ``None`` for requirements outside a delta section. A requirement owns
+    the scenarios up to the next heading of level 1-3, as when merging.
+    """
+    outline = {"markers": False, "scenarios": 0, "requirements": []}
+    operation = None
+    current = None
+    for number, line in enumerate(text.split("\n"), 1):
+        # Markers count anywhere in the text, as they always have.
+        if not outline["markers"] and _DELTA_MARKER_RE.search(line):
+            outline["markers"] = True
+        if not line.startswith("#"):
+            continue
+        if line.startswith("#### Scenario:"):
+            outline["scenarios"] += 1
+            if current is not None:
+                current[3] += 1
+        elif line.startswith("### Requirement:"):
+            current = [operation, line[len("### Requirement:") :].strip(), number, 0]
+            outline["requirements"].append(current)
+        elif _BLOCK_HEADING_RE.match(line):
+            current = None
+            if line.startswith("## "):
+                section = _DELTA_SECTION_RE.match(line)
+                operation = section.group(1) if section else None
+    return outline
+
+
+class ChangeDocument:
+    """Parsed view of one change shared by every validation rule.
+
+    Files are read on first use and kept, so each file is read at most once
+    however many rules look at it. ``read_seconds`` is the CPU time spent
+    reading, which is reported apart from the rules themselves.
+    """
+
+    def __init__(self, change_id: str, change_dir: Optional[Path] = None):
+        self.change_id = change_id
+        self.change_dir = change_dir
+        self.read_seconds = 0.0
+
+    @classmethod
+    def from_files(cls, change_id: str, files: Dict[str, Optional[str]]) -> "ChangeDocument":
+        """Build a document from texts keyed by path relative to the change directory.
+
+        ``specs/<capability>/spec.md`` keys become spec deltas; a ``None``
+        text stands for a missing file (``specs/<capability>/`` alone for a
+        capability directory without spec.md). Line endings are normalized
+        as when reading from disk.
+        """
+        document = cls(change_id)
+        texts = {
+            name: None if text is None else text.replace("\r\n", "\n").replace("\r", "\n")
+            for name, text in files.items()
+        }
+        document.proposal = texts.get("proposal.md")
+        document.tasks = texts.get("tasks.md")
+        specs = {}
+        for name, text in texts.items():
+            parts = name.split("/")
+            if len(parts) == 3 and parts[0] == "specs" and parts[2] == "spec.md":
+                specs[parts[1]] = text
+            elif len(parts) == 3 and parts[0] == "specs" and parts[2] == "":
+                specs.setdefault(parts[1], None)
+        document.specs = specs if specs else None
+        return document
+
+    def _read(self, relative: str) -> Optional[str]:
+        if self.change_dir is None:
             return None
+        started = time.thread_time()
+        try:
+            return (self.change_dir / relative).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        finally:
+            self.read_seconds += time.thread_time() - started
 
-        info = {
-            "id": change_id,
-            "path": str(change_dir.relative_to(self.root_dir)),
-            "archived": "archive" in change_dir.parts,
+    @functools.cached_property
+    def proposal(self) -> Optional[str]:
+        return self._read("proposal.md")
+
+    @functools.cached_property
+    def tasks(self) -> Optional[str]:
+        return self._read("tasks.md")
+
+    @functools.cached_property
+    def specs(self) -> Optional[Dict[str, Optional[str]]]:
+        """Spec deltas by capability (``None`` text when spec.md is missing).
+
+        ``None`` when the change has no ``specs/`` directory.
+        """
+        if self.change_dir is None:
+            return None
+        specs_dir = self.change_dir / "specs"
+        if not specs_dir.is_dir():
+            return None
+        specs = {}
+        for spec_dir in specs_dir.iterdir():
+            if spec_dir.is_dir():
+                specs[spec_dir.name] = self._read(f"specs/{spec_dir.name}/spec.md")
+        return specs
+
+    @functools.cached_property
+    def spec_outlines(self) -> Optional[Dict[str, Optional[Dict]]]:
+        """``outline_spec_delta`` of each spec delta, keyed like ``specs``."""
+        if self.specs is None:
+            return None
+        return {
+            capability: None if content is None else outline_spec_delta(content)
+            for capability, content in self.specs.items()
         }
 
-        # Read proposal
-        proposal_file = change_dir / "proposal.md"
-        if proposal_file.exists():
-            info["proposal"] = proposal_file.read_text(encoding="utf-8")
+    @functools.cached_property
+    def task_lines(self) -> List[Tuple[int, str, bool]]:
+        """Non-heading tasks.md lines as ``(number, line, in_excluded_section)``."""
+        lines = []
+        excluded = False
+        for number, line in enumerate((self.tasks or "").split("\n"), 1):
+            if line.startswith("##"):
+                section = line.lstrip("#").strip().lower()
+                excluded = any(name in section for name in _EXCLUDED_TASK_SECTIONS)
+                continue
+            lines.append((number, line, excluded))
+        return lines
 
-        # Read tasks
-        tasks_file = change_dir / "tasks.md"
-        if tasks_file.exists():
-            info["tasks"] = tasks_file.read_text(encoding="utf-8")
-            info.update(self._count_tasks(tasks_file))
+    @functools.cached_property
+    def task_checkboxes(self) -> List[Tuple[int, str, str, Optional[str]]]:
+        """Active checkbox tasks as ``(number, mark, text, verification)``."""
+        checkboxes = []
+        for number, line, excluded in self.task_lines:
+            match = None if excluded else _CHECKBOX_RE.match(line)
+            if match and match.group(2):
+                text = match.group(3).strip()
+                verification = _VERIFICATION_RE.search(text)
+                checkboxes.append(
+                    (number, match.group(1), text, verification and verification.group(1))
+                )
+        return checkboxes
 
-        # Read design
-        design_file = change_dir / "design.md"
-        if design_file.exists():
-            info["design"] = design_file.read_text(encoding="utf-8")
 
-        # Read spec deltas
-        specs_dir = change_dir / "specs"
-        if specs_dir.exists():
-            info["specs"] = {}
-            for spec_dir in specs_dir.iterdir():
-                if spec_dir.is_dir():
-                    spec_file = spec_dir / "spec.md"
-                    if spec_file.exists():
-                        info["specs"][spec_dir.name] = spec_file.read_text(
-                            encoding="utf-8"
-                        )
+class ValidationContext:
+    """Options shared by the rules of one validation run."""
 
-        if deltas_only and "specs" in info:
-            # Only return spec deltas
-            return {"id": change_id, "specs": info["specs"]}
+    __slots__ = ("manager", "strict", "evidence_mode")
 
-        return info
+    def __init__(self, manager: "OpenSpecManager", strict: bool, evidence_mode: EvidenceMode):
+        self.manager = manager
+        self.strict = strict
+        self.evidence_mode = evidence_mode
 
-    def _find_change_dir(self, change_id: str) -> Optional[Path]:
-        """Find the directory for a given change ID."""
-        # Check active changes
-        change_dir = self.changes_dir / change_id
-        if change_dir.exists():
-            return change_dir
 
-        # Check archive
-        archive_change_dir = self.archive_dir / change_id
-        if archive_change_dir.exists():
-            return archive_change_dir
+class ValidationRule:
+    """A registered check producing diagnostics for a ChangeDocument."""
 
-        return None
+    __slots__ = ("id", "func", "scope", "codes", "enabled", "description")
 
-    def validate_change(
-        self, change_id: Optional[str] = None, strict: bool = False
-    ) -> Tuple[bool, List[str]]:
-        """Validate a change or all changes."""
-        errors = []
+    def __init__(
+        self,
+        rule_id: str,
+        func: Callable[[ChangeDocument, ValidationContext], Iterable[Diagnostic]],
+        scope: str,
+        codes: Tuple[str, ...],
+        enabled: bool,
+    ):
+        self.id = rule_id
+        self.func = func
+        self.scope = scope
+        self.codes = codes
+        self.enabled = enabled
+        self.description = (func.__doc__ or "").strip().split("\n")[0]
 
-        if change_id:
-            change_dir = self._find_change_dir(change_id)
-            if not change_dir:
-                errors.append(f"Change '{change_id}' not found")
-                return False, errors
 
-            errors.extend(self._validate_change_dir(change_dir, strict))
-        else:
-            # Validate all changes
-            if self.changes_dir.exists():
-                for item in self.changes_dir.iterdir():
-                    if item.is_dir() and item.name != "archive":
-                        errors.extend(self._validate_change_dir(item, strict))
+VALIDATION_RULES: Dict[str, ValidationRule] = {}
 
-        return len(errors) == 0, errors
 
-    def _validate_change_dir(self, change_dir: Path, strict: bool) -> List[str]:
-        """Validate a single change directory."""
-        errors = []
-        change_id = change_dir.name
+def validation_rule(
+    rule_id: str, scope: str = "change", codes: Iterable[str] = (), enabled: bool = True
+):
+    """Register ``func(document, context)`` as validation rule ``rule_id``.
 
-        # Check required files
-        proposal_file = change_dir / "proposal.md"
-        tasks_file = change_dir / "tasks.md"
+    ``scope`` orders the output: rules run in registration order, and
+    diagnostics are grouped as change files, then tasks.md (by line), then
+    spec deltas. ``codes`` lists the diagnostic codes the rule may emit; a
+    mapping of code to name also registers names for new codes. Rules with
+    ``enabled=False`` only run when enabled explicitly.
+    """
+    if scope not in _RULE_SCOPES:
+        raise ValueError(f"Unknown rule scope: {scope}")
 
-        if not proposal_file.exists():
-            errors.append(f"{change_id}: Missing proposal.md")
+    def register(func):
+        if rule_id in VALIDATION_RULES:
+            raise ValueError(f"Duplicate validation rule: {rule_id}")
+        if isinstance(codes, dict):
+            for code, name in codes.items():
+                DIAGNOSTIC_CODES.setdefault(code, name)
+        VALIDATION_RULES[rule_id] = ValidationRule(rule_id, func, scope, tuple(codes), enabled)
+        return func
 
-        if not tasks_file.exists():
-            errors.append(f"{change_id}: Missing tasks.md")
+    return register
 
-        # Validate proposal structure
-        if proposal_file.exists():
-            content = proposal_file.read_text(encoding="utf-8")
-            if not re.search(r"^#\s+.+$", content, re.MULTILINE):
-                errors.append(f"{change_id}: proposal.md missing title heading")
 
-        # Validate tasks format
-        if tasks_file.exists():
-            task_errors = self._validate_tasks_file(tasks_file, change_id)
-            errors.extend(task_errors)
+def load_rule_plugin(path: str) -> List[str]:
+    """Load validation rules from a local Python file and return their IDs.
 
-        # Validate spec deltas (strict mode)
-        if strict:
-            specs_dir = change_dir / "specs"
-            if specs_dir.exists() and specs_dir.is_dir():
-                spec_errors = self._validate_specs_dir(specs_dir, change_id)
-                errors.extend(spec_errors)
-            elif strict:
-                errors.append(
-                    f"{change_id}: No spec deltas found (required in strict mode)"
-                )
+    The plugin runs with ``validation_rule``, ``Diagnostic`` and
+    ``ChangeDocument`` already defined, so it works the same whether cflx is
+    imported or run as a script.
+    """
+    spec = importlib.util.spec_from_file_location(f"cflx_rules_{Path(path).stem}", path)
+    if spec is None or spec.loader is None:
+        raise ValueError(f"Cannot load rule plugin: {path}")
+    module = importlib.util.module_from_spec(spec)
+    module.validation_rule = validation_rule
+    module.Diagnostic = Diagnostic
+    module.ChangeDocument = ChangeDocument
+    before = set(VALIDATION_RULES)
+    spec.loader.exec_module(module)
+    return [rule_id for rule_id in VALIDATION_RULES if rule_id not in before]
 
-        return errors
 
-    def _validate_tasks_file(self, tasks_file: Path, change_id: str) -> List[str]:
-        """Validate tasks.md file format."""
-        errors = []
-        content = tasks_file.read_text(encoding="utf-8")
-        lines = content.split("\n")
+@validation_rule("required-files", codes=("CFLX101", "CFLX102"))
+def _rule_required_files(document: ChangeDocument, context: ValidationContext):
+    """proposal.md and tasks.md must exist."""
+    if document.proposal is None:
+        yield Diagnostic(
+            "CFLX101", "error", "Missing proposal.md", document.change_id, file="proposal.md"
+        )
+    if document.tasks is None:
+        yield Diagnostic(
+            "CFLX102", "error", "Missing tasks.md", document.change_id, file="tasks.md"
+        )
 
-        in_excluded_section = False
-        sections_to_exclude = ["future work", "out of scope", "notes"]
 
-        for i, line in enumerate(lines, 1):
-            # Check section headers
-            if line.startswith("##"):
-                section_name = line.lstrip("#").strip().lower()
-                in_excluded_section = any(
-                    excluded in section_name for excluded in sections_to_exclude
+@validation_rule("proposal-title", codes=("CFLX103",))
+def _rule_proposal_title(document: ChangeDocument, context: ValidationContext):
+    """proposal.md must start with a title heading."""
+    if document.proposal is not None and not _TITLE_RE.search(document.proposal):
+        yield Diagnostic(
+            "CFLX103",
+            "error",
+            "proposal.md missing title heading",
+            document.change_id,
+            file="proposal.md",
+        )
+
+
+@validation_rule("task-evidence", scope="tasks", codes=("CFLX203", "CFLX204"))
+def _rule_task_evidence(document: ChangeDocument, context: ValidationContext):
+    """Behavior-bearing tasks need a verification note citing evidence (strict)."""
+    if not context.strict or context.evidence_mode == "off":
+        return
+    severity = "error" if context.evidence_mode == "error" else "warning"
+    manager = context.manager
+    for number, _, text, verification in document.task_checkboxes:
+        if not manager._looks_like_behavior_task(text):
+            continue
+        if verification is None:
+            yield Diagnostic(
+                "CFLX203",
+                severity,
+                "Behavior-bearing task missing '(verification: ...)' note",
+                document.change_id,
+                file="tasks.md",
+                line=number,
+            )
+        elif not manager._has_repository_evidence_hint(verification.strip()):
+            yield Diagnostic(
+                "CFLX204",
+                severity,
+                "Verification note should cite repository-verifiable evidence "
+                "such as source paths, tests, or runnable commands",
+                document.change_id,
+                file="tasks.md",
+                line=number,
+            )
+
+
+@validation_rule("cited-evidence", scope="tasks", codes=("CFLX205", "CFLX206", "CFLX207"))
+def _rule_cited_evidence(document: ChangeDocument, context: ValidationContext):
+    """Paths and tests cited by completed tasks must exist (--check-paths)."""
+    checker = context.manager.evidence_checker
+    if checker is None:
+        return
+    severity = "warning" if context.evidence_mode == "warn" else "error"
+    for number, mark, _, verification in document.task_checkboxes:
+        if mark != "x" or verification is None:
+            continue
+        for code, message in checker.check(verification):
+            yield Diagnostic(
+                code,
+                "warning" if code == "CFLX207" else severity,
+                message,
+                document.change_id,
+                file="tasks.md",
+                line=number,
+            )
+
+
+@validation_rule("task-format", scope="tasks", codes=("CFLX201", "CFLX202"))
+def _rule_task_format(document: ChangeDocument, context: ValidationContext):
+    """Tasks need checkboxes, except in Future Work / Out of Scope / Notes."""
+    for number, line, excluded in document.task_lines:
+        if excluded:
+            if _EXCLUDED_CHECKBOX_RE.match(line):
+                yield Diagnostic(
+                    "CFLX201",
+                    "error",
+                    "Checkbox found in excluded section (should be removed)",
+                    document.change_id,
+                    file="tasks.md",
+                    line=number,
                 )
-                continue
+            continue
+        stripped = line.strip()
+        if (
+            stripped
+            and _BULLET_RE.match(line)
+            and not stripped.startswith(("##", "#", "---", "```"))
+        ):
+            yield Diagnostic(
+                "CFLX202",
+                "error",
+                f"Possible task without checkbox: {stripped[:50]}",
+                document.change_id,
+                file="tasks.md",
+                line=number,
+            )
+
+
+@validation_rule(
+    "spec-deltas", scope="specs", codes=("CFLX301", "CFLX302", "CFLX303", "CFLX304", "CFLX305")
+)
+def _rule_spec_deltas(document: ChangeDocument, context: ValidationContext):
+    """Spec deltas must exist, carry delta markers and have scenarios (strict)."""
+    if not context.strict:
+        return
+    if document.spec_outlines is None:
+        yield Diagnostic(
+            "CFLX301",
+            "error",
+            "No spec deltas found (required in strict mode)",
+            document.change_id,
+        )
+        return
+    for capability, outline in document.spec_outlines.items():
+        spec_path = f"specs/{capability}/spec.md"
+        if outline is None:
+            yield Diagnostic(
+                "CFLX302",
+                "error",
+                f"Missing spec.md in {capability}",
+                document.change_id,
+                file=spec_path,
+            )
+            continue
+
+        if not outline["markers"]:
+            yield Diagnostic(
+                "CFLX303",
+                "error",
+                f"{capability}/spec.md missing delta markers (ADDED/MODIFIED/REMOVED)",
+                document.change_id,
+                file=spec_path,
+            )
+
+        if outline["requirements"] and not outline["scenarios"]:
+            yield Diagnostic(
+                "CFLX304",
+                "error",
+                f"{capability}/spec.md has requirements but no scenarios",
+                document.change_id,
+                file=spec_path,
+            )
+            continue
 
-            # Check for checkboxes in excluded sections
-            if in_excluded_section and re.match(r"^\s*[-*]\s*\[[ x]\]", line):
-                errors.append(
-                    f"{change_id}: tasks.md:{i}: Checkbox found in excluded section (should be removed)"
+        for operation, name, line, scenarios in outline["requirements"]:
+            if not scenarios and operation != "REMOVED":
+                yield Diagnostic(
+                    "CFLX305",
+                    "error",
+                    f"Requirement has no scenarios: {name}",
+                    document.change_id,
+                    file=spec_path,
+                    line=line,
                 )
 
-            # Check for tasks without checkboxes in active sections
-            if (
-                not in_excluded_section
-                and re.match(r"^\s*[-*]\s+[^[]", line)
-                and line.strip()
-            ):
-                # Might be a task without checkbox
-                if not line.strip().startswith(("##", "#", "---", "```")):
-                    errors.append(
-                        f"{change_id}: tasks.md:{i}: Possible task without checkbox: {line.strip()[:50]}"
-                    )
 
-        return errors
+@validation_rule("spec-delta-conflicts", scope="specs", codes=("CFLX308",))
+def _rule_spec_delta_conflicts(document: ChangeDocument, context: ValidationContext):
+    """A delta must not name the same requirement twice (strict); it cannot be merged."""
+    if not context.strict or not document.spec_outlines:
+        return
+    for capability, outline in document.spec_outlines.items():
+        if outline is None:
+            continue
+        conflicts = context.manager._conflicting_delta_names(
+            (operation, name) for operation, name, _, _ in outline["requirements"] if operation
+        )
+        reported = set()
+        for operation, name, line, _ in outline["requirements"]:
+            if not operation or name not in conflicts or name in reported:
+                continue
+            reported.add(name)
+            yield Diagnostic(
+                "CFLX308",
+                "error",
+                f"Requirement named more than once ({' and '.join(conflicts[name])}): {name}",
+                document.change_id,
+                file=f"specs/{capability}/spec.md",
+                line=line,
+            )
 
-    def _validate_specs_dir(self, specs_dir: Path, change_id: str) -> List[str]:
-        """Validate spec delta files."""
-        errors = []
 
-        for spec_dir in specs_dir.iterdir():
-            if not spec_dir.is_dir():
+@validation_rule("spec-canonical-names", scope="specs", codes=("CFLX306", "CFLX307"))
+def _rule_spec_canonical_names(document: ChangeDocument, context: ValidationContext):
+    """MODIFIED/REMOVED names must exist in the canonical spec, ADDED ones must not (strict)."""
+    if not context.strict or not document.spec_outlines:
+        return
+    manager = context.manager
+    for capability, outline in document.spec_outlines.items():
+        if outline is None:
+            continue
+        existing = manager.requirement_names(capability)
+        for operation, name, line, _ in outline["requirements"]:
+            if operation in ("MODIFIED", "REMOVED") and name not in existing:
+                code = "CFLX306"
+                message = f"{operation} requirement not found in canonical spec: {name}"
+            elif operation == "ADDED" and name in existing:
+                code = "CFLX307"
+                message = f"ADDED requirement already exists in canonical spec: {name}"
+            else:
                 continue
+            yield Diagnostic(
+                code,
+                "error",
+                message,
+                document.change_id,
+                file=f"specs/{capability}/spec.md",
+                line=line,
+            )
+    manager._flush_requirement_index()
+
+
+class _Record(Mapping):
+    """Read-only dict view of a slotted record.
+
+    ``to_dict`` gives the plain dict used for JSON output; fields that are
+    ``None`` are left out, as the dict-based results always did.
+    """
+
+    __slots__ = ()
+    _FIELDS: Tuple[str, ...] = ()
+
+    def to_dict(self) -> Dict:
+        view = {}
+        for field in self._FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                view[field] = value
+        return view
+
+    def __getitem__(self, key: str):
+        value = getattr(self, key, None) if key in self._FIELDS else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+    def __len__(self) -> int:
+        return len(self.to_dict())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class TaskInfo(_Record):
+    """One checkbox task of a tasks.md file."""
+
+    __slots__ = ("line", "section", "checked", "text", "verification")
+    _FIELDS = __slots__
+
+    def __init__(
+        self,
+        line: int,
+        section: Optional[str],
+        checked: bool,
+        text: str,
+        verification: Optional[str] = None,
+    ):
+        self.line = line
+        # Section headings repeat across tasks and changes; share one string.
+        self.section = sys.intern(section) if section is not None else None
+        self.checked = checked
+        self.text = text
+        self.verification = verification
+
+    def to_dict(self) -> Dict:
+        # Same keys as the dicts from _iter_tasks, including null sections/notes.
+        return {field: getattr(self, field) for field in self._FIELDS}
+
+    def __getitem__(self, key: str):
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+
+class SpecDelta(_Record):
+    """A spec delta of a change; the content is read when first asked for."""
+
+    __slots__ = ("change", "capability")
+    _FIELDS = ("change_id", "capability", "path")
+
+    def __init__(self, change: "ChangeInfo", capability: str):
+        self.change = change
+        self.capability = sys.intern(capability)
+
+    @property
+    def change_id(self) -> str:
+        return self.change.id
+
+    @property
+    def path(self) -> str:
+        return f"{self.change.path}/specs/{self.capability}/spec.md"
+
+    @property
+    def content(self) -> Optional[str]:
+        return self.change.read(f"specs/{self.capability}/spec.md")
+
+    def outline(self) -> Optional[Dict]:
+        """``outline_spec_delta`` of the content, or None if it is gone."""
+        content = self.content
+        return None if content is None else outline_spec_delta(content)
+
+
+class ChangeInfo(_Record):
+    """Compact list entry for a change, with documents loaded on demand.
+
+    IDs are interned and the directory part of ``path`` is a string shared
+    by every change in the same directory, so keeping many records costs
+    little more than their counts. Contents are never held: ``read``,
+    ``iter_tasks`` and ``spec_deltas`` go back to the file or pack.
+    """
+
+    __slots__ = (
+        "manager",
+        "id",
+        "_base",
+        "archived",
+        "packed",
+        "title",
+        "tasks_completed",
+        "tasks_total",
+    )
+    _FIELDS = ("id", "path", "archived", "packed", "title", "tasks_completed", "tasks_total")
+
+    def __init__(
+        self,
+        manager: "OpenSpecManager",
+        change_id: str,
+        base: str,
+        archived: bool = False,
+        packed: bool = False,
+        title: Optional[str] = None,
+        tasks_completed: Optional[int] = None,
+        tasks_total: Optional[int] = None,
+    ):
+        self.manager = manager
+        self.id = sys.intern(change_id)
+        self._base = sys.intern(base)
+        self.archived = archived
+        # None rather than False so the list view only shows packed changes as such.
+        self.packed = True if packed else None
+        self.title = title
+        self.tasks_completed = tasks_completed
+        self.tasks_total = tasks_total
+
+    @property
+    def path(self) -> str:
+        """Repository-relative path (``<pack>#<id>`` for packed changes)."""
+        return self._base + self.id
+
+    def read(self, name: str) -> Optional[str]:
+        """Text of a document of the change, or None if it does not exist."""
+        try:
+            if self.packed:
+                return self.manager.archive_pack.read_member(self.id, name).decode("utf-8")
+            return (self.manager.root_dir / self.path / name).read_text(encoding="utf-8")
+        except (FileNotFoundError, KeyError):
+            return None
+
+    def iter_tasks(self, open_only: bool = False) -> Iterator[TaskInfo]:
+        """Yield the checkbox tasks outside excluded sections."""
+        tasks = self.read("tasks.md")
+        for task in OpenSpecManager._iter_tasks((tasks or "").split("\n"), open_only):
+            yield TaskInfo(
+                task["line"], task["section"], task["checked"], task["text"], task["verification"]
+            )
+
+    def spec_deltas(self) -> List[SpecDelta]:
+        """Spec deltas of the change, without reading them."""
+        if self.packed:
+            entry = self.manager.archive_pack.index().get(self.id, {})
+            capabilities = [
+                name.split("/")[1]
+                for name in entry.get("files", [])
+                if name.startswith("specs/") and name.endswith("/spec.md") and name.count("/") == 2
+            ]
+        else:
+            specs_dir = self.manager.root_dir / self.path / "specs"
+            capabilities = sorted(
+                spec_dir.name
+                for spec_dir in (specs_dir.iterdir() if specs_dir.is_dir() else ())
+                if (spec_dir / "spec.md").is_file()
+            )
+        return [SpecDelta(self, capability) for capability in capabilities]
+
+
+class OpenSpecManager:
+    """Manage OpenSpec changes and specifications."""
+
+    _BEHAVIOR_TASK_KEYWORDS = (
+        "add ",
+        "implement ",
+        "create ",
+        "update ",
+        "modify ",
+        "introduce ",
+        "wire ",
+        "integrate ",
+        "expose ",
+        "persist ",
+        "support ",
+        "build ",
+    )
+
+    _EVIDENCE_HINTS = (
+        "src/",
+        "tests/",
+        "uv run ",
+        "pytest",
+        "make ",
+        "python ",
+        "python3 ",
+        "cflx validate",
+        ".py",
+        ".ts",
+        ".js",
+        ".rs",
+        ".go",
+        " --once",
+    )
+    # Bumped when replay semantics change, so older rebuild checkpoints are ignored.
+    _REBUILD_VERSION = 2
+
+    def __init__(self, root_dir: str = ".", lock_timeout: float = 30.0):
+        self.root_dir = Path(root_dir).resolve()
+        self.lock_timeout = lock_timeout
+        # Set by at_ref(): the tree is read from a commit and nothing is written.
+        self.git_tree: Optional[GitTree] = None
+        # Set for commands that only read: caches are used but never written,
+        # except the ones named in writable_caches, which the command owns.
+        self.read_only = False
+        self.writable_caches: set = set()
+        # Set to an EvidenceChecker to resolve paths cited by completed tasks.
+        self.evidence_checker: Optional[EvidenceChecker] = None
+        # Rule IDs switched on or off relative to each rule's default.
+        self.enabled_rules: set = set()
+        self.disabled_rules: set = set()
+        self.rule_timings: Dict[str, Dict] = {}
+        self._rule_timings_lock = threading.Lock()
+        self.changes_dir = self.root_dir / "openspec" / "changes"
+        self.archive_dir = self.changes_dir / "archive"
+        self.specs_dir = self.root_dir / "openspec" / "specs"
+        self.cache_dir = self.root_dir / "openspec" / ".cflx"
+        self.progress_journal = ProgressJournal(self.cache_dir / "progress.jsonl")
+        self._requirement_index: Optional[Dict] = None
+        self._requirement_index_dirty = False
+        self._requirement_index_lock = threading.Lock()
+        self.archive_pack = ArchivePack(self.archive_dir / ArchivePack.FILENAME)
+
+    @classmethod
+    def at_ref(cls, ref: str, root_dir: str = ".") -> "OpenSpecManager":
+        """Open a read-only manager over the openspec tree of a git commit.
+
+        Files are read through one ``git cat-file --batch`` process; caches
+        and the progress journal are never written. Call ``close`` when done.
+        """
+        manager = cls(root_dir)
+        manager.git_tree = GitTree(manager.root_dir, ref)
+        root = manager.git_tree.root()
+        manager.changes_dir = root / "openspec" / "changes"
+        manager.archive_dir = manager.changes_dir / "archive"
+        manager.specs_dir = root / "openspec" / "specs"
+        manager.cache_dir = root / "openspec" / ".cflx"
+        manager.archive_pack = ArchivePack(manager.archive_dir / ArchivePack.FILENAME)
+        manager.root_dir = root
+        return manager
+
+    def close(self) -> None:
+        """Stop the git reader of a manager opened with ``at_ref``."""
+        if self.git_tree is not None:
+            self.git_tree.close()
+
+    def list_changes(self, show_specs: bool = False) -> List[Dict]:
+        """List all changes or specs."""
+        if show_specs:
+            return self._list_specs()
+
+        return [record.to_dict() for record in self.list_change_records()]
+
+    def list_change_records(self) -> List["ChangeInfo"]:
+        """List all changes as compact ``ChangeInfo`` records, sorted by ID.
+
+        Same entries as ``list_changes``; meant for long-running callers
+        that keep many changes in memory.
+        """
+        records = [
+            self._change_record(item, archived=archived)
+            for item, archived in self._iter_change_dirs()
+        ]
+        records.extend(self._packed_change_records({record.id for record in records}))
+        records.sort(key=lambda record: record.id)
+        return records
+
+    def list_worktree_changes(self, max_workers: int = 8) -> List[Dict]:
+        """Merge active changes and their progress across all git worktrees.
+
+        Worktrees come from ``git worktree list --porcelain`` and are scanned
+        concurrently. Titles and task counts share one cache in this
+        worktree's ``openspec/.cflx/worktree-changes.json``, keyed by absolute
+        path plus the mtime and size of proposal.md and tasks.md, so only
+        changed files are read. Each change reports the worktree with the
+        most completed tasks, followed by every worktree it appears in.
+        """
+        worktrees = self._git_worktrees()
+        cache = self._load_cache("worktree-changes")
+        fresh: Dict[str, Dict] = {}
+        lock = threading.Lock()
+
+        def scan(worktree: Dict) -> List[Dict]:
+            found = []
+            changes_dir = Path(worktree["path"]) / "openspec" / "changes"
+            if not changes_dir.is_dir():
+                return found
+            for change_dir in changes_dir.iterdir():
+                if not change_dir.is_dir() or change_dir.name == "archive":
+                    continue
+                key = []
+                for name in ("proposal.md", "tasks.md"):
+                    try:
+                        stat = (change_dir / name).stat()
+                        key.append([stat.st_mtime_ns, stat.st_size])
+                    except FileNotFoundError:
+                        key.append(None)
+                path = str(change_dir)
+                with lock:
+                    cached = cache.get(path)
+                info = cached["info"] if cached and cached["key"] == key else None
+                if info is None:
+                    info = {}
+                    if key[0]:
+                        title = self._extract_title(
+                            (change_dir / "proposal.md").read_text(encoding="utf-8")
+                        )
+                        if title:
+                            info["title"] = title
+                    if key[1]:
+                        info.update(
+                            self._count_tasks_text(
+                                (change_dir / "tasks.md").read_text(encoding="utf-8")
+                            )
+                        )
+                with lock:
+                    fresh[path] = {"key": key, "info": info}
+                found.append(
+                    {"id": change_dir.name, "path": path, "branch": worktree.get("branch"), **info}
+                )
+            return found
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cflx-tree") as pool:
+            scanned = list(pool.map(scan, worktrees))
+        if fresh != cache and (self.root_dir / "openspec").is_dir():
+            self._save_cache("worktree-changes", fresh)
+
+        groups: Dict[str, List[Dict]] = {}
+        for entry in (entry for entries in scanned for entry in entries):
+            groups.setdefault(entry["id"], []).append(entry)
+
+        merged = []
+        for change_id in sorted(groups):
+            entries = groups[change_id]
+            best = max(entries, key=lambda entry: entry.get("tasks_completed", 0))
+            change = dict(best)
+            change["worktrees"] = [
+                {
+                    key: entry[key]
+                    for key in ("path", "branch", "tasks_completed", "tasks_total")
+                    if key in entry
+                }
+                for entry in entries
+            ]
+            merged.append(change)
+        return merged
+
+    def _git_worktrees(self) -> List[Dict]:
+        """Parse ``git worktree list --porcelain`` into path/branch dicts."""
+        result = subprocess.run(
+            ["git", "worktree", "list", "--porcelain"],
+            cwd=str(self.root_dir),
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or "git worktree list failed")
+        worktrees = []
+        current: Dict = {}
+        for line in result.stdout.split("\n") + [""]:
+            if not line:
+                path = current.get("path")
+                if path and "bare" not in current and Path(path).is_dir():
+                    worktrees.append(current)
+                current = {}
+                continue
+            field, _, value = line.partition(" ")
+            if field == "worktree":
+                current["path"] = value
+            elif field == "branch":
+                if value.startswith("refs/heads/"):
+                    value = value[len("refs/heads/") :]
+                current["branch"] = value
+            elif field in ("bare", "detached"):
+                current[field] = True
+        return worktrees
+
+    def _list_packed_changes(self, skip_ids: Optional[set] = None) -> List[Dict]:
+        """List changes stored in the archive pack from its index alone."""
+        return [record.to_dict() for record in self._packed_change_records(skip_ids)]
+
+    def _packed_change_records(self, skip_ids: Optional[set] = None) -> List["ChangeInfo"]:
+        index = self.archive_pack.index()
+        if not index:
+            return []
+        base = self.archive_pack.member_path("", self.root_dir)
+        return [
+            ChangeInfo(
+                self,
+                change_id,
+                base,
+                archived=True,
+                packed=True,
+                title=entry.get("title"),
+                tasks_completed=entry.get("tasks_completed"),
+                tasks_total=entry.get("tasks_total"),
+            )
+            for change_id, entry in index.items()
+            if not (skip_ids and change_id in skip_ids)
+        ]
+
+    def _iter_change_dirs(self, include_archived: bool = True) -> List[Tuple[Path, bool]]:
+        """Return (directory, archived) pairs for every change on disk."""
+        dirs = []
+        if not self.changes_dir.exists():
+            return dirs
+
+        for item in self.changes_dir.iterdir():
+            if item.is_dir() and item.name != "archive":
+                dirs.append((item, False))
+
+        # Also check archive
+        if include_archived and self.archive_dir.exists():
+            for item in self.archive_dir.iterdir():
+                if item.is_dir():
+                    dirs.append((item, True))
+
+        return dirs
+
+    def _list_specs(self, max_workers: int = 8) -> List[Dict]:
+        """List all specs with requirement/scenario counts, size and mtime.
+
+        Per-spec statistics are computed in parallel and memoized in
+        ``openspec/.cflx/spec-stats.json`` keyed by mtime and size, so
+        unchanged specs are never re-read.
+        """
+        specs = []
+        if not self.specs_dir.exists():
+            return specs
+
+        spec_files = []
+        for item in self.specs_dir.iterdir():
+            if item.is_dir():
+                spec_file = item / "spec.md"
+                if spec_file.exists():
+                    spec_files.append(spec_file)
+
+        cache = self._load_cache("spec-stats")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(lambda path: self._spec_stats(path, cache), spec_files))
+
+        fresh = {}
+        for spec_file, (key, stats) in zip(spec_files, results):
+            path = str(spec_file.relative_to(self.root_dir))
+            fresh[path] = {"key": key, "stats": stats}
+            specs.append(dict({"name": spec_file.parent.name, "path": path}, **stats))
+        if fresh != cache:
+            self._save_cache("spec-stats", fresh)
+
+        return sorted(specs, key=lambda x: x["name"])
+
+    def _spec_stats(self, spec_file: Path, cache: Dict) -> Tuple[List[int], Dict]:
+        """Return (cache key, stats) for a spec, reusing the cache when unchanged."""
+        stat = spec_file.stat()
+        key = [stat.st_mtime_ns, stat.st_size]
+        cached = cache.get(str(spec_file.relative_to(self.root_dir)))
+        if cached and cached.get("key") == key:
+            return key, cached["stats"]
+
+        content = spec_file.read_text(encoding="utf-8")
+        return key, {
+            "requirements": len(re.findall(r"^### Requirement:", content, re.MULTILINE)),
+            "scenarios": len(re.findall(r"^#### Scenario:", content, re.MULTILINE)),
+            "bytes": stat.st_size,
+            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+        }
+
+    def requirement_names(self, capability: str) -> set:
+        """Requirement names of a canonical spec (empty if it does not exist)."""
+        blocks = self._indexed_requirement_blocks(capability)
+        return {name for name, _, _ in blocks or []}
+
+    def _indexed_requirement_blocks(
+        self, capability: str, data: Optional[bytes] = None
+    ) -> Optional[List[Tuple[str, int, int]]]:
+        """Requirement blocks of a canonical spec, or None if it does not exist.
+
+        Blocks are kept in ``openspec/.cflx/requirement-index.json`` keyed by
+        the spec's mtime and size, so unchanged specs are never re-parsed.
+        ``data`` is the spec content when the caller has already read it.
+        """
+        spec_file = self.specs_dir / capability / "spec.md"
+        try:
+            stat = spec_file.stat()
+        except FileNotFoundError:
+            return None
+        key = [stat.st_mtime_ns, stat.st_size]
+        with self._requirement_index_lock:
+            if self._requirement_index is None:
+                self._requirement_index = self._load_cache("requirement-index")
+            entry = self._requirement_index.get(capability)
+            if entry and entry.get("key") == key and "blocks" in entry:
+                blocks = [tuple(block) for block in entry["blocks"]]
+                # Guard against a rewrite between the caller's read and our stat.
+                if data is None or all(
+                    data.startswith(b"### Requirement:", start) for _, start, _ in blocks
+                ):
+                    return blocks
+        if data is None:
+            data = spec_file.read_bytes()
+        blocks = self._requirement_blocks(data)
+        with self._requirement_index_lock:
+            self._requirement_index[capability] = {
+                "key": key,
+                "blocks": [list(block) for block in blocks],
+            }
+            self._requirement_index_dirty = True
+        return blocks
+
+    def render_spec(
+        self,
+        capability: str,
+        change_ids: Optional[List[str]] = None,
+        include_active: bool = False,
+    ) -> Optional[Dict]:
+        """Render a canonical spec with change deltas applied, purely in memory.
+
+        Deltas are merged in the given order (active changes by ID with
+        ``include_active``) exactly as archiving would merge them, but nothing
+        is written. Returns None if neither the spec nor any delta exists.
+        """
+        if include_active:
+            change_ids = sorted(item.name for item, _ in self._iter_change_dirs(False))
+        try:
+            data: Optional[bytes] = (self.specs_dir / capability / "spec.md").read_bytes()
+        except FileNotFoundError:
+            data = None
+        blocks = None if data is None else self._indexed_requirement_blocks(capability, data)
+        self._flush_requirement_index()
+
+        applied = []
+        for change_id in change_ids or []:
+            change_dir = self._find_change_dir(change_id)
+            if not change_dir:
+                raise ValueError(f"Change '{change_id}' not found")
+            try:
+                delta = (change_dir / "specs" / capability / "spec.md").read_text(encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            if data is None:
+                data = self._delta_to_canonical(delta).encode("utf-8")
+            else:
+                try:
+                    edits = self._plan_spec_edits(data, delta, blocks)
+                except ValueError as e:
+                    raise ValueError(f"{change_id}/specs/{capability}/spec.md: {e}") from None
+                data = self._apply_spec_edits(data, edits)
+            blocks = None
+            applied.append(change_id)
+
+        if data is None:
+            return None
+        if blocks is None:
+            blocks = self._requirement_blocks(data)
+        return {
+            "capability": capability,
+            "changes": applied,
+            "requirements": [name for name, _, _ in blocks],
+            "content": data.decode("utf-8"),
+        }
+
+    def rebuild_specs(
+        self,
+        verify: bool = False,
+        output_dir: Optional[str] = None,
+        max_workers: int = 8,
+        use_checkpoints: bool = True,
+    ) -> Dict:
+        """Rebuild canonical specs by replaying archived spec deltas in archive order.
+
+        Capabilities are independent, so each is replayed on its own worker.
+        Each result is checkpointed under ``openspec/.cflx/rebuild/`` together
+        with the content hash of every delta it applied; a later run resumes
+        from a checkpoint whose (change, hash) pairs are still a prefix of the
+        archive, so only newly archived or rewritten deltas are replayed.
+        With ``output_dir`` the rebuilt specs are written there.
+
+        With ``verify`` the requirement blocks of the result are compared with
+        those of ``openspec/specs``, ignoring order, trailing whitespace and
+        anything outside requirement blocks (titles, purpose sections). A
+        canonical requirement that no archived delta mentions predates the
+        archive and cannot be checked; it is counted as ``baseline`` instead
+        of reported as a divergence.
+        """
+        sources = self._archived_delta_sources()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cflx-rebuild") as pool:
+            results = list(
+                pool.map(
+                    lambda capability: self._replay_capability(
+                        capability, sources[capability], use_checkpoints
+                    ),
+                    sorted(sources),
+                )
+            )
+
+        capabilities = []
+        for result in results:
+            content = result.pop("content")
+            mentioned = set(result.pop("requirements"))
+            if output_dir:
+                target = Path(output_dir) / result["capability"] / "spec.md"
+                target.parent.mkdir(parents=True, exist_ok=True)
+                self._atomic_write(target, content)
+            if verify:
+                result.update(
+                    self._compare_rebuilt_spec(result["capability"], content, mentioned)
+                )
+            capabilities.append(result)
+        if verify and self.specs_dir.is_dir():
+            for spec_dir in self.specs_dir.iterdir():
+                if spec_dir.name not in sources and (spec_dir / "spec.md").is_file():
+                    capabilities.append(
+                        {
+                            "capability": spec_dir.name,
+                            "changes": 0,
+                            "replayed": 0,
+                            "status": "untracked",
+                        }
+                    )
+        capabilities.sort(key=lambda result: result["capability"])
+
+        report = {
+            "capabilities": capabilities,
+            "summary": {
+                "capabilities": len(capabilities),
+                "replayed": sum(result["replayed"] for result in capabilities),
+            },
+        }
+        if verify:
+            diverged = [
+                result for result in capabilities if result["status"] in ("differs", "missing")
+            ]
+            report["valid"] = not diverged
+            report["summary"]["diverged"] = len(diverged)
+        return report
+
+    def _archive_order(self) -> List[str]:
+        """Archived change IDs in the order they were archived.
+
+        The order comes from ``archived`` events in the progress journal.
+        Changes without one (archived before the journal existed, or in
+        another clone) come first, sorted by ID, which suits date-prefixed IDs.
+        """
+        archived_at = {}
+        for record in self.progress_journal.read():
+            if record.get("event") == "archived":
+                archived_at[record.get("id")] = record.get("t", 0)
+        change_ids = {item.name for item, archived in self._iter_change_dirs() if archived}
+        change_ids.update(self.archive_pack.index())
+        return sorted(
+            change_ids,
+            key=lambda change_id: (
+                change_id in archived_at,
+                archived_at.get(change_id, 0),
+                change_id,
+            ),
+        )
+
+    def _archived_delta_sources(self) -> Dict[str, List[Tuple[str, Callable[[], str]]]]:
+        """Map each capability to ``(change_id, read_delta)`` pairs in archive order.
+
+        Deltas are read lazily, one capability at a time on its worker.
+        """
+        sources: Dict[str, List[Tuple[str, Callable[[], str]]]] = {}
+        index = self.archive_pack.index()
+        for change_id in self._archive_order():
+            specs_dir = self.archive_dir / change_id / "specs"
+            if (self.archive_dir / change_id).is_dir():
+                if not specs_dir.is_dir():
+                    continue
+                for spec_dir in specs_dir.iterdir():
+                    delta_file = spec_dir / "spec.md"
+                    if delta_file.is_file():
+                        sources.setdefault(spec_dir.name, []).append(
+                            (change_id, functools.partial(delta_file.read_text, encoding="utf-8"))
+                        )
+                continue
+            for name in index.get(change_id, {}).get("files", []):
+                parts = name.split("/")
+                if len(parts) == 3 and parts[0] == "specs" and parts[2] == "spec.md":
+                    sources.setdefault(parts[1], []).append(
+                        (
+                            change_id,
+                            functools.partial(self._read_packed_text, change_id, name),
+                        )
+                    )
+        return sources
+
+    def _read_packed_text(self, change_id: str, name: str) -> str:
+        return self.archive_pack.read_member(change_id, name).decode("utf-8")
+
+    def _replay_capability(
+        self,
+        capability: str,
+        sources: List[Tuple[str, Callable[[], str]]],
+        use_checkpoint: bool,
+    ) -> Dict:
+        """Replay one capability's deltas, resuming from and updating its checkpoint.
+
+        Every delta is read and hashed so that a checkpoint is only trusted
+        while the deltas it applied are unchanged; merging, the costly part,
+        is skipped for that prefix.
+        """
+        deltas = [read_delta() for _, read_delta in sources]
+        applied = [
+            [change_id, hashlib.blake2b(delta.encode("utf-8"), digest_size=16).hexdigest()]
+            for (change_id, _), delta in zip(sources, deltas)
+        ]
+        checkpoint_file = self.cache_dir / "rebuild" / f"{capability}.json"
+        # Every delta, the first included, is merged into an empty spec, so
+        # MODIFIED and REMOVED blocks act on what earlier deltas built.
+        content = "## Requirements\n"
+        mentioned: set = set()
+        done = 0
+        if use_checkpoint:
+            try:
+                checkpoint = json.loads(checkpoint_file.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                checkpoint = None
+            if (
+                checkpoint
+                and checkpoint.get("version") == self._REBUILD_VERSION
+                and checkpoint.get("applied") == applied[: len(checkpoint["applied"])]
+            ):
+                content = checkpoint["content"]
+                mentioned = set(checkpoint["requirements"])
+                done = len(checkpoint["applied"])
+
+        for (change_id, _), delta in zip(sources[done:], deltas[done:]):
+            for blocks in self._parse_spec_delta(delta).values():
+                mentioned.update(name for name, _ in blocks)
+            try:
+                content = self._merge_spec_delta(content, delta)
+            except ValueError as e:
+                raise ValueError(f"{change_id}/specs/{capability}/spec.md: {e}") from None
+
+        if done < len(sources):
+            try:
+                self._ensure_cache_dir()
+                checkpoint_file.parent.mkdir(exist_ok=True)
+                self._atomic_write(
+                    checkpoint_file,
+                    json.dumps(
+                        {
+                            "version": self._REBUILD_VERSION,
+                            "applied": applied,
+                            "content": content,
+                            "requirements": sorted(mentioned),
+                        }
+                    ),
+                )
+            except OSError:
+                pass
+        return {
+            "capability": capability,
+            "changes": len(sources),
+            "replayed": len(sources) - done,
+            "content": content,
+            "requirements": sorted(mentioned),
+        }
+
+    def _compare_rebuilt_spec(self, capability: str, content: str, mentioned: set) -> Dict:
+        """Compare requirement blocks of a rebuilt spec with the canonical spec."""
+        canonical_file = self.specs_dir / capability / "spec.md"
+        try:
+            canonical = self._requirement_texts(canonical_file.read_bytes())
+        except FileNotFoundError:
+            return {"status": "missing"}
+        rebuilt = self._requirement_texts(content.encode("utf-8"))
+        baseline = [name for name in canonical if name not in rebuilt and name not in mentioned]
+        for name in baseline:
+            del canonical[name]
+        result: Dict = {"baseline": len(baseline)}
+        if canonical == rebuilt:
+            result["status"] = "match"
+            return result
+        import difflib
+
+        order = list(canonical) + [name for name in rebuilt if name not in canonical]
+        diff = difflib.unified_diff(
+            [line for name in order if name in canonical for line in canonical[name]],
+            [line for name in order if name in rebuilt for line in rebuilt[name]],
+            fromfile=str(canonical_file.relative_to(self.root_dir)),
+            tofile=f"rebuilt/{capability}/spec.md",
+        )
+        result.update({"status": "differs", "diff": "".join(diff)})
+        return result
+
+    @classmethod
+    def _requirement_texts(cls, data: bytes) -> Dict[str, List[str]]:
+        """Requirement blocks of spec bytes as name -> lines, without trailing whitespace."""
+        return {
+            name: (data[start:end].decode("utf-8").rstrip() + "\n").splitlines(keepends=True)
+            for name, start, end in cls._requirement_blocks(data)
+        }
+
+    def _flush_requirement_index(self) -> None:
+        with self._requirement_index_lock:
+            if self._requirement_index_dirty:
+                self._requirement_index_dirty = False
+                self._save_cache("requirement-index", self._requirement_index)
+
+    def _load_cache(self, name: str) -> Dict:
+        """Load a JSON cache file from ``openspec/.cflx``; corrupt caches are ignored."""
+        try:
+            return json.loads((self.cache_dir / f"{name}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _ensure_cache_dir(self) -> None:
+        if not self.cache_dir.exists():
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            (self.cache_dir / ".gitignore").write_text("*\n", encoding="utf-8")
+
+    def _save_cache(self, name: str, data: Dict) -> None:
+        """Atomically write a JSON cache file; failures only cost a recompute."""
+        if self.git_tree is not None or (self.read_only and name not in self.writable_caches):
+            return
+        try:
+            self._ensure_cache_dir()
+            self._atomic_write(self.cache_dir / f"{name}.json", json.dumps(data))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _atomic_write(path: Path, text: str) -> int:
+        """Write text via a temporary file and rename; returns bytes written."""
+        data = text.encode("utf-8")
+        fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(data)
+            if path.exists():
+                shutil.copymode(str(path), tmp_name)
+            os.replace(tmp_name, str(path))
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        return len(data)
+
+    @contextlib.contextmanager
+    def _lock(self, kind: str, name: str, timeout: Optional[float] = None) -> Iterator[None]:
+        """Hold an exclusive advisory lock on ``openspec/.cflx/locks/<kind>-<name>.lock``.
+
+        Polls a non-blocking ``flock`` until ``timeout`` (default
+        ``self.lock_timeout``) expires, then raises LockTimeout. Each call
+        opens its own file description, so the lock excludes other threads as
+        well as other processes. A no-op where fcntl is unavailable.
+        """
+        if fcntl is None:
+            yield
+            return
+
+        lock_dir = self.cache_dir / "locks"
+        if not lock_dir.exists():
+            self._ensure_cache_dir()
+            lock_dir.mkdir(exist_ok=True)
+        wait = self.lock_timeout if timeout is None else timeout
+        with open(str(lock_dir / f"{kind}-{name}.lock"), "a") as handle:
+            self._flock(handle, wait, f"Timed out after {wait:g}s waiting for {kind} lock '{name}'")
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _flock(handle, wait: float, message: str) -> None:
+        """Poll a non-blocking exclusive ``flock`` on ``handle``; LockTimeout after ``wait`` s.
+
+        The lock is released when ``handle`` is closed. A no-op where fcntl
+        is unavailable.
+        """
+        if fcntl is None:
+            return
+        deadline = time.monotonic() + wait
+        delay = 0.005
+        while True:
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(message)
+                time.sleep(delay)
+                delay = min(delay * 2, 0.1)
+
+    def _get_change_info(self, change_dir: Path, archived: bool = False) -> Optional[Dict]:
+        """Extract change information from directory."""
+        return self._change_record(change_dir, archived).to_dict()
+
+    def _change_record(self, change_dir: Path, archived: bool = False) -> "ChangeInfo":
+        proposal_file = change_dir / "proposal.md"
+        tasks_file = change_dir / "tasks.md"
+
+        # Extract title from proposal.md
+        title = None
+        if proposal_file.exists():
+            title = self._extract_title(proposal_file.read_text(encoding="utf-8")) or None
+
+        # Count tasks
+        counts = self._count_tasks(tasks_file) if tasks_file.exists() else {}
+
+        return ChangeInfo(
+            self,
+            change_dir.name,
+            f"{change_dir.parent.relative_to(self.root_dir)}/",
+            archived=archived,
+            title=title,
+            tasks_completed=counts.get("tasks_completed"),
+            tasks_total=counts.get("tasks_total"),
+        )
+
+    @staticmethod
+    def _extract_title(proposal: str) -> Optional[str]:
+        """Return the first heading of a proposal, if any."""
+        match = re.search(r"^#\s+(.+)$", proposal, re.MULTILINE)
+        return match.group(1).strip() if match else None
+
+    def _count_tasks(self, tasks_file: Path) -> Dict:
+        """Count completed and total tasks."""
+        return self._count_tasks_text(tasks_file.read_text(encoding="utf-8"))
+
+    def _record_progress(self, tasks_file: Path, counts: Dict, previous: int) -> None:
+        """Append a progress record for an active change whose counts changed.
+
+        ``previous`` is the completed count before the change. ``created`` is
+        the proposal's mtime, so completion latency covers the time before
+        the first task was checked.
+        """
+        if (
+            self.git_tree is not None
+            or self.read_only
+            or tasks_file.parent.parent != self.changes_dir
+        ):
+            return
+        now = round(time.time(), 3)
+        try:
+            created = round((tasks_file.parent / "proposal.md").stat().st_mtime, 3)
+        except FileNotFoundError:
+            created = now
+        self.progress_journal.append(
+            {
+                "t": now,
+                "id": tasks_file.parent.name,
+                "prev": previous,
+                "done": counts["tasks_completed"],
+                "total": counts["tasks_total"],
+                "created": min(created, now),
+            }
+        )
+
+    @staticmethod
+    def _count_tasks_text(content: str) -> Dict:
+        """Count completed and total tasks in tasks.md content."""
+        # Exclude Future Work, Out of Scope, Notes sections
+        sections_to_exclude = ["future work", "out of scope", "notes"]
+        lines = content.split("\n")
+
+        in_excluded_section = False
+        completed = 0
+        total = 0
+
+        for line in lines:
+            # Check if we're entering an excluded section
+            if line.startswith("##"):
+                section_name = line.lstrip("#").strip().lower()
+                in_excluded_section = any(
+                    excluded in section_name for excluded in sections_to_exclude
+                )
+                continue
+
+            if in_excluded_section:
+                continue
+
+            # Count tasks
+            match = _TASK_MARK_RE.match(line)
+            if match:
+                total += 1
+                if match.group(1) == "x":
+                    completed += 1
+
+        return {"tasks_completed": completed, "tasks_total": total}
+
+    @classmethod
+    def _iter_open_tasks(cls, lines: Iterable[str]) -> Iterator[Dict]:
+        """Yield unchecked tasks outside excluded sections, with 1-based line numbers."""
+        return cls._iter_tasks(lines, open_only=True)
+
+    @staticmethod
+    def _iter_tasks(lines: Iterable[str], open_only: bool = False) -> Iterator[Dict]:
+        """Yield checkbox tasks outside excluded sections, with 1-based line numbers.
+
+        Consumes ``lines`` lazily so callers can stop as soon as they have
+        enough tasks.
+        """
+        in_excluded_section = False
+        section = None
+
+        for i, line in enumerate(lines, 1):
+            line = line.rstrip("\r\n")
+            if line.startswith("##"):
+                section = line.lstrip("#").strip()
+                in_excluded_section = any(
+                    excluded in section.lower() for excluded in _EXCLUDED_TASK_SECTIONS
+                )
+                continue
+
+            if in_excluded_section:
+                continue
+
+            match = _CHECKBOX_RE.match(line)
+            if match and not (open_only and match.group(1) == "x"):
+                text = match.group(3).strip()
+                verification = _VERIFICATION_RE.search(text)
+                yield {
+                    "line": i,
+                    "section": section,
+                    "checked": match.group(1) == "x",
+                    "text": text,
+                    "verification": verification.group(1).strip() if verification else None,
+                }
+
+    def open_tasks(self, change_id: str, limit: Optional[int] = None) -> Optional[List[Dict]]:
+        """Return up to ``limit`` unchecked tasks of a change, or None if it does not exist.
+
+        tasks.md is read line by line and scanning stops once ``limit`` tasks
+        have been found.
+        """
+        change_dir = self._find_change_dir(change_id)
+        if change_dir:
+            tasks_file = change_dir / "tasks.md"
+            if not tasks_file.exists():
+                return []
+            with tasks_file.open(encoding="utf-8", newline="\n") as lines:
+                return list(itertools.islice(self._iter_open_tasks(lines), limit))
+
+        if change_id not in self.archive_pack.index():
+            return None
+        tasks = self.archive_pack.read(change_id).get("tasks.md", b"").decode("utf-8")
+        return list(itertools.islice(self._iter_open_tasks(tasks.split("\n")), limit))
+
+    def check_task(
+        self,
+        change_id: str,
+        target: str,
+        checked: bool = True,
+        expect: Optional[str] = None,
+    ) -> Dict:
+        """Set a task's checkbox by patching the single byte inside ``[ ]`` in place.
+
+        ``target`` is a tasks.md line number or a task number such as ``1.2``.
+        The file is held under an exclusive advisory lock while the line is
+        located and verified (it must be an active-section checkbox and, if
+        ``expect`` is given, contain that text); like the change lock, it is
+        given up after ``lock_timeout`` seconds. Counts are taken from the
+        patched bytes already in memory.
+        """
+        change_dir = self.changes_dir / change_id
+        tasks_file = change_dir / "tasks.md"
+        if not tasks_file.exists():
+            raise ValueError(f"Change '{change_id}' has no tasks.md")
+
+        path = str(tasks_file.relative_to(self.root_dir))
+        with self._lock("change", change_id), tasks_file.open("r+b") as handle:
+            self._flock(
+                handle,
+                self.lock_timeout,
+                f"Timed out after {self.lock_timeout:g}s waiting for a lock on {path}",
+            )
+            data = handle.read()
+
+            line_no, offset, line = self._locate_task_line(data, target)
+            text = line.decode("utf-8").rstrip("\r\n")
+            match = re.match(r"^\s*[-*]\s*\[([ x])\]\s*(.*)$", text)
+            if not match:
+                raise ValueError(f"{path}:{line_no}: not a task checkbox: {text.strip()[:50]}")
+            if expect is not None and expect not in match.group(2):
+                raise ValueError(
+                    f"{path}:{line_no}: content mismatch, expected {expect!r}: "
+                    f"{match.group(2)[:50]}"
+                )
+
+            changed = (match.group(1) == "x") != checked
+            if changed:
+                position = offset + line.index(b"[") + 1
+                mark = b"x" if checked else b" "
+                handle.seek(position)
+                handle.write(mark)
+                handle.flush()
+                os.fsync(handle.fileno())
+                data = data[:position] + mark + data[position + 1 :]
+            counts = self._count_tasks_text(data.decode("utf-8"))
+            if changed:
+                # Exactly one active checkbox flipped.
+                previous = counts["tasks_completed"] + (-1 if checked else 1)
+                self._record_progress(tasks_file, counts, previous)
+
+        return {
+            "id": change_id,
+            "line": line_no,
+            "text": match.group(2).strip(),
+            "checked": checked,
+            "changed": changed,
+            **counts,
+        }
+
+    @staticmethod
+    def _locate_task_line(data: bytes, target: str) -> Tuple[int, int, bytes]:
+        """Find an active-section task line by line number or task number.
+
+        Returns (line number, byte offset, raw line).
+        """
+        sections_to_exclude = ["future work", "out of scope", "notes"]
+        in_excluded_section = False
+        by_line = target.isdigit()
+        offset = 0
+        for i, line in enumerate(data.split(b"\n"), 1):
+            if line.startswith(b"##"):
+                section_name = line.decode("utf-8").lstrip("#").strip().lower()
+                in_excluded_section = any(
+                    excluded in section_name for excluded in sections_to_exclude
+                )
+            if by_line and i == int(target):
+                if in_excluded_section:
+                    raise ValueError(f"tasks.md:{i}: line is in an excluded section")
+                return i, offset, line
+            if not by_line and not in_excluded_section:
+                match = re.match(rb"^\s*[-*]\s*\[[ x]\]\s*(\S+)", line)
+                if match and match.group(1).decode("utf-8").rstrip(".:") == target.rstrip("."):
+                    return i, offset, line
+            offset += len(line) + 1
+        raise ValueError(f"Task '{target}' not found in tasks.md")
+
+    def show_change(
+        self, change_id: str, json_output: bool = False, deltas_only: bool = False
+    ) -> Optional[Dict]:
+        """Show detailed information about a change."""
+        change_dir = self._find_change_dir(change_id)
+        if not change_dir:
+            return self._show_packed_change(change_id, deltas_only)
+
+        contents = {
+            key: path.read_text(encoding="utf-8")
+            for key, path in self._collect_change_files(change_dir)
+        }
+        return self._build_change_detail(
+            change_id,
+            str(change_dir.relative_to(self.root_dir)),
+            "archive" in change_dir.parts,
+            contents,
+            (change_dir / "specs").exists(),
+            deltas_only,
+        )
+
+    def _show_packed_change(self, change_id: str, deltas_only: bool = False) -> Optional[Dict]:
+        """Show a change stored in the archive pack, reading only its members."""
+        if change_id not in self.archive_pack.index():
+            return None
+
+        members = self.archive_pack.read(change_id)
+        contents = {}
+        for name, data in members.items():
+            if name in ("proposal.md", "tasks.md", "design.md"):
+                contents[name[: -len(".md")]] = data.decode("utf-8")
+            elif name.startswith("specs/") and name.endswith("/spec.md") and name.count("/") == 2:
+                contents[name[: -len("/spec.md")]] = data.decode("utf-8")
+        return self._build_change_detail(
+            change_id,
+            self.archive_pack.member_path(change_id, self.root_dir),
+            True,
+            contents,
+            any(name.startswith("specs/") for name in members),
+            deltas_only,
+        )
+
+    def _collect_change_files(self, change_dir: Path) -> List[Tuple[str, Path]]:
+        """List the documents shown for a change as (key, path) pairs.
+
+        Spec deltas use ``specs/<capability>`` keys.
+        """
+        files = []
+        for key in ("proposal", "tasks", "design"):
+            path = change_dir / f"{key}.md"
+            if path.exists():
+                files.append((key, path))
+
+        specs_dir = change_dir / "specs"
+        if specs_dir.exists():
+            for spec_dir in specs_dir.iterdir():
+                if spec_dir.is_dir():
+                    spec_file = spec_dir / "spec.md"
+                    if spec_file.exists():
+                        files.append((f"specs/{spec_dir.name}", spec_file))
+
+        return files
+
+    def _iter_documents(
+        self,
+    ) -> Iterator[Tuple[str, Optional[str], str, List[int], Callable[[], str]]]:
+        """Yield every change document and canonical spec, as found by show and list.
+
+        Items are ``(path, change_id, kind, key, read)``: ``kind`` is a
+        ``show_change`` key (``spec`` for canonical specs), ``key`` is the
+        file's [mtime_ns, size] (the pack's, for packed changes) and ``read``
+        returns the text without reading anything up front.
+        """
+        change_ids = set()
+        for change_dir, _ in self._iter_change_dirs():
+            change_ids.add(change_dir.name)
+            for kind, path in self._collect_change_files(change_dir):
+                stat = path.stat()
+                yield (
+                    str(path.relative_to(self.root_dir)),
+                    change_dir.name,
+                    kind,
+                    [stat.st_mtime_ns, stat.st_size],
+                    functools.partial(path.read_text, encoding="utf-8"),
+                )
+
+        index = self.archive_pack.index()
+        if index:
+            stat = self.archive_pack.path.stat()
+            for change_id, entry in index.items():
+                if change_id in change_ids:
+                    continue
+                for name in entry["files"]:
+                    if name in ("proposal.md", "tasks.md", "design.md"):
+                        kind = name[: -len(".md")]
+                    elif name.startswith("specs/") and name.endswith("/spec.md"):
+                        kind = name[: -len("/spec.md")]
+                    else:
+                        continue
+                    yield (
+                        f"{self.archive_pack.member_path(change_id, self.root_dir)}/{name}",
+                        change_id,
+                        kind,
+                        [stat.st_mtime_ns, stat.st_size],
+                        functools.partial(self._read_packed_text, change_id, name),
+                    )
+
+        if self.specs_dir.exists():
+            for spec_dir in self.specs_dir.iterdir():
+                spec_file = spec_dir / "spec.md"
+                if spec_dir.is_dir() and spec_file.exists():
+                    stat = spec_file.stat()
+                    yield (
+                        str(spec_file.relative_to(self.root_dir)),
+                        None,
+                        "spec",
+                        [stat.st_mtime_ns, stat.st_size],
+                        functools.partial(spec_file.read_text, encoding="utf-8"),
+                    )
+
+    def _build_change_detail(
+        self,
+        change_id: str,
+        path: str,
+        archived: bool,
+        contents: Dict[str, str],
+        has_specs: bool,
+        deltas_only: bool = False,
+    ) -> Dict:
+        """Assemble show_change output from already-read file contents."""
+        info = {
+            "id": change_id,
+            "path": path,
+            "archived": archived,
+        }
+
+        if "proposal" in contents:
+            info["proposal"] = contents["proposal"]
+
+        if "tasks" in contents:
+            info["tasks"] = contents["tasks"]
+            info.update(self._count_tasks_text(contents["tasks"]))
+
+        if "design" in contents:
+            info["design"] = contents["design"]
+
+        if has_specs:
+            info["specs"] = {
+                key[len("specs/") :]: text
+                for key, text in contents.items()
+                if key.startswith("specs/")
+            }
+
+        if deltas_only and "specs" in info:
+            # Only return spec deltas
+            return {"id": change_id, "specs": info["specs"]}
+
+        return info
+
+    def _find_change_dir(self, change_id: str) -> Optional[Path]:
+        """Find the directory for a given change ID."""
+        # Check active changes
+        change_dir = self.changes_dir / change_id
+        if change_dir.exists():
+            return change_dir
+
+        # Check archive
+        archive_change_dir = self.archive_dir / change_id
+        if archive_change_dir.exists():
+            return archive_change_dir
+
+        return None
+
+    def validate_change(
+        self, change_id: Optional[str] = None, strict: bool = False
+    ) -> Tuple[bool, List[str]]:
+        """Validate a change or all changes."""
+        errors = []
+
+        for diagnostic in self.iter_diagnostics(change_id, strict):
+            if diagnostic.severity == "error":
+                errors.append(str(diagnostic))
+
+        return len(errors) == 0, errors
+
+    def iter_diagnostics(
+        self,
+        change_id: Optional[str] = None,
+        strict: bool = False,
+        evidence_mode: EvidenceMode = "off",
+    ) -> Iterator[Diagnostic]:
+        """Yield structured diagnostics for a change or all active changes, change by change."""
+        if change_id:
+            change_dir = self._find_change_dir(change_id)
+            if not change_dir:
+                yield Diagnostic("CFLX001", "error", f"Change '{change_id}' not found")
+                return
+            yield from self._diagnose_change_dir(change_dir, strict, evidence_mode)
+        else:
+            # Validate all changes
+            for item, _ in self._iter_change_dirs(include_archived=False):
+                yield from self._diagnose_change_dir(item, strict, evidence_mode)
+
+    def validate_changes(
+        self,
+        change_id: Optional[str] = None,
+        strict: bool = False,
+        evidence_mode: EvidenceMode = "off",
+        on_diagnostic: Optional[Callable[[Diagnostic], None]] = None,
+    ) -> List[Dict]:
+        """Validate a change or all active changes, reporting each change separately.
+
+        ``on_diagnostic`` is called with every diagnostic of a change as soon as
+        that change has been checked, before the next change is read.
+        """
+        if change_id:
+            change_dir = self._find_change_dir(change_id)
+            if not change_dir:
+                diagnostic = Diagnostic("CFLX001", "error", f"Change '{change_id}' not found")
+                if on_diagnostic:
+                    on_diagnostic(diagnostic)
+                return [
+                    {
+                        "id": change_id,
+                        "valid": False,
+                        "errors": [str(diagnostic)],
+                        "warnings": [],
+                        "diagnostics": [diagnostic.to_dict()],
+                    }
+                ]
+            change_dirs = [change_dir]
+        else:
+            change_dirs = [item for item, _ in self._iter_change_dirs(include_archived=False)]
+
+        results = []
+        for change_dir in sorted(change_dirs, key=lambda path: path.name):
+            diagnostics = []
+            for diagnostic in self._diagnose_change_dir(change_dir, strict, evidence_mode):
+                if on_diagnostic:
+                    on_diagnostic(diagnostic)
+                diagnostics.append(diagnostic)
+            results.append(self._change_result(change_dir.name, diagnostics))
+        return results
+
+    def validate_draft(
+        self, bundle: Dict, strict: bool = False, evidence_mode: EvidenceMode = "off"
+    ) -> Dict:
+        """Validate a draft change held in memory with the checks run on change directories.
+
+        ``bundle`` is ``{"id": ..., "files": {"proposal.md": ..., "tasks.md": ...,
+        "specs/<capability>/spec.md": ...}}``. Nothing is read from the change
+        directory; canonical specs, and paths cited when an evidence checker
+        is set, still come from the repository. Returns a ``validate_changes``
+        entry whose diagnostic paths point where the files would be written.
+        """
+        if not isinstance(bundle, dict) or not isinstance(bundle.get("files"), dict):
+            raise ValueError("A draft bundle needs a 'files' object mapping paths to text")
+        change_id = bundle.get("id") or "draft"
+        files = bundle["files"]
+        if not isinstance(change_id, str) or not all(
+            isinstance(text, str) or text is None for text in files.values()
+        ):
+            raise ValueError("Draft 'id' and file contents must be strings")
+
+        document = ChangeDocument.from_files(change_id, files)
+        change_path = (self.changes_dir / change_id).relative_to(self.root_dir)
+        diagnostics = []
+        for diagnostic in self._run_rules(document, ValidationContext(self, strict, evidence_mode)):
+            if diagnostic.file:
+                diagnostic.path = str(change_path / diagnostic.file)
+            diagnostics.append(diagnostic)
+        return self._change_result(change_id, diagnostics)
+
+    @staticmethod
+    def _change_result(change_id: str, diagnostics: List[Diagnostic]) -> Dict:
+        errors = [str(d) for d in diagnostics if d.severity == "error"]
+        return {
+            "id": change_id,
+            "valid": len(errors) == 0,
+            "errors": errors,
+            "warnings": [str(d) for d in diagnostics if d.severity != "error"],
+            "diagnostics": [d.to_dict() for d in diagnostics],
+        }
+
+    def _validate_change_dir(
+        self, change_dir: Path, strict: bool, evidence_mode: EvidenceMode
+    ) -> Tuple[List[str], List[str]]:
+        """Validate a single change directory."""
+        errors = []
+        warnings = []
+        for diagnostic in self._diagnose_change_dir(change_dir, strict, evidence_mode):
+            if diagnostic.severity == "error":
+                errors.append(str(diagnostic))
+            else:
+                warnings.append(str(diagnostic))
+        return errors, warnings
+
+    def _diagnose_change_dir(
+        self, change_dir: Path, strict: bool, evidence_mode: EvidenceMode
+    ) -> Iterator[Diagnostic]:
+        """Yield diagnostics for a single change directory."""
+        for diagnostic in self._diagnose_change_files(change_dir, strict, evidence_mode):
+            if diagnostic.file:
+                diagnostic.path = str((change_dir / diagnostic.file).relative_to(self.root_dir))
+            yield diagnostic
+
+    def _diagnose_change_files(
+        self, change_dir: Path, strict: bool, evidence_mode: EvidenceMode
+    ) -> Iterator[Diagnostic]:
+        document = ChangeDocument(change_dir.name, change_dir)
+        yield from self._run_rules(document, ValidationContext(self, strict, evidence_mode))
+
+    def configure_rules(
+        self, enable: Iterable[str] = (), disable: Iterable[str] = ()
+    ) -> None:
+        """Enable or disable validation rules by ID for this manager."""
+        for rule_id in itertools.chain(enable, disable):
+            if rule_id not in VALIDATION_RULES:
+                raise ValueError(f"Unknown validation rule: {rule_id}")
+        self.enabled_rules.update(enable)
+        self.enabled_rules.difference_update(disable)
+        self.disabled_rules.update(disable)
+        self.disabled_rules.difference_update(enable)
+
+    def active_rules(self) -> List[ValidationRule]:
+        """Validation rules that run for this manager, in registration order."""
+        return [
+            rule
+            for rule in VALIDATION_RULES.values()
+            if rule.id in self.enabled_rules
+            or (rule.enabled and rule.id not in self.disabled_rules)
+        ]
+
+    def _run_rules(
+        self,
+        document: ChangeDocument,
+        context: ValidationContext,
+        scopes: Tuple[str, ...] = _RULE_SCOPES,
+    ) -> Iterator[Diagnostic]:
+        """Run the active rules over a document, timing each one.
+
+        Diagnostics are grouped by scope and tasks.md findings sorted by line,
+        which reproduces the order of the original single-pass validator. To
+        sort them, every rule runs before the first diagnostic is yielded, so
+        callers receive a change's findings together once it is checked.
+        """
+        found = []
+        timings = {}
+        for rule in self.active_rules():
+            if rule.scope not in scopes:
+                continue
+            read_before = document.read_seconds
+            started = time.thread_time()
+            diagnostics = list(rule.func(document, context))
+            elapsed = time.thread_time() - started - (document.read_seconds - read_before)
+            timings[rule.id] = (max(elapsed, 0.0), len(diagnostics))
+            order = _RULE_SCOPES.index(rule.scope)
+            for diagnostic in diagnostics:
+                line = (diagnostic.line or 0) if rule.scope == "tasks" else 0
+                found.append(((order, line), diagnostic))
+        timings["(read files)"] = (document.read_seconds, 0)
+        self._record_rule_timings(timings)
+        found.sort(key=lambda item: item[0])
+        for _, diagnostic in found:
+            yield diagnostic
+
+    def _record_rule_timings(self, timings: Dict[str, Tuple[float, int]]) -> None:
+        with self._rule_timings_lock:
+            for rule_id, (seconds, count) in timings.items():
+                entry = self.rule_timings.setdefault(
+                    rule_id, {"cpu_seconds": 0.0, "calls": 0, "diagnostics": 0}
+                )
+                entry["cpu_seconds"] += seconds
+                entry["calls"] += 1
+                entry["diagnostics"] += count
+
+    def rule_timing_report(self) -> List[Dict]:
+        """Accumulated CPU time per validation rule, most expensive first."""
+        return _sorted_rule_timings(self.rule_timings)
+
+    def _validate_tasks_file(
+        self,
+        tasks_file: Path,
+        change_id: str,
+        strict: bool = False,
+        evidence_mode: EvidenceMode = "off",
+    ) -> Tuple[List[str], List[str]]:
+        """Validate tasks.md file format."""
+        errors = []
+        warnings = []
+        for diagnostic in self._diagnose_tasks_file(tasks_file, change_id, strict, evidence_mode):
+            if diagnostic.severity == "error":
+                errors.append(str(diagnostic))
+            else:
+                warnings.append(str(diagnostic))
+        return errors, warnings
+
+    def _diagnose_tasks_file(
+        self,
+        tasks_file: Path,
+        change_id: str,
+        strict: bool = False,
+        evidence_mode: EvidenceMode = "off",
+    ) -> Iterator[Diagnostic]:
+        """Yield diagnostics for tasks.md file format."""
+        document = ChangeDocument(change_id, tasks_file.parent)
+        document.tasks = tasks_file.read_text(encoding="utf-8")
+        context = ValidationContext(self, strict, evidence_mode)
+        yield from self._run_rules(document, context, scopes=("tasks",))
+
+    @classmethod
+    def _looks_like_behavior_task(cls, task_text: str) -> bool:
+        normalized = task_text.strip().lower()
+        return any(keyword in normalized for keyword in cls._BEHAVIOR_TASK_KEYWORDS)
+
+    @classmethod
+    def _has_repository_evidence_hint(cls, verification_text: str) -> bool:
+        normalized = verification_text.strip().lower()
+        return any(hint in normalized for hint in cls._EVIDENCE_HINTS)
+
+    def _validate_specs_dir(self, specs_dir: Path, change_id: str) -> List[str]:
+        """Validate spec delta files."""
+        return [str(diagnostic) for diagnostic in self._diagnose_specs_dir(specs_dir, change_id)]
+
+    def _diagnose_specs_dir(self, specs_dir: Path, change_id: str) -> Iterator[Diagnostic]:
+        """Yield diagnostics for spec delta files."""
+        document = ChangeDocument(change_id, specs_dir.parent)
+        context = ValidationContext(self, True, "off")
+        yield from self._run_rules(document, context, scopes=("specs",))
+
+    def archive_change(
+        self, change_id: str, skip_specs: bool = False, incremental_specs: bool = False
+    ) -> Tuple[bool, str]:
+        """Archive a deployed change.
+
+        With ``incremental_specs`` canonical specs are patched block by block
+        (see ``_patch_canonical_spec``) and the bytes written are reported.
+        The change stays locked for the whole operation, the archive pack lock
+        is held from the move until its specs are merged (so ``archive
+        compact`` cannot pack the directory in between), and each canonical
+        spec is locked while it is merged.
+        """
+        with self._lock("change", change_id):
+            return self._archive_change_locked(change_id, skip_specs, incremental_specs)
+
+    def _archive_change_locked(
+        self, change_id: str, skip_specs: bool, incremental_specs: bool
+    ) -> Tuple[bool, str]:
+        change_dir = self.changes_dir / change_id
+
+        if not change_dir.exists():
+            return False, f"Change '{change_id}' not found"
+
+        if "archive" in change_dir.parts:
+            return False, f"Change '{change_id}' is already archived"
+
+        # Validate before archiving
+        is_valid, errors = self.validate_change(change_id, strict=True)
+        if not is_valid:
+            return False, f"Validation failed:\n" + "\n".join(errors)
+
+        # Create archive directory if needed
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+
+        with self._lock("archive", "pack"):
+            # Move to archive
+            archive_dest = self.archive_dir / change_id
+            if archive_dest.exists():
+                return False, f"Archive destination already exists: {archive_dest}"
+            if change_id in self.archive_pack.index():
+                return (
+                    False,
+                    f"Change '{change_id}' already exists in {self.archive_pack.path.name}",
+                )
+
+            shutil.move(str(change_dir), str(archive_dest))
+            self.progress_journal.append(
+                {"t": round(time.time(), 3), "id": change_id, "event": "archived"}
+            )
+
+            # Update specs (unless skip_specs)
+            if not skip_specs:
+                write_stats: Dict[str, Dict] = {}
+                specs_updated = self._update_specs_from_change(
+                    archive_dest, incremental=incremental_specs, write_stats=write_stats
+                )
+                message = (
+                    f"Archived to {archive_dest.relative_to(self.root_dir)}\n"
+                    f"Specs updated: {specs_updated}"
+                )
+                if incremental_specs:
+                    written = sum(stats["bytes_written"] for stats in write_stats.values())
+                    copied = sum(stats["bytes_copied"] for stats in write_stats.values())
+                    message += (
+                        f"\nSpec bytes written: {written} (unchanged bytes copied: {copied})"
+                    )
+                return True, message
+
+        return True, f"Archived to {archive_dest.relative_to(self.root_dir)}"
+
+    def compact_archive(self, older_than_days: float = 0) -> List[str]:
+        """Move archived change directories into the compressed archive pack.
+
+        Only changes whose newest file is at least ``older_than_days`` old are
+        packed. The pack is rewritten atomically before directories are removed.
+        """
+        with self._lock("archive", "pack"):
+            return self._compact_archive_locked(older_than_days)
+
+    def _compact_archive_locked(self, older_than_days: float) -> List[str]:
+        cutoff = time.time() - older_than_days * 86400
+        entries: Dict[str, Tuple[Dict, Dict[str, bytes]]] = {}
+        packed_dirs = []
+        for change_dir, archived in self._iter_change_dirs():
+            if not archived:
+                continue
+            files = [path for path in change_dir.rglob("*") if path.is_file()]
+            newest = max((path.stat().st_mtime for path in files), default=0)
+            if newest > cutoff:
+                continue
+            members = {
+                path.relative_to(change_dir).as_posix(): path.read_bytes() for path in files
+            }
+            info = self._get_change_info(change_dir, archived=True) or {}
+            meta = {
+                key: info[key]
+                for key in ("title", "tasks_completed", "tasks_total")
+                if key in info
+            }
+            entries[change_dir.name] = (meta, members)
+            packed_dirs.append(change_dir)
+
+        if not entries:
+            return []
+
+        self.archive_pack.add(entries)
+        for change_dir in packed_dirs:
+            shutil.rmtree(str(change_dir))
+        return sorted(entries)
+
+    def unpack_archive(self, change_ids: Optional[List[str]] = None) -> List[str]:
+        """Restore packed changes to archive directories and drop them from the pack."""
+        with self._lock("archive", "pack"):
+            return self._unpack_archive_locked(change_ids)
+
+    def _unpack_archive_locked(self, change_ids: Optional[List[str]]) -> List[str]:
+        index = self.archive_pack.index()
+        targets = list(index) if not change_ids else change_ids
+        missing = [change_id for change_id in targets if change_id not in index]
+        if missing:
+            raise ValueError(f"Not in archive pack: {', '.join(missing)}")
+
+        for change_id in targets:
+            dest = self.archive_dir / change_id
+            if dest.exists():
+                raise ValueError(f"Archive destination already exists: {dest}")
+
+        for change_id in targets:
+            dest = self.archive_dir / change_id
+            for name, data in self.archive_pack.read(change_id).items():
+                target = dest / name
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(data)
+
+        self.archive_pack.remove(targets)
+        return sorted(targets)
+
+    def _update_specs_from_change(
+        self,
+        change_dir: Path,
+        incremental: bool = False,
+        write_stats: Optional[Dict[str, Dict]] = None,
+    ) -> List[str]:
+        """Update canonical specs from change deltas.
+
+        ``write_stats`` (if given) receives per-capability byte counts.
+        """
+        updated = []
+        specs_dir = change_dir / "specs"
+
+        if not specs_dir.exists():
+            return updated
+
+        for spec_dir in specs_dir.iterdir():
+            if not spec_dir.is_dir():
+                continue
+
+            spec_file = spec_dir / "spec.md"
+            if not spec_file.exists():
+                continue
+
+            # Update canonical spec
+            canonical_spec = self.specs_dir / spec_dir.name / "spec.md"
+            canonical_spec.parent.mkdir(parents=True, exist_ok=True)
+
+            delta_content = spec_file.read_text(encoding="utf-8")
+
+            # Writers serialize per capability; every write is an atomic
+            # rename, so readers always see a complete spec without locking.
+            with self._lock("spec", spec_dir.name):
+                # If canonical spec exists, merge; otherwise create
+                if canonical_spec.exists() and incremental:
+                    stats = self._patch_canonical_spec(canonical_spec, delta_content)
+                elif canonical_spec.exists():
+                    canonical_content = canonical_spec.read_text(encoding="utf-8")
+                    merged = self._merge_spec_delta(canonical_content, delta_content)
+                    stats = {"bytes_written": self._atomic_write(canonical_spec, merged)}
+                    stats["bytes_copied"] = 0
+                else:
+                    # Extract requirements from delta
+                    new_content = self._delta_to_canonical(delta_content)
+                    stats = {"bytes_written": self._atomic_write(canonical_spec, new_content)}
+                    stats["bytes_copied"] = 0
+
+            if write_stats is not None:
+                write_stats[spec_dir.name] = stats
+            updated.append(spec_dir.name)
+
+        return updated
+
+    @staticmethod
+    def _requirement_blocks(data: bytes) -> List[Tuple[str, int, int]]:
+        """Locate ``### Requirement:`` blocks as (name, start, end) byte ranges.
+
+        A block runs until the next heading of level 1-3 or the end of the
+        data, so its scenarios stay inside it. Works on raw bytes so callers
+        never have to decode unchanged regions.
+        """
+        blocks = []
+        current: Optional[Tuple[str, int]] = None
+        offset = 0
+        for line in data.splitlines(keepends=True):
+            if re.match(rb"#{1,3}\s", line):
+                if current is not None:
+                    blocks.append((current[0], current[1], offset))
+                    current = None
+                header = re.match(rb"### Requirement:\s*(.+?)\s*$", line)
+                if header:
+                    current = (header.group(1).decode("utf-8"), offset)
+            offset += len(line)
+        if current is not None:
+            blocks.append((current[0], current[1], offset))
+        return blocks
+
+    @classmethod
+    def _parse_spec_delta(cls, delta: str) -> Dict[str, List[Tuple[str, str]]]:
+        """Split a delta spec into (name, block text) lists per operation."""
+        operations: Dict[str, List[Tuple[str, str]]] = {
+            "ADDED": [],
+            "MODIFIED": [],
+            "REMOVED": [],
+        }
+        sections = []
+        operation = None
+        body: List[str] = []
+        for line in delta.splitlines(keepends=True):
+            if line.startswith("## "):
+                if operation:
+                    sections.append((operation, "".join(body)))
+                header = re.match(r"## (ADDED|MODIFIED|REMOVED) Requirements\s*$", line)
+                operation = header.group(1) if header else None
+                body = []
+            elif operation:
+                body.append(line)
+        if operation:
+            sections.append((operation, "".join(body)))
+
+        for operation, text in sections:
+            data = text.encode("utf-8")
+            for name, start, end in cls._requirement_blocks(data):
+                operations[operation].append((name, data[start:end].decode("utf-8").rstrip()))
+        return operations
+
+    def _plan_spec_edits(
+        self,
+        canonical: bytes,
+        delta: str,
+        blocks: Optional[List[Tuple[str, int, int]]] = None,
+    ) -> List[Tuple[int, int, bytes]]:
+        """Compute byte-range edits that merge a delta into canonical spec bytes.
+
+        MODIFIED blocks replace the canonical block of the same name and
+        REMOVED blocks delete it; ADDED blocks (and MODIFIED blocks with no
+        canonical counterpart) are appended. ``blocks`` are the canonical
+        requirement blocks if already known. Returns sorted, non-overlapping
+        (start, end, replacement) edits; a delta that names a requirement more
+        than once would make two edits of one block and raises ValueError.
+        """
+        operations = self._parse_spec_delta(delta)
+        conflicts = self._conflicting_delta_names(
+            (operation, name) for operation, entries in operations.items() for name, _ in entries
+        )
+        if conflicts:
+            raise ValueError(
+                "Delta names a requirement more than once: "
+                + ", ".join(f"{name} ({' and '.join(ops)})" for name, ops in conflicts.items())
+            )
+        if blocks is None:
+            blocks = self._requirement_blocks(canonical)
+        blocks = {name: (start, end) for name, start, end in blocks}
+        edits = []
+        appended = [text for _, text in operations["ADDED"]]
+
+        for name, text in operations["MODIFIED"]:
+            if name not in blocks:
+                appended.append(text)
+                continue
+            start, end = blocks[name]
+            original = canonical[start:end]
+            trailing = original[len(original.rstrip()) :]
+            edits.append((start, end, text.encode("utf-8") + trailing))
+
+        for name, _ in operations["REMOVED"]:
+            if name in blocks:
+                start, end = blocks[name]
+                edits.append((start, end, b""))
+
+        if appended:
+            separator = b"\n" if canonical.endswith(b"\n") else b"\n\n"
+            addition = separator + "\n\n".join(appended).encode("utf-8") + b"\n"
+            edits.append((len(canonical), len(canonical), addition))
+
+        return sorted(edits, key=lambda edit: (edit[0], edit[1]))
+
+    @staticmethod
+    def _conflicting_delta_names(entries: Iterable[Tuple[str, str]]) -> Dict[str, List[str]]:
+        """Map each requirement named more than once in a delta to its operations."""
+        operations: Dict[str, List[str]] = {}
+        for operation, name in entries:
+            operations.setdefault(name, []).append(operation)
+        return {name: ops for name, ops in operations.items() if len(ops) > 1}
+
+    def _merge_spec_delta(self, canonical: str, delta: str) -> str:
+        """Merge delta into canonical spec."""
+        data = canonical.encode("utf-8")
+        return self._apply_spec_edits(data, self._plan_spec_edits(data, delta)).decode("utf-8")
+
+    @staticmethod
+    def _apply_spec_edits(data: bytes, edits: List[Tuple[int, int, bytes]]) -> bytes:
+        parts = []
+        position = 0
+        for start, end, replacement in edits:
+            parts.append(data[position:start])
+            parts.append(replacement)
+            position = end
+        parts.append(data[position:])
+        return b"".join(parts)
+
+    def _patch_canonical_spec(self, canonical_spec: Path, delta: str) -> Dict[str, int]:
+        """Merge a delta into a canonical spec, rewriting only affected blocks.
+
+        Unchanged byte ranges are copied verbatim (never decoded or
+        re-encoded) into a temporary file that atomically replaces the
+        original. Returns the number of new bytes written and bytes copied.
+        """
+        data = canonical_spec.read_bytes()
+        edits = self._plan_spec_edits(data, delta)
+        stats = {"bytes_written": 0, "bytes_copied": 0}
+        if not edits:
+            return stats
+
+        view = memoryview(data)
+        fd, tmp_name = tempfile.mkstemp(dir=str(canonical_spec.parent), prefix=".spec.md.")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                position = 0
+                for start, end, replacement in edits:
+                    stats["bytes_copied"] += out.write(view[position:start])
+                    stats["bytes_written"] += out.write(replacement)
+                    position = end
+                stats["bytes_copied"] += out.write(view[position:])
+            shutil.copymode(str(canonical_spec), tmp_name)
+            os.replace(tmp_name, str(canonical_spec))
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        return stats
+
+    def _delta_to_canonical(self, delta: str) -> str:
+        """Convert delta format to canonical spec format."""
+        # Remove delta markers
+        canonical = re.sub(
+            r"^## (ADDED|MODIFIED|REMOVED) Requirements",
+            "## Requirements",
+            delta,
+            flags=re.MULTILINE,
+        )
+        return canonical
+
+
+class AsyncOpenSpecManager:
+    """Asyncio facade over OpenSpecManager for embedding in async orchestrators.
+
+    Blocking file I/O runs on a bounded thread pool, so independent reads
+    (one per change in ``list_changes``, one per document in ``show_change``)
+    proceed concurrently without blocking the event loop. Cancelling an
+    awaiting call cancels all reads that have not started yet; reads already
+    in flight finish in the background and their results are discarded.
+
+    asyncio is imported by the methods that need it, so the synchronous CLI
+    does not pay for loading it.
+    """
+
+    def __init__(
+        self,
+        root_dir: str = ".",
+        max_workers: int = 8,
+        manager: Optional[OpenSpecManager] = None,
+    ):
+        self.manager = manager or OpenSpecManager(root_dir)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="cflx-io"
+        )
+        self._archive_lock: Optional["asyncio.Lock"] = None
+
+    async def __aenter__(self) -> "AsyncOpenSpecManager":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker pool, dropping reads that have not started."""
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, func, *args, **kwargs):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def _read_text(self, path: Path) -> str:
+        return await self._run(path.read_text, encoding="utf-8")
+
+    async def list_changes(self, show_specs: bool = False) -> List[Dict]:
+        """List all changes or specs."""
+        import asyncio
+
+        if show_specs:
+            return await self._run(self.manager._list_specs)
+
+        dirs = await self._run(self.manager._iter_change_dirs)
+        infos = await asyncio.gather(
+            *(
+                self._run(self.manager._get_change_info, item, archived=archived)
+                for item, archived in dirs
+            )
+        )
+        changes = [info for info in infos if info]
+        changes.extend(
+            await self._run(
+                self.manager._list_packed_changes, {change["id"] for change in changes}
+            )
+        )
+        return sorted(changes, key=lambda x: x.get("id", ""))
+
+    async def show_change(self, change_id: str, deltas_only: bool = False) -> Optional[Dict]:
+        """Show detailed information about a change, reading its files concurrently."""
+        import asyncio
+
+        change_dir = await self._run(self.manager._find_change_dir, change_id)
+        if not change_dir:
+            return await self._run(self.manager._show_packed_change, change_id, deltas_only)
+
+        files = await self._run(self.manager._collect_change_files, change_dir)
+        texts = await asyncio.gather(*(self._read_text(path) for _, path in files))
+        contents = {key: text for (key, _), text in zip(files, texts)}
+        return self.manager._build_change_detail(
+            change_id,
+            str(change_dir.relative_to(self.manager.root_dir)),
+            "archive" in change_dir.parts,
+            contents,
+            (change_dir / "specs").exists(),
+            deltas_only,
+        )
+
+    async def validate_change(
+        self, change_id: Optional[str] = None, strict: bool = False
+    ) -> Tuple[bool, List[str]]:
+        """Validate a change or all active changes concurrently."""
+        import asyncio
+
+        if change_id:
+            return await self._run(self.manager.validate_change, change_id, strict)
+
+        dirs = await self._run(self.manager._iter_change_dirs, False)
+        results = await asyncio.gather(
+            *(self._run(self.manager._validate_change_dir, item, strict, "off") for item, _ in dirs)
+        )
+        errors = [error for change_errors, _ in results for error in change_errors]
+        return len(errors) == 0, errors
+
+    async def archive_change(
+        self, change_id: str, skip_specs: bool = False, incremental_specs: bool = False
+    ) -> Tuple[bool, str]:
+        """Archive a deployed change.
+
+        Archives are serialized per manager because they move directories and
+        rewrite canonical specs.
+        """
+        if self._archive_lock is None:
+            import asyncio
+
+            self._archive_lock = asyncio.Lock()
+        async with self._archive_lock:
+            return await self._run(
+                self.manager.archive_change, change_id, skip_specs, incremental_specs
+            )
+
+
+class VerificationRunner:
+    """Run the commands cited in a change's verification notes.
+
+    Commands are de-duplicated, run on a bounded thread pool of
+    subprocesses with a per-command timeout, and passing results are cached
+    in ``openspec/.cflx/verify-cache.json`` keyed by the hash of the working
+    tree (excluding ``openspec/``), so re-running on an unchanged tree is free.
+    """
+
+    _COMMAND_PREFIXES = (
+        "uv run ",
+        "pytest",
+        "python ",
+        "python3 ",
+        "make ",
+        "npm ",
+        "npx ",
+        "pnpm ",
+        "yarn ",
+        "cargo ",
+        "go test",
+        "go vet",
+        "bash ",
+        "sh ",
+        "tox",
+        "nox",
+        "ruff ",
+        "mypy ",
+        "./",
+    )
+    _TRAILING_WORDS = re.compile(
+        r"\s+(?:passes|pass|succeeds|is green|green|ok)\.?$", re.IGNORECASE
+    )
+    # ";" or " and " outside single/double quotes
+    _SEPARATORS = re.compile(r"(?:;|\s+and\s+)(?=(?:[^\"']*[\"'][^\"']*[\"'])*[^\"']*$)")
+    _CACHE_NAME = "verify-cache"
+    _CACHE_TREES = 20
+
+    def __init__(self, manager: "OpenSpecManager", jobs: int = 4, timeout: float = 600.0):
+        self.manager = manager
+        self.jobs = jobs
+        self.timeout = timeout
+
+    @classmethod
+    def extract_commands(cls, note: str) -> List[str]:
+        """Pull runnable commands out of one verification note."""
+        candidates = re.findall(r"`([^`]+)`", note) or cls._SEPARATORS.split(note)
+        commands = []
+        for candidate in candidates:
+            command = cls._TRAILING_WORDS.sub("", candidate.strip().rstrip(".。"))
+            if command.startswith(cls._COMMAND_PREFIXES):
+                commands.append(command)
+        return commands
+
+    def collect(self, change_id: str) -> Optional[List[Dict]]:
+        """Return de-duplicated ``{"command", "tasks"}`` entries, or None if the change is unknown."""
+        change_dir = self.manager._find_change_dir(change_id)
+        if not change_dir:
+            return None
+        tasks_file = change_dir / "tasks.md"
+        if not tasks_file.exists():
+            return []
+
+        commands: Dict[str, List[int]] = {}
+        with tasks_file.open(encoding="utf-8", newline="\n") as lines:
+            for task in self.manager._iter_tasks(lines):
+                for command in self.extract_commands(task["verification"] or ""):
+                    commands.setdefault(command, []).append(task["line"])
+        return [{"command": command, "tasks": lines} for command, lines in commands.items()]
+
+    def tree_hash(self) -> Optional[str]:
+        """Fingerprint the working tree (tracked and untracked, minus openspec/).
+
+        Files come from ``git ls-files`` (ignored files excluded) and are
+        hashed with ``git hash-object --stdin-paths`` without ``-w``, so
+        neither the index nor the object store is written.
+        """
+        root = str(self.manager.root_dir)
+        try:
+            listed = subprocess.run(
+                ["git", "-C", root, "ls-files", "-z", "--cached", "--others", "--exclude-standard"]
+                + ["--", ".", ":(exclude)openspec"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                check=True,
+            ).stdout.decode("utf-8", "surrogateescape")
+            entries = []
+            for path in sorted(set(filter(None, listed.split("\0")))):
+                full = os.path.join(root, path)
+                if os.path.islink(full):
+                    entries.append(("120000", path, os.readlink(full)))
+                elif os.path.isfile(full) and "\n" not in path:
+                    mode = "100755" if os.access(full, os.X_OK) else "100644"
+                    entries.append((mode, path, None))
+            paths = [path for _, path, target in entries if target is None]
+            blobs = iter(
+                subprocess.run(
+                    ["git", "-C", root, "hash-object", "--no-filters", "--stdin-paths"],
+                    input="".join(f"{path}\n" for path in paths).encode(
+                        "utf-8", "surrogateescape"
+                    ),
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    check=True,
+                ).stdout.decode("ascii").split()
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        digest = hashlib.blake2b(digest_size=20)
+        for mode, path, target in entries:
+            content = next(blobs) if target is None else target
+            digest.update(f"{mode} {path}\0{content}\n".encode("utf-8", "surrogateescape"))
+        return digest.hexdigest()
+
+    def _run_command(self, command: str) -> Dict:
+        started = time.perf_counter()
+        try:
+            result = subprocess.run(
+                command,
+                shell=True,
+                cwd=str(self.manager.root_dir),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                timeout=self.timeout,
+            )
+            status = "pass" if result.returncode == 0 else "fail"
+            returncode: Optional[int] = result.returncode
+            output = result.stdout
+        except subprocess.TimeoutExpired as e:
+            status, returncode, output = "timeout", None, e.stdout or b""
+        return {
+            "status": status,
+            "returncode": returncode,
+            "duration": round(time.perf_counter() - started, 3),
+            "output": output.decode("utf-8", errors="replace")[-2000:],
+        }
+
+    def run(self, change_id: str, use_cache: bool = True) -> Optional[Dict]:
+        """Run all cited commands and return a pass/fail report."""
+        entries = self.collect(change_id)
+        if entries is None:
+            return None
+
+        tree = self.tree_hash() if use_cache else None
+        cache = self.manager._load_cache(self._CACHE_NAME) if tree else {}
+        passed_before = cache.get(tree, {}) if tree else {}
+
+        pending = [entry for entry in entries if entry["command"] not in passed_before]
+        with ThreadPoolExecutor(max_workers=max(1, self.jobs)) as pool:
+            outcomes = dict(
+                zip(
+                    (entry["command"] for entry in pending),
+                    pool.map(self._run_command, (entry["command"] for entry in pending)),
+                )
+            )
+
+        results = []
+        for entry in entries:
+            outcome = outcomes.get(entry["command"])
+            if outcome is None:
+                outcome = dict(passed_before[entry["command"]], status="cached")
+            results.append(dict(entry, **outcome))
+
+        if tree:
+            newly_passed = {
+                command: {"duration": outcome["duration"]}
+                for command, outcome in outcomes.items()
+                if outcome["status"] == "pass"
+            }
+            if newly_passed:
+                cache.pop(tree, None)
+                cache[tree] = dict(passed_before, **newly_passed)
+                for stale in list(cache)[: -self._CACHE_TREES]:
+                    del cache[stale]
+                self.manager._save_cache(self._CACHE_NAME, cache)
+
+        return {
+            "id": change_id,
+            "tree": tree,
+            "passed": all(result["status"] in ("pass", "cached") for result in results),
+            "commands": results,
+        }
+
+
+class ProgressJournal:
+    """Append-only JSON Lines log of task-count changes per active change.
+
+    Records are ``{"t", "id", "prev", "done", "total", "created"}`` whenever
+    ``task check``/``task uncheck`` changes a checkbox, and
+    ``{"t", "id", "event": "archived"}`` on archive. Edits made to tasks.md
+    by other means are not journaled. Each record is a single ``O_APPEND``
+    write, so concurrent writers never interleave; read-only commands never
+    append.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def append(self, record: Dict) -> None:
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        try:
+            if not self.path.parent.exists():
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                (self.path.parent / ".gitignore").write_text("*\n", encoding="utf-8")
+            fd = os.open(str(self.path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+    def read(self) -> Iterator[Dict]:
+        """Yield records in append order, skipping torn or corrupt lines."""
+        try:
+            handle = self.path.open(encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with handle:
+            for line in handle:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = fraction * (len(ordered) - 1)
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def compute_progress_metrics(
+    records: Iterable[Dict],
+    now: Optional[float] = None,
+    window_hours: float = 24.0,
+    stall_hours: float = 24.0,
+) -> Dict:
+    """Derive throughput, completion latency and stalled changes from journal records.
+
+    - throughput: tasks newly checked within the window, per hour
+    - latency: hours from a change's creation (its proposal's mtime, or its
+      first record for older journals) until all its tasks were done
+    - stalled: active, incomplete changes with no progress for ``stall_hours``
+
+    Only progress made through ``task check``/``task uncheck`` is journaled.
+    """
+    now = time.time() if now is None else now
+    window_start = now - window_hours * 3600
+    changes: Dict[str, Dict] = {}
+    completed_in_window = 0
+
+    for record in records:
+        state = changes.get(record["id"])
+        if state is None:
+            state = changes[record["id"]] = {
+                "first": record.get("created", record["t"]),
+                "last_progress": record["t"],
+                # Older records have no "prev"; their first one only sets the baseline.
+                "done": record.get("prev", record.get("done", 0)),
+                "total": record.get("total", 0),
+            }
+        if record.get("event") == "archived":
+            state["archived"] = record["t"]
+            state.setdefault("completed", record["t"])
+            continue
+        state["first"] = min(state["first"], record.get("created", state["first"]))
+        delta = record["done"] - record.get("prev", state["done"])
+        if delta > 0:
+            state["last_progress"] = record["t"]
+            if record["t"] >= window_start:
+                completed_in_window += delta
+        state["done"], state["total"] = record["done"], record["total"]
+        if record["total"] and record["done"] >= record["total"]:
+            state.setdefault("completed", record["t"])
+        else:
+            state.pop("completed", None)
+
+    latencies = [
+        (state["completed"] - state["first"]) / 3600
+        for state in changes.values()
+        if "completed" in state
+    ]
+    stalled = [
+        {
+            "id": change_id,
+            "done": state["done"],
+            "total": state["total"],
+            "idle_hours": round((now - state["last_progress"]) / 3600, 2),
+        }
+        for change_id, state in sorted(changes.items())
+        if "archived" not in state
+        and "completed" not in state
+        and now - state["last_progress"] >= stall_hours * 3600
+    ]
+    return {
+        "window_hours": window_hours,
+        "tasks_completed": completed_in_window,
+        "tasks_per_hour": round(completed_in_window / window_hours, 3) if window_hours else None,
+        "changes_tracked": len(changes),
+        "changes_completed": len(latencies),
+        "latency_hours": {
+            name: None if value is None else round(value, 3)
+            for name, value in (
+                ("p50", _percentile(latencies, 0.5)),
+                ("p90", _percentile(latencies, 0.9)),
+                ("p99", _percentile(latencies, 0.99)),
+            )
+        },
+        "stalled": stalled,
+    }
+
+
+_SEARCH_TOKEN_RE = re.compile(r"\w+")
+
+
+class SearchIndex:
+    """Incrementally maintained inverted index over change documents and specs.
+
+    Stored in ``openspec/.cflx/search-index.json`` as per-file entries
+    (mtime/size key, change, terms, length) and postings mapping each term
+    to ``{path: [line numbers]}``. ``update`` re-tokenizes only files whose
+    key changed and drops postings of deleted files, and writes the index
+    back only when that changed it; queries are ranked with BM25 over the
+    number of lines containing each term.
+    """
+
+    VERSION = 1
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, manager: OpenSpecManager):
+        self.manager = manager
+        self.data: Dict = {}
+        self._readers: Dict[str, Callable[[], str]] = {}
+        self._dirty = False
+
+    def update(self) -> Dict[str, int]:
+        """Bring the index up to date with the tree; returns update counts."""
+        data = self.manager._load_cache("search-index")
+        if data.get("version") != self.VERSION:
+            data = {"version": self.VERSION, "files": {}, "postings": {}}
+        self.data = data
+        self._dirty = False
+        files = data["files"]
+
+        documents = {item[0]: item[1:] for item in self.manager._iter_documents()}
+        self._readers = {path: document[3] for path, document in documents.items()}
+        stats = {"indexed": 0, "removed": 0}
+        for path in [path for path in files if path not in documents]:
+            self._drop(path)
+            stats["removed"] += 1
+        for path, (change_id, kind, key, read) in documents.items():
+            entry = files.get(path)
+            if entry and entry["key"] == key:
+                continue
+            if entry:
+                self._drop(path)
+            self._add(path, change_id, kind, key, read())
+            stats["indexed"] += 1
+
+        if self._dirty:
+            self.manager._save_cache("search-index", data)
+            self._dirty = False
+        stats["files"] = len(files)
+        return stats
+
+    def _add(self, path: str, change_id: Optional[str], kind: str, key: List[int], text: str):
+        self._dirty = True
+        term_lines: Dict[str, List[int]] = {}
+        length = 0
+        for number, line in enumerate(text.split("\n"), 1):
+            for term in _SEARCH_TOKEN_RE.findall(line.lower()):
+                length += 1
+                lines = term_lines.setdefault(term, [])
+                if not lines or lines[-1] != number:
+                    lines.append(number)
+        postings = self.data["postings"]
+        for term, lines in term_lines.items():
+            postings.setdefault(term, {})[path] = lines
+        self.data["files"][path] = {
+            "key": key,
+            "change": change_id,
+            "kind": kind,
+            "terms": sorted(term_lines),
+            "length": length,
+        }
+
+    def _drop(self, path: str) -> None:
+        self._dirty = True
+        postings = self.data["postings"]
+        for term in self.data["files"].pop(path)["terms"]:
+            posting = postings.get(term)
+            if posting is not None:
+                posting.pop(path, None)
+                if not posting:
+                    del postings[term]
+
+    def search(self, query: str, limit: int = 20, lines_per_hit: int = 3) -> List[Dict]:
+        """Return ranked hits for ``query``, each with its best matching lines."""
+        self.update()
+        files = self.data["files"]
+        terms = sorted(set(_SEARCH_TOKEN_RE.findall(query.lower())))
+        if not files or not terms:
+            return []
+        average = sum(entry["length"] for entry in files.values()) / len(files) or 1
+
+        scores: Dict[str, float] = {}
+        matched: Dict[str, Dict[int, int]] = {}
+        for term in terms:
+            posting = self.data["postings"].get(term, {})
+            if not posting:
+                continue
+            idf = math.log(1 + (len(files) - len(posting) + 0.5) / (len(posting) + 0.5))
+            for path, lines in posting.items():
+                frequency = len(lines)
+                norm = self.K1 * (1 - self.B + self.B * files[path]["length"] / average)
+                scores[path] = scores.get(path, 0.0) + idf * frequency * (self.K1 + 1) / (
+                    frequency + norm
+                )
+                line_hits = matched.setdefault(path, {})
+                for line in lines:
+                    line_hits[line] = line_hits.get(line, 0) + 1
+
+        hits = []
+        for path in sorted(scores, key=lambda path: (-scores[path], path))[:limit]:
+            best = sorted(matched[path].items(), key=lambda item: (-item[1], item[0]))
+            numbers = sorted(line for line, _ in best[:lines_per_hit])
+            text_lines = self._readers[path]().split("\n")
+            hits.append(
+                {
+                    "change": files[path]["change"],
+                    "file": path,
+                    "kind": files[path]["kind"],
+                    "score": round(scores[path], 4),
+                    "lines": [
+                        {"line": number, "text": text_lines[number - 1].strip()}
+                        for number in numbers
+                        if number <= len(text_lines)
+                    ],
+                }
+            )
+        return hits
+
+
+class SimilarityIndex:
+    """MinHash/LSH index of change proposals and tasks for near-duplicate lookup.
+
+    Each change's ``proposal.md`` + ``tasks.md`` is reduced to word 3-gram
+    shingles and a MinHash signature computed by one-permutation hashing
+    (one hash per shingle, binned, with empty bins densified from their
+    neighbours). Signatures are split into LSH bands whose buckets are kept
+    in ``openspec/.cflx/similarity-index.json``, so a query only scores
+    changes sharing a bucket. Changes are re-signed only when one of their
+    files changed, and the index is written back only when that changed it.
+    """
+
+    VERSION = 1
+    BINS = 128
+    BANDS = 32
+    SHINGLE = 3
+
+    def __init__(self, manager: OpenSpecManager):
+        self.manager = manager
+        self.data: Dict = {}
+        self._dirty = False
+
+    @classmethod
+    def signature(cls, text: str) -> Optional[List[int]]:
+        """MinHash signature of ``text``, or None if it has no words."""
+        words = _SEARCH_TOKEN_RE.findall(text.lower())
+        if not words:
+            return None
+        size = min(cls.SHINGLE, len(words))
+        bins: List[Optional[int]] = [None] * cls.BINS
+        for index in range(len(words) - size + 1):
+            shingle = " ".join(words[index : index + size]).encode("utf-8")
+            value = int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "big")
+            slot, rank = value % cls.BINS, value // cls.BINS
+            if bins[slot] is None or rank < bins[slot]:
+                bins[slot] = rank
+        signature = []
+        for slot in range(cls.BINS):
+            for offset in range(cls.BINS):
+                value = bins[(slot + offset) % cls.BINS]
+                if value is not None:
+                    # Tag borrowed values with the distance so they only match alike.
+                    signature.append(value + offset * (1 << 58))
+                    break
+        return signature
+
+    @classmethod
+    def _band_keys(cls, signature: List[int]) -> List[str]:
+        rows = cls.BINS // cls.BANDS
+        keys = []
+        for band in range(cls.BANDS):
+            chunk = ",".join(str(value) for value in signature[band * rows : (band + 1) * rows])
+            digest = hashlib.blake2b(chunk.encode("ascii"), digest_size=8).hexdigest()
+            keys.append(f"{band}:{digest}")
+        return keys
+
+    def update(self) -> Dict[str, int]:
+        """Re-sign changes whose proposal or tasks changed; returns update counts."""
+        data = self.manager._load_cache("similarity-index")
+        if data.get("version") != self.VERSION or data.get("bins") != self.BINS:
+            data = {"version": self.VERSION, "bins": self.BINS, "changes": {}, "buckets": {}}
+        self.data = data
+        self._dirty = False
+        changes = data["changes"]
+
+        documents: Dict[str, List] = {}
+        for path, change_id, kind, key, read in self.manager._iter_documents():
+            if change_id and kind in ("proposal", "tasks"):
+                documents.setdefault(change_id, []).append((kind, path, key, read))
+
+        stats = {"indexed": 0, "removed": 0}
+        for change_id in [change_id for change_id in changes if change_id not in documents]:
+            self._drop(change_id)
+            stats["removed"] += 1
+        for change_id, files in documents.items():
+            files.sort(key=lambda item: item[0])
+            key = [[path, file_key] for _, path, file_key, _ in files]
+            entry = changes.get(change_id)
+            if entry and entry["key"] == key:
+                continue
+            if entry:
+                self._drop(change_id)
+            signature = self.signature("\n".join(read() for _, _, _, read in files))
+            changes[change_id] = {"key": key, "signature": signature}
+            self._dirty = True
+            if signature:
+                for band_key in self._band_keys(signature):
+                    data["buckets"].setdefault(band_key, []).append(change_id)
+            stats["indexed"] += 1
+
+        if self._dirty:
+            self.manager._save_cache("similarity-index", data)
+            self._dirty = False
+        stats["changes"] = len(changes)
+        return stats
+
+    def _drop(self, change_id: str) -> None:
+        self._dirty = True
+        signature = self.data["changes"].pop(change_id)["signature"]
+        if not signature:
+            return
+        buckets = self.data["buckets"]
+        for band_key in self._band_keys(signature):
+            members = buckets.get(band_key)
+            if members and change_id in members:
+                members.remove(change_id)
+                if not members:
+                    del buckets[band_key]
+
+    def similar(
+        self,
+        change_id: Optional[str] = None,
+        text: Optional[str] = None,
+        top: int = 5,
+        exclude: Iterable[str] = (),
+    ) -> Optional[List[Dict]]:
+        """Top ``top`` changes similar to an indexed change or to raw ``text``.
+
+        Scores estimate the Jaccard similarity of the shingle sets; changes in
+        ``exclude`` (e.g. a draft already on disk) are never returned. Returns
+        None when ``change_id`` has no proposal or tasks.
+        """
+        self.update()
+        if change_id is not None:
+            entry = self.data["changes"].get(change_id)
+            if entry is None:
+                return None
+            signature = entry["signature"]
+        else:
+            signature = self.signature(text or "")
+        if not signature:
+            return []
+
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self.data["buckets"].get(band_key, ()))
+        candidates.discard(change_id)
+        candidates.difference_update(exclude)
+
+        scored = []
+        for candidate in candidates:
+            other = self.data["changes"][candidate]["signature"]
+            matches = sum(1 for left, right in zip(signature, other) if left == right)
+            scored.append({"id": candidate, "score": round(matches / self.BINS, 3)})
+        scored.sort(key=lambda hit: (-hit["score"], hit["id"]))
+        return scored[:top]
+
+
+class MetadataStore:
+    """SQLite mirror of change, task and spec-delta metadata for ad-hoc queries.
+
+    The database lives in ``openspec/.cflx/metadata.sqlite3`` and is synced
+    from the same documents ``show`` and ``search`` read: a file is parsed
+    again only when its [mtime_ns, size] changed, and rows derived from
+    vanished files are dropped. ``created`` and ``modified`` are the oldest
+    and newest mtime of a change's files (the pack's, for packed changes).
+    Opt-in: nothing is created until a query runs.
+    """
+
+    VERSION = 1
+    FILENAME = "metadata.sqlite3"
+    SCHEMA = """
+        CREATE TABLE files (
+            path TEXT PRIMARY KEY, change_id TEXT, kind TEXT, mtime_ns INTEGER, size INTEGER
+        );
+        CREATE INDEX files_change ON files (change_id);
+        CREATE TABLE changes (
+            id TEXT PRIMARY KEY, path TEXT, archived INTEGER, title TEXT,
+            tasks_completed INTEGER, tasks_total INTEGER, created TEXT, modified TEXT
+        );
+        CREATE INDEX changes_created ON changes (created);
+        CREATE INDEX changes_tasks ON changes (tasks_total);
+        CREATE TABLE tasks (
+            change_id TEXT, file TEXT, line INTEGER, section TEXT, checked INTEGER,
+            text TEXT, verification TEXT
+        );
+        CREATE INDEX tasks_change ON tasks (change_id);
+        CREATE INDEX tasks_file ON tasks (file);
+        CREATE TABLE spec_deltas (change_id TEXT, capability TEXT, file TEXT);
+        CREATE INDEX spec_deltas_capability ON spec_deltas (capability, change_id);
+        CREATE INDEX spec_deltas_file ON spec_deltas (file);
+        CREATE TABLE requirements (
+            capability TEXT, name TEXT, change_id TEXT, operation TEXT, line INTEGER,
+            scenarios INTEGER, file TEXT
+        );
+        CREATE INDEX requirements_name ON requirements (capability, name);
+        CREATE INDEX requirements_file ON requirements (file);
+    """
+
+    def __init__(self, manager: OpenSpecManager):
+        if sqlite3 is None:
+            raise RuntimeError("This Python was built without sqlite3; cflx query is unavailable")
+        if manager.git_tree is not None:
+            raise ValueError("cflx query reads the work tree; it cannot run at a git ref")
+        self.manager = manager
+        self.connection = self._connect()
+
+    def _connect(self) -> "sqlite3.Connection":
+        self.manager._ensure_cache_dir()
+        path = self.path = self.manager.cache_dir / self.FILENAME
+        for _ in range(2):
+            connection = sqlite3.connect(str(path), timeout=self.manager.lock_timeout)
+            try:
+                version = connection.execute("PRAGMA user_version").fetchone()[0]
+                if version != self.VERSION:
+                    with connection:
+                        for (table,) in connection.execute(
+                            "SELECT name FROM sqlite_master WHERE type = 'table'"
+                        ).fetchall():
+                            connection.execute(f'DROP TABLE "{table}"')
+                        connection.executescript(self.SCHEMA)
+                        connection.execute(f"PRAGMA user_version = {self.VERSION}")
+                return connection
+            except sqlite3.DatabaseError:
+                # A corrupt store is only a cache; start over.
+                connection.close()
+                path.unlink()
+        raise RuntimeError(f"Cannot open {path}")
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def sync(self) -> Dict[str, int]:
+        """Re-read files whose key changed and drop rows of removed files."""
+        connection = self.connection
+        known = {
+            path: [mtime_ns, size]
+            for path, mtime_ns, size in connection.execute(
+                "SELECT path, mtime_ns, size FROM files"
+            )
+        }
+        active_dir = str(self.manager.changes_dir.relative_to(self.manager.root_dir))
+
+        owners: Dict[str, str] = {}
+        current = {}
+        for path, change_id, kind, key, read in self.manager._iter_documents():
+            if change_id is not None:
+                relative = f"{kind}/spec.md" if kind.startswith("specs/") else f"{kind}.md"
+                change_path = path[: -len(relative) - 1]
+                # An archived copy of an active change is shadowed, as in show.
+                if owners.setdefault(change_id, change_path) != change_path:
+                    continue
+            current[path] = (change_id, kind, key, read)
+
+        stats = {"indexed": 0, "removed": 0}
+        touched = set()
+        with connection:
+            for path in [path for path in known if path not in current]:
+                touched.add(self._forget(path))
+                stats["removed"] += 1
+            for path, (change_id, kind, key, read) in current.items():
+                if known.get(path) == key:
+                    continue
+                if path in known:
+                    self._forget(path)
+                if change_id is not None:
+                    change_path = owners[change_id]
+                    connection.execute(
+                        "INSERT INTO changes (id, path, archived) VALUES (?, ?, ?) "
+                        "ON CONFLICT (id) DO UPDATE SET path = excluded.path, "
+                        "archived = excluded.archived",
+                        (change_id, change_path, int(change_path != f"{active_dir}/{change_id}")),
+                    )
+                    touched.add(change_id)
+                connection.execute(
+                    "INSERT INTO files VALUES (?, ?, ?, ?, ?)", (path, change_id, kind, *key)
+                )
+                self._ingest(path, change_id, kind, read())
+                stats["indexed"] += 1
+
+            touched.discard(None)
+            connection.executemany(
+                "UPDATE changes SET "
+                "created = (SELECT datetime(MIN(mtime_ns) / 1000000000, 'unixepoch', "
+                "'localtime') FROM files WHERE change_id = changes.id), "
+                "modified = (SELECT datetime(MAX(mtime_ns) / 1000000000, 'unixepoch', "
+                "'localtime') FROM files WHERE change_id = changes.id) WHERE id = ?",
+                [(change_id,) for change_id in touched],
+            )
+            connection.executemany(
+                "DELETE FROM changes WHERE id = ? "
+                "AND NOT EXISTS (SELECT 1 FROM files WHERE change_id = ?)",
+                [(change_id, change_id) for change_id in touched],
+            )
+        stats["changes"] = connection.execute("SELECT COUNT(*) FROM changes").fetchone()[0]
+        return stats
+
+    def _forget(self, path: str) -> Optional[str]:
+        connection = self.connection
+        change_id, kind = connection.execute(
+            "SELECT change_id, kind FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        for table in ("tasks", "spec_deltas", "requirements"):
+            connection.execute(f"DELETE FROM {table} WHERE file = ?", (path,))
+        connection.execute("DELETE FROM files WHERE path = ?", (path,))
+        if kind == "proposal":
+            connection.execute("UPDATE changes SET title = NULL WHERE id = ?", (change_id,))
+        elif kind == "tasks":
+            connection.execute(
+                "UPDATE changes SET tasks_completed = NULL, tasks_total = NULL WHERE id = ?",
+                (change_id,),
+            )
+        return change_id
+
+    def _ingest(self, path: str, change_id: Optional[str], kind: str, text: str) -> None:
+        connection = self.connection
+        if kind == "proposal":
+            connection.execute(
+                "UPDATE changes SET title = ? WHERE id = ?",
+                (self.manager._extract_title(text), change_id),
+            )
+        elif kind == "tasks":
+            counts = self.manager._count_tasks_text(text)
+            connection.execute(
+                "UPDATE changes SET tasks_completed = ?, tasks_total = ? WHERE id = ?",
+                (counts["tasks_completed"], counts["tasks_total"], change_id),
+            )
+            connection.executemany(
+                "INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        change_id,
+                        path,
+                        task["line"],
+                        task["section"],
+                        int(task["checked"]),
+                        task["text"],
+                        task["verification"],
+                    )
+                    for task in self.manager._iter_tasks(text.split("\n"))
+                ],
+            )
+        elif kind == "spec" or kind.startswith("specs/"):
+            capability = PurePosixPath(path).parent.name
+            if change_id is not None:
+                connection.execute(
+                    "INSERT INTO spec_deltas VALUES (?, ?, ?)", (change_id, capability, path)
+                )
+            connection.executemany(
+                "INSERT INTO requirements VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (capability, name, change_id, operation, line, scenarios, path)
+                    for operation, name, line, scenarios in outline_spec_delta(text)["requirements"]
+                ],
+            )
+
+    def query(self, sql: str, params: Iterable = ()) -> List[Dict]:
+        """Run a read-only SQL statement and return rows as dicts.
+
+        The statement gets its own connection opened with ``mode=ro``, so no
+        pragma can make the store writable; ATTACH (which ``VACUUM INTO``
+        also needs) is refused so it cannot create other files either.
+        """
+        self.connection.commit()
+        reader = sqlite3.connect(
+            f"{self.path.as_uri()}?mode=ro", uri=True, timeout=self.manager.lock_timeout
+        )
+        try:
+            reader.set_authorizer(self._authorize_query)
+            cursor = reader.execute(sql, tuple(params))
+            columns = [column[0] for column in cursor.description or ()]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            reader.close()
+
+    @staticmethod
+    def _authorize_query(action: int, *_) -> int:
+        return sqlite3.SQLITE_DENY if action == sqlite3.SQLITE_ATTACH else sqlite3.SQLITE_OK
+
+    def find_changes(
+        self,
+        incomplete: bool = False,
+        capability: Optional[str] = None,
+        requirement: Optional[str] = None,
+        since: Optional[str] = None,
+        min_tasks: Optional[int] = None,
+        include_archived: bool = False,
+    ) -> List[Dict]:
+        """Changes matching every given filter, newest first.
+
+        ``since`` is a ``YYYY-MM-DD`` date compared with ``created``;
+        ``min_tasks`` is an inclusive lower bound on ``tasks_total``.
+        """
+        clauses = []
+        params: List = []
+        if not include_archived:
+            clauses.append("c.archived = 0")
+        if incomplete:
+            clauses.append("IFNULL(c.tasks_completed, 0) < IFNULL(c.tasks_total, 0)")
+        if capability:
+            clauses.append(
+                "EXISTS (SELECT 1 FROM spec_deltas d WHERE d.capability = ? AND d.change_id = c.id)"
+            )
+            params.append(capability)
+        if requirement:
+            clauses.append(
+                "EXISTS (SELECT 1 FROM requirements r WHERE r.name = ? AND r.change_id = c.id)"
+            )
+            params.append(requirement)
+        if since:
+            clauses.append("c.created >= ?")
+            params.append(since)
+        if min_tasks is not None:
+            clauses.append("c.tasks_total >= ?")
+            params.append(min_tasks)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        return self.query(
+            "SELECT c.id, c.title, c.archived, c.tasks_completed, c.tasks_total, c.created, "
+            f"c.modified FROM changes c {where}ORDER BY c.created DESC, c.id",
+            params,
+        )
+
+
+def validate_roots(
+    roots: List[str],
+    change_id: Optional[str] = None,
+    strict: bool = False,
+    evidence_mode: EvidenceMode = "off",
+    max_workers: int = 8,
+    on_diagnostic: Optional[Callable[[int, Diagnostic], None]] = None,
+    configure: Optional[Callable[[OpenSpecManager], None]] = None,
+    ref: Optional[str] = None,
+) -> Dict:
+    """Validate several repository roots in one process on a shared worker pool.
+
+    Each root is validated independently: a missing ``openspec/`` tree or an
+    unexpected exception fails that root only and is recorded in its report.
+    ``on_diagnostic`` receives ``(root_index, diagnostic)`` for each finding
+    as soon as its change has been checked; calls are serialized across workers. ``configure`` is
+    called with each root's manager before validation (evidence checking,
+    rule selection). With ``ref``, each root is read from that git commit.
+    """
+    emit_lock = threading.Lock()
+
+    def validate_root(index: int) -> Dict:
+        root = roots[index]
+
+        def emit(diagnostic: Diagnostic) -> None:
+            if on_diagnostic:
+                with emit_lock:
+                    on_diagnostic(index, diagnostic)
+
+        started = time.perf_counter()
+        report = {"root": root, "valid": False, "changes": [], "error": None}
+        manager = None
+        try:
+            manager = OpenSpecManager.at_ref(ref, root) if ref else OpenSpecManager(root)
+            if configure:
+                configure(manager)
+            if not (manager.root_dir / "openspec").is_dir():
+                report["error"] = "openspec/ directory not found"
+            else:
+                report["changes"] = manager.validate_changes(
+                    change_id, strict, evidence_mode, on_diagnostic=emit
+                )
+                report["valid"] = all(change["valid"] for change in report["changes"])
+                report["rule_timings"] = manager.rule_timing_report()
+        except Exception as e:
+            report["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            if manager:
+                manager.close()
+        if report["error"]:
+            emit(Diagnostic("CFLX002", "error", report["error"]))
+        report["duration"] = round(time.perf_counter() - started, 6)
+        return report
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cflx-root") as pool:
+        reports = list(pool.map(validate_root, range(len(roots))))
+
+    rule_timings: Dict[str, Dict] = {}
+    for report in reports:
+        for timing in report.pop("rule_timings", []):
+            entry = rule_timings.setdefault(
+                timing["rule"], {"cpu_seconds": 0.0, "calls": 0, "diagnostics": 0}
+            )
+            for key in entry:
+                entry[key] += timing[key]
+
+    return {
+        "valid": all(report["valid"] for report in reports),
+        "summary": {
+            "roots": len(reports),
+            "failed_roots": sum(1 for report in reports if not report["valid"]),
+            "changes": sum(len(report["changes"]) for report in reports),
+            "errors": sum(
+                len(change["errors"]) for report in reports for change in report["changes"]
+            ),
+            "warnings": sum(
+                len(change["warnings"]) for report in reports for change in report["changes"]
+            ),
+        },
+        "roots": reports,
+        "rule_timings": _sorted_rule_timings(rule_timings),
+    }
+
+
+def _sorted_rule_timings(timings: Dict[str, Dict]) -> List[Dict]:
+    return sorted(
+        (
+            {"rule": rule_id, **entry, "cpu_seconds": round(entry["cpu_seconds"], 6)}
+            for rule_id, entry in timings.items()
+        ),
+        key=lambda timing: -timing["cpu_seconds"],
+    )
+
+
+class JsonLinesDiagnosticWriter:
+    """Stream diagnostics as JSON Lines, ending with a summary record."""
+
+    def __init__(self, stream, roots: List[str]):
+        self.stream = stream
+        self.roots = roots
+
+    def write(self, root_index: int, diagnostic: Diagnostic) -> None:
+        record = {"type": "diagnostic", "root": self.roots[root_index]}
+        record.update(diagnostic.to_dict())
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def close(self, report: Dict) -> None:
+        record = {"type": "summary", "valid": report["valid"]}
+        record.update(report["summary"])
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+
+class SarifDiagnosticWriter:
+    """Stream diagnostics as a SARIF 2.1.0 log with a single run.
+
+    The log header is written up front and each result is appended as it
+    arrives, so consumers reading the stream see each change's findings as
+    soon as that change has been checked.
+    """
+
+    _RESULTS_PLACEHOLDER = "__CFLX_RESULTS__"
 
-            spec_file = spec_dir / "spec.md"
-            if not spec_file.exists():
-                errors.append(f"{change_id}: Missing spec.md in {spec_dir.name}")
-                continue
+    def __init__(self, stream, roots: List[str]):
+        self.stream = stream
+        self.count = 0
+        log = {
+            "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+            "version": "2.1.0",
+            "runs": [
+                {
+                    "tool": {
+                        "driver": {
+                            "name": "cflx",
+                            "rules": [
+                                {"id": code, "name": name}
+                                for code, name in DIAGNOSTIC_CODES.items()
+                            ],
+                        }
+                    },
+                    "originalUriBaseIds": {
+                        f"ROOT{index}": {"uri": Path(root).resolve().as_uri() + "/"}
+                        for index, root in enumerate(roots)
+                    },
+                    "results": self._RESULTS_PLACEHOLDER,
+                }
+            ],
+        }
+        head, self._tail = json.dumps(log).split(json.dumps(self._RESULTS_PLACEHOLDER))
+        self.stream.write(head + "[")
+        self.stream.flush()
 
-            content = spec_file.read_text(encoding="utf-8")
-
-            # Check for delta markers
-            has_delta = False
-            for marker in [
-                "## ADDED Requirements",
-                "## MODIFIED Requirements",
-                "## REMOVED Requirements",
-            ]:
-                if marker in content:
-                    has_delta = True
-                    break
+    def write(self, root_index: int, diagnostic: Diagnostic) -> None:
+        result = {
+            "ruleId": diagnostic.code,
+            "level": "error" if diagnostic.severity == "error" else "warning",
+            "message": {"text": str(diagnostic)},
+        }
+        if diagnostic.path:
+            location = {
+                "artifactLocation": {"uri": diagnostic.path, "uriBaseId": f"ROOT{root_index}"}
+            }
+            if diagnostic.line is not None:
+                location["region"] = {"startLine": diagnostic.line}
+            result["locations"] = [{"physicalLocation": location}]
+        self.stream.write(("," if self.count else "") + "\n" + json.dumps(result))
+        self.stream.flush()
+        self.count += 1
 
-            if not has_delta:
-                errors.append(
-                    f"{change_id}: {spec_dir.name}/spec.md missing delta markers (ADDED/MODIFIED/REMOVED)"
-                )
+    def close(self, report: Dict) -> None:
+        self.stream.write("]" + self._tail + "\n")
+        self.stream.flush()
 
-            # Check for scenarios
-            requirements = re.findall(r"^### Requirement:", content, re.MULTILINE)
-            scenarios = re.findall(r"^#### Scenario:", content, re.MULTILINE)
 
-            if requirements and not scenarios:
-                errors.append(
-                    f"{change_id}: {spec_dir.name}/spec.md has requirements but no scenarios"
-                )
+DIAGNOSTIC_WRITERS = {"jsonl": JsonLinesDiagnosticWriter, "sarif": SarifDiagnosticWriter}
 
-        return errors
 
-    def archive_change(
-        self, change_id: str, skip_specs: bool = False
-    ) -> Tuple[bool, str]:
-        """Archive a deployed change."""
-        change_dir = self.changes_dir / change_id
+def read_roots_file(roots_file: str) -> List[str]:
+    """Read repository roots from a file, one per line ("-" reads stdin)."""
+    if roots_file == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        lines = Path(roots_file).read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
 
-        if not change_dir.exists():
-            return False, f"Change '{change_id}' not found"
 
-        if "archive" in change_dir.parts:
-            return False, f"Change '{change_id}' is already archived"
+def format_junit_report(report: Dict) -> str:
+    """Render a validate_roots report as JUnit XML (one testsuite per root)."""
+    import xml.etree.ElementTree as ET
 
-        # Validate before archiving
-        is_valid, errors = self.validate_change(change_id, strict=True)
-        if not is_valid:
-            return False, f"Validation failed:\n" + "\n".join(errors)
+    suites = ET.Element("testsuites", name="cflx validate")
+    for root_report in report["roots"]:
+        changes = root_report["changes"]
+        suite = ET.SubElement(
+            suites,
+            "testsuite",
+            name=root_report["root"],
+            tests=str(len(changes) + (1 if root_report["error"] else 0)),
+            failures=str(sum(1 for change in changes if not change["valid"])),
+            errors="1" if root_report["error"] else "0",
+            time=str(root_report["duration"]),
+        )
+        if root_report["error"]:
+            case = ET.SubElement(suite, "testcase", classname=root_report["root"], name="openspec")
+            ET.SubElement(case, "error", message=root_report["error"])
+            continue
+        for change in changes:
+            case = ET.SubElement(suite, "testcase", classname=root_report["root"], name=change["id"])
+            if not change["valid"]:
+                failure = ET.SubElement(
+                    case, "failure", message=f"{len(change['errors'])} validation error(s)"
+                )
+                failure.text = "\n".join(change["errors"])
+            if change["warnings"]:
+                ET.SubElement(case, "system-err").text = "\n".join(change["warnings"])
+    return ET.tostring(suites, encoding="unicode")
 
-        # Create archive directory if needed
-        self.archive_dir.mkdir(parents=True, exist_ok=True)
 
-        # Move to archive
-        archive_dest = self.archive_dir / change_id
-        if archive_dest.exists():
-            return False, f"Archive destination already exists: {archive_dest}"
+def estimate_tokens(text: str) -> int:
+    """Cheaply estimate the LLM token count of text.
 
-        shutil.move(str(change_dir), str(archive_dest))
+    Counts word pieces (long words cost one token per ~6 characters),
+    numbers, and each punctuation or non-Latin character separately, which
+    tracks common BPE tokenizers closely enough for budgeting.
+    """
+    tokens = 0
+    for piece in _TOKEN_PIECE.findall(text):
+        if piece[0].isascii() and piece[0].isalpha():
+            tokens += 1 + (len(piece) - 1) // 6
+        else:
+            tokens += 1
+    return tokens
 
-        # Update specs (unless skip_specs)
-        if not skip_specs:
-            specs_updated = self._update_specs_from_change(archive_dest)
-            return (
-                True,
-                f"Archived to {archive_dest.relative_to(self.root_dir)}\nSpecs updated: {specs_updated}",
-            )
 
-        return True, f"Archived to {archive_dest.relative_to(self.root_dir)}"
+_TOKEN_PIECE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
 
-    def _update_specs_from_change(self, change_dir: Path) -> List[str]:
-        """Update canonical specs from change deltas."""
-        updated = []
-        specs_dir = change_dir / "specs"
 
-        if not specs_dir.exists():
-            return updated
+def _split_markdown_sections(text: str) -> List[Tuple[str, str]]:
+    """Split markdown into (level-2 heading, section text) pairs; the preamble has heading ''."""
+    sections = []
+    heading = ""
+    lines: List[str] = []
+    for line in text.split("\n"):
+        if line.startswith("## "):
+            if any(part.strip() for part in lines):
+                sections.append((heading, "\n".join(lines).strip()))
+            heading, lines = line[3:].strip(), [line]
+        else:
+            lines.append(line)
+    if any(part.strip() for part in lines):
+        sections.append((heading, "\n".join(lines).strip()))
+    return sections
 
-        for spec_dir in specs_dir.iterdir():
-            if not spec_dir.is_dir():
-                continue
 
-            spec_file = spec_dir / "spec.md"
-            if not spec_file.exists():
-                continue
+def _truncate_to_tokens(text: str, budget: int) -> str:
+    """Keep whole leading lines of text that fit within budget tokens."""
+    kept = []
+    used = 0
+    for line in text.split("\n"):
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
 
-            # Update canonical spec
-            canonical_spec = self.specs_dir / spec_dir.name / "spec.md"
-            canonical_spec.parent.mkdir(parents=True, exist_ok=True)
 
-            delta_content = spec_file.read_text(encoding="utf-8")
+def pack_change_context(change: Dict, budget: int) -> Dict:
+    """Pack the most useful parts of a change into an estimated token budget.
 
-            # If canonical spec exists, merge; otherwise create
-            if canonical_spec.exists():
-                canonical_content = canonical_spec.read_text(encoding="utf-8")
-                merged_content = self._merge_spec_delta(
-                    canonical_content, delta_content
-                )
-                canonical_spec.write_text(merged_content, encoding="utf-8")
-            else:
-                # Extract requirements from delta
-                canonical_spec.write_text(
-                    self._delta_to_canonical(delta_content), encoding="utf-8"
-                )
+    Sections are considered in value order: header, open tasks, the proposal's
+    Why/What Changes, spec delta requirement blocks (MODIFIED, ADDED,
+    REMOVED), the rest of the proposal, then design. Sections are kept whole
+    while they fit. The first one that does not is cut at a line boundary if
+    a useful part of it fits, and packing stops there, so no lower-value
+    section ever takes the place of a higher-value one.
+    """
+    candidates: List[Tuple[str, str]] = []
 
-            updated.append(spec_dir.name)
+    header = [
+        f"# Change: {change['id']}",
+        f"Status: {'ARCHIVED' if change.get('archived') else 'ACTIVE'}",
+    ]
+    if "tasks_total" in change:
+        header.append(f"Tasks: {change.get('tasks_completed', 0)}/{change['tasks_total']} complete")
+    candidates.append(("header", "\n".join(header)))
 
-        return updated
+    if "tasks" in change:
+        open_tasks = [
+            f"- [ ] {task['text']} (tasks.md:{task['line']})"
+            for task in OpenSpecManager._iter_open_tasks(change["tasks"].split("\n"))
+        ]
+        if open_tasks:
+            candidates.append(("open tasks", "## Open Tasks\n" + "\n".join(open_tasks)))
 
-    def _merge_spec_delta(self, canonical: str, delta: str) -> str:
-        """Merge delta into canonical spec."""
-        # Simple implementation: append deltas
-        # In a real implementation, this would be more sophisticated
-        result = canonical
+    proposal_rest = []
+    if "proposal" in change:
+        for heading, text in _split_markdown_sections(change["proposal"]):
+            key = heading.lower()
+            if not heading or key.startswith("why") or key.startswith("what changes"):
+                candidates.append((f"proposal: {heading or 'title'}", text))
+            else:
+                proposal_rest.append((f"proposal: {heading}", text))
+
+    for operation in ("MODIFIED", "ADDED", "REMOVED"):
+        for capability, delta in sorted(change.get("specs", {}).items()):
+            for name, block in OpenSpecManager._parse_spec_delta(delta)[operation]:
+                candidates.append(
+                    (
+                        f"{capability}: {operation} {name}",
+                        f"## {capability} — {operation}\n{block}",
+                    )
+                )
 
-        # Extract ADDED requirements
-        added_section = re.search(
-            r"## ADDED Requirements(.+?)(?=## |$)", delta, re.DOTALL
+    candidates.extend(proposal_rest)
+    if "design" in change:
+        candidates.extend(
+            (f"design: {heading or 'intro'}", text)
+            for heading, text in _split_markdown_sections(change["design"])
         )
-        if added_section:
-            result += "\n\n" + added_section.group(1).strip()
 
-        # Extract MODIFIED requirements (replace matching sections)
-        # This is simplified - real implementation would need proper merging
+    parts = []
+    sections = []
+    omitted = []
+    used = 0
+    for index, (name, text) in enumerate(candidates):
+        cost = estimate_tokens(text) + 2
+        if used + cost <= budget:
+            parts.append(text)
+            sections.append({"name": name, "tokens": cost, "truncated": False})
+            used += cost
+            continue
 
-        return result
+        # Keep the heading plus at least one whole line, or nothing.
+        partial = _truncate_to_tokens(text, budget - used - 8) if budget - used > 16 else ""
+        if "\n" in partial:
+            partial += "\n…[truncated]"
+            cost = estimate_tokens(partial) + 2
+            parts.append(partial)
+            sections.append({"name": name, "tokens": cost, "truncated": True})
+            used += cost
+        else:
+            omitted.append(name)
+        omitted.extend(rest for rest, _ in candidates[index + 1 :])
+        break
 
-    def _delta_to_canonical(self, delta: str) -> str:
-        """Convert delta format to canonical spec format."""
-        # Remove delta markers
-        canonical = re.sub(
-            r"^## (ADDED|MODIFIED|REMOVED) Requirements",
-            "## Requirements",
-            delta,
-            flags=re.MULTILINE,
-        )
-        return canonical
+    return {
+        "id": change["id"],
+        "budget": budget,
+        "estimated_tokens": used,
+        "sections": sections,
+        "omitted": omitted,
+        "content": "\n\n".join(parts),
+    }
 
 
 def print_changes(changes: List[Dict], show_specs: bool = False):
@@ -454,6 +4361,11 @@ def print_changes(changes: List[Dict], show_specs: bool = False):
         for spec in changes:
             print(f"  {Colors.CYAN}{spec['name']}{Colors.RESET}")
             print(f"    Path: {spec['path']}")
+            if "requirements" in spec:
+                print(
+                    f"    Requirements: {spec['requirements']}  Scenarios: {spec['scenarios']}  "
+                    f"Size: {spec['bytes']} bytes  Modified: {spec['modified']}"
+                )
             print()
     else:
         print(f"\n{Colors.BOLD}Changes:{Colors.RESET}\n")
@@ -477,6 +4389,81 @@ def print_changes(changes: List[Dict], show_specs: bool = False):
             print()
 
 
+def print_worktree_changes(changes: List[Dict]):
+    """Print active changes merged across git worktrees."""
+    print(f"\n{Colors.BOLD}Changes across worktrees:{Colors.RESET}\n")
+    for change in changes:
+        progress = ""
+        if "tasks_total" in change:
+            progress = f"  {change.get('tasks_completed', 0)}/{change['tasks_total']}"
+        title = f"  {change['title']}" if "title" in change else ""
+        print(f"  {Colors.BOLD}{change['id']}{Colors.RESET}{progress}{title}")
+        for worktree in change["worktrees"]:
+            branch = f" [{worktree['branch']}]" if worktree.get("branch") else ""
+            counts = ""
+            if "tasks_total" in worktree:
+                counts = f"  {worktree.get('tasks_completed', 0)}/{worktree['tasks_total']}"
+            print(f"    {worktree['path']}{branch}{counts}")
+        print()
+
+
+def print_open_tasks(tasks: List[Dict]):
+    """Print unchecked tasks with their tasks.md line numbers."""
+    if not tasks:
+        print(f"{Colors.GREEN}No open tasks{Colors.RESET}")
+        return
+    for task in tasks:
+        print(f"tasks.md:{task['line']}: {task['text']}")
+        if task["verification"]:
+            print(f"    verification: {task['verification']}")
+
+
+def print_metrics(metrics: Dict):
+    """Print progress metrics computed from the journal."""
+    latency = metrics["latency_hours"]
+    print(f"\n{Colors.BOLD}Progress (last {metrics['window_hours']:g}h):{Colors.RESET}\n")
+    print(f"  Tasks completed: {metrics['tasks_completed']} ({metrics['tasks_per_hour']}/h)")
+    print(
+        f"  Changes tracked: {metrics['changes_tracked']}, "
+        f"completed: {metrics['changes_completed']}"
+    )
+    if latency["p50"] is not None:
+        print(
+            f"  Time to complete: p50 {latency['p50']}h, p90 {latency['p90']}h, "
+            f"p99 {latency['p99']}h"
+        )
+    if metrics["stalled"]:
+        print(f"\n{Colors.YELLOW}Stalled changes:{Colors.RESET}")
+        for change in metrics["stalled"]:
+            print(
+                f"  {change['id']}: {change['done']}/{change['total']} tasks, "
+                f"idle {change['idle_hours']}h"
+            )
+    print()
+
+
+def print_verification_report(report: Dict):
+    """Print collected or executed verification commands."""
+    if not report["commands"]:
+        print("No runnable commands found in verification notes")
+        return
+    symbols = {
+        "pass": f"{Colors.GREEN}✓",
+        "cached": f"{Colors.GREEN}✓ (cached)",
+        "fail": f"{Colors.RED}✗",
+        "timeout": f"{Colors.RED}✗ (timeout)",
+    }
+    for entry in report["commands"]:
+        lines = ", ".join(f"tasks.md:{line}" for line in entry["tasks"])
+        if "status" not in entry:
+            print(f"  {entry['command']}  ({lines})")
+            continue
+        print(f"{symbols[entry['status']]} {entry['command']}{Colors.RESET}  ({lines})")
+        if entry["status"] in ("fail", "timeout") and entry["output"]:
+            for line in entry["output"].rstrip().split("\n")[-10:]:
+                print(f"    {line}")
+
+
 def print_change_detail(change: Dict, json_output: bool = False):
     """Print detailed change information."""
     if json_output:
@@ -484,8 +4471,9 @@ def print_change_detail(change: Dict, json_output: bool = False):
         return
 
     print(f"\n{Colors.BOLD}Change: {change['id']}{Colors.RESET}")
-    print(f"Path: {change['path']}")
-    print(f"Status: {'ARCHIVED' if change.get('archived') else 'ACTIVE'}")
+    if "path" in change:  # --deltas-only output carries only the ID and specs
+        print(f"Path: {change['path']}")
+        print(f"Status: {'ARCHIVED' if change.get('archived') else 'ACTIVE'}")
 
     if "tasks_total" in change:
         print(f"Tasks: {change.get('tasks_completed', 0)}/{change['tasks_total']}")
@@ -502,11 +4490,123 @@ def print_change_detail(change: Dict, json_output: bool = False):
         print(f"\n{Colors.BOLD}Spec Deltas:{Colors.RESET}")
         for spec_name, spec_content in change["specs"].items():
             print(f"\n  {Colors.CYAN}{spec_name}:{Colors.RESET}")
-            print(
-                f"  {spec_content[:300]}..."
-                if len(spec_content) > 300
-                else f"  {spec_content}"
-            )
+            print(f"  {spec_content[:300]}..." if len(spec_content) > 300 else f"  {spec_content}")
+
+
+def print_similar(hits: List[Dict]):
+    """Print similar changes with their estimated similarity."""
+    if not hits:
+        print("No similar changes found")
+        return
+    for hit in hits:
+        print(f"  {hit['score']:.2f}  {Colors.CYAN}{hit['id']}{Colors.RESET}")
+
+
+def print_search_hits(hits: List[Dict]):
+    """Print ranked search hits with their matching lines."""
+    if not hits:
+        print("No matches")
+        return
+    for hit in hits:
+        change = f"{Colors.CYAN}{hit['change']}{Colors.RESET}  " if hit["change"] else ""
+        print(f"{change}{hit['file']}  (score {hit['score']})")
+        for line in hit["lines"]:
+            print(f"    {line['line']}: {line['text'][:160]}")
+
+
+def print_query_changes(changes: List[Dict]):
+    """Print changes matched by ``cflx query`` filters."""
+    if not changes:
+        print("No matching changes")
+        return
+    for change in changes:
+        archived = " (archived)" if change["archived"] else ""
+        tasks = ""
+        if change["tasks_total"]:
+            tasks = f" [{change['tasks_completed']}/{change['tasks_total']}]"
+        print(f"{Colors.CYAN}{change['id']}{Colors.RESET}{archived}{tasks}  {change['created']}")
+        if change["title"]:
+            print(f"    {change['title']}")
+
+
+def print_query_rows(rows: List[Dict]):
+    """Print SQL result rows as tab-separated values with a header line."""
+    if not rows:
+        print("No rows")
+        return
+    print("\t".join(rows[0]))
+    for row in rows:
+        print("\t".join("" if value is None else str(value) for value in row.values()))
+
+
+def print_rebuild_report(report: Dict):
+    """Print the result of replaying archived spec deltas."""
+    symbols = {
+        "match": f"{Colors.GREEN}✓",
+        "differs": f"{Colors.RED}✗",
+        "missing": f"{Colors.RED}✗ (missing from openspec/specs)",
+        "untracked": f"{Colors.YELLOW}! (no archived deltas)",
+    }
+    for result in report["capabilities"]:
+        symbol = symbols.get(result.get("status"), f"{Colors.CYAN}•")
+        baseline = (
+            f", {result['baseline']} pre-archive requirement(s) unchecked"
+            if result.get("baseline")
+            else ""
+        )
+        print(
+            f"{symbol} {result['capability']}{Colors.RESET}  "
+            f"({result['changes']} change(s), {result['replayed']} replayed{baseline})"
+        )
+        if result.get("diff"):
+            for line in result["diff"].rstrip("\n").split("\n"):
+                print(f"    {line}")
+    summary = report["summary"]
+    message = f"\n{summary['capabilities']} capabilities, {summary['replayed']} delta(s) replayed"
+    if "diverged" in summary:
+        message += f", {summary['diverged']} diverged"
+    print(message)
+
+
+def print_roots_report(report: Dict):
+    """Print a multi-root validation report."""
+    for root_report in report["roots"]:
+        if root_report["valid"]:
+            print(f"{Colors.GREEN}✓ {root_report['root']}{Colors.RESET}")
+            continue
+        print(f"{Colors.RED}✗ {root_report['root']}{Colors.RESET}")
+        if root_report["error"]:
+            print(f"  {root_report['error']}")
+        for change in root_report["changes"]:
+            for error in change["errors"]:
+                print(f"  {error}")
+    summary = report["summary"]
+    print(
+        f"\n{summary['roots'] - summary['failed_roots']}/{summary['roots']} roots passed, "
+        f"{summary['errors']} error(s), {summary['warnings']} warning(s)"
+    )
+
+
+def print_rules(manager: OpenSpecManager):
+    """Print the registered validation rules and whether each one runs."""
+    active = {rule.id for rule in manager.active_rules()}
+    for rule in VALIDATION_RULES.values():
+        state = "" if rule.id in active else f" {Colors.YELLOW}(disabled){Colors.RESET}"
+        codes = ", ".join(rule.codes)
+        print(f"{Colors.CYAN}{rule.id}{Colors.RESET} [{rule.scope}] {codes}{state}")
+        if rule.description:
+            print(f"    {rule.description}")
+
+
+def print_rule_timings(timings: List[Dict]):
+    """Print CPU time per validation rule to stderr."""
+    print(f"\n{Colors.BOLD}Rule timings (CPU):{Colors.RESET}", file=sys.stderr)
+    for timing in timings:
+        print(
+            f"  {timing['cpu_seconds'] * 1000:10.2f} ms  {timing['rule']} "
+            f"({timing['calls']} call(s), {timing['diagnostics']} finding(s))",
+            file=sys.stderr,
+        )
 
 
 def main():
@@ -515,37 +4615,284 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
 
+    parser.add_argument(
+        "--lock-timeout",
+        type=float,
+        default=30.0,
+        metavar="SECONDS",
+        help="How long writers wait for change/spec locks",
+    )
+    parser.add_argument(
+        "--ref",
+        metavar="COMMIT",
+        help="Read the openspec tree from a git commit instead of the work tree "
+        "(list, show and validate only)",
+    )
+
     subparsers = parser.add_subparsers(dest="command", help="Commands")
 
     # list command
     list_parser = subparsers.add_parser("list", help="List changes or specs")
+    list_parser.add_argument("--specs", action="store_true", help="List specs instead of changes")
+    list_parser.add_argument("--json", action="store_true", help="Output as JSON")
+    list_parser.add_argument(
+        "--all-worktrees",
+        action="store_true",
+        help="Merge active changes and progress across all git worktrees",
+    )
     list_parser.add_argument(
-        "--specs", action="store_true", help="List specs instead of changes"
+        "--sort",
+        choices=("name", "bytes", "requirements", "scenarios"),
+        default="name",
+        help="Sort specs by this field (largest first for numeric fields)",
     )
 
     # show command
     show_parser = subparsers.add_parser("show", help="Show change details")
     show_parser.add_argument("change_id", help="Change ID to show")
     show_parser.add_argument("--json", action="store_true", help="Output as JSON")
+    show_parser.add_argument("--deltas-only", action="store_true", help="Show only spec deltas")
+    show_parser.add_argument(
+        "--open-tasks", action="store_true", help="Show only unchecked tasks"
+    )
+    show_parser.add_argument(
+        "--limit", type=int, metavar="N", help="With --open-tasks, stop after N tasks"
+    )
     show_parser.add_argument(
-        "--deltas-only", action="store_true", help="Show only spec deltas"
+        "--budget",
+        type=int,
+        metavar="TOKENS",
+        help="Pack proposal, open tasks and requirement blocks into ~TOKENS tokens",
+    )
+
+    # next-task command
+    next_task_parser = subparsers.add_parser("next-task", help="Show the first unchecked task")
+    next_task_parser.add_argument("change_id", help="Change ID")
+    next_task_parser.add_argument("--json", action="store_true", help="Output as JSON")
+
+    # task command
+    task_parser = subparsers.add_parser("task", help="Update task checkboxes in tasks.md")
+    task_subparsers = task_parser.add_subparsers(dest="task_command", required=True)
+    for action, help_text in (("check", "Mark a task [x]"), ("uncheck", "Mark a task [ ]")):
+        action_parser = task_subparsers.add_parser(action, help=help_text)
+        action_parser.add_argument("change_id", help="Change ID")
+        action_parser.add_argument("target", help="tasks.md line number or task number (e.g. 1.2)")
+        action_parser.add_argument(
+            "--expect", metavar="TEXT", help="Refuse to update unless the task contains TEXT"
+        )
+        action_parser.add_argument("--json", action="store_true", help="Output as JSON")
+
+    # verify command
+    verify_parser = subparsers.add_parser(
+        "verify", help="List or run commands cited in verification notes"
     )
+    verify_parser.add_argument("change_id", help="Change ID")
+    verify_parser.add_argument("--run", action="store_true", help="Run the collected commands")
+    verify_parser.add_argument("--jobs", type=int, default=4, help="Commands run in parallel")
+    verify_parser.add_argument(
+        "--timeout", type=float, default=600.0, metavar="SECONDS", help="Per-command timeout"
+    )
+    verify_parser.add_argument(
+        "--no-cache", action="store_true", help="Ignore cached passes for this tree"
+    )
+    verify_parser.add_argument("--json", action="store_true", help="Output as JSON")
+
+    # metrics command
+    metrics_parser = subparsers.add_parser(
+        "metrics",
+        help="Task throughput, completion latency and stalled changes (from task check)",
+    )
+    metrics_parser.add_argument(
+        "--window", type=float, default=24.0, metavar="HOURS", help="Throughput window"
+    )
+    metrics_parser.add_argument(
+        "--stall-hours",
+        type=float,
+        default=24.0,
+        metavar="HOURS",
+        help="Report incomplete changes idle for at least HOURS",
+    )
+    metrics_parser.add_argument("--json", action="store_true", help="Output as JSON")
+
+    # search command
+    search_parser = subparsers.add_parser(
+        "search", help="Search proposals, tasks and specs (incremental inverted index)"
+    )
+    search_parser.add_argument("query", help="Search terms")
+    search_parser.add_argument("--limit", type=int, default=20, help="Maximum number of hits")
+    search_parser.add_argument("--json", action="store_true", help="Output as JSON")
+
+    # similar command
+    similar_parser = subparsers.add_parser(
+        "similar", help="Find changes similar to a change or a draft (MinHash/LSH)"
+    )
+    similar_parser.add_argument("change_id", nargs="?", help="Change ID to compare")
+    similar_parser.add_argument(
+        "--stdin", action="store_true", help="Compare a draft proposal/tasks read from stdin"
+    )
+    similar_parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="ID",
+        help="Leave this change out of the results (repeatable), e.g. the draft itself",
+    )
+    similar_parser.add_argument("--top", type=int, default=5, help="Number of changes to show")
+    similar_parser.add_argument("--json", action="store_true", help="Output as JSON")
+
+    # query command
+    query_parser = subparsers.add_parser(
+        "query", help="Query change, task and spec metadata (SQLite store, synced by mtime)"
+    )
+    query_parser.add_argument(
+        "--sql", help="Run a read-only SQL statement instead of the change filters"
+    )
+    query_parser.add_argument(
+        "--incomplete", action="store_true", help="Only changes with open tasks"
+    )
+    query_parser.add_argument(
+        "--capability", metavar="CAP", help="Only changes with a delta for capability CAP"
+    )
+    query_parser.add_argument(
+        "--requirement", metavar="NAME", help="Only changes whose deltas touch requirement NAME"
+    )
+    query_parser.add_argument(
+        "--since",
+        metavar="DATE",
+        help="Only changes created on or after DATE (YYYY-MM-DD, or 'month' for this month)",
+    )
+    query_parser.add_argument(
+        "--min-tasks", type=int, metavar="N", help="Only changes with at least N tasks"
+    )
+    query_parser.add_argument("--archived", action="store_true", help="Include archived changes")
+    query_parser.add_argument(
+        "--no-sync", action="store_true", help="Query the store as last synced"
+    )
+    query_parser.add_argument("--json", action="store_true", help="Output as JSON")
+
+    # spec command
+    spec_parser = subparsers.add_parser(
+        "spec", aliases=["specs"], help="Inspect, preview and rebuild canonical specs"
+    )
+    spec_subparsers = spec_parser.add_subparsers(dest="spec_command", required=True)
+    render_parser = spec_subparsers.add_parser(
+        "render", help="Show a spec with change deltas applied in memory (nothing is written)"
+    )
+    render_parser.add_argument("capability", help="Capability name under openspec/specs")
+    render_sources = render_parser.add_mutually_exclusive_group()
+    render_sources.add_argument(
+        "--with", dest="with_ids", nargs="+", metavar="ID", help="Apply these changes in order"
+    )
+    render_sources.add_argument(
+        "--with-active", action="store_true", help="Apply every active change (by ID)"
+    )
+    render_parser.add_argument("--json", action="store_true", help="Output as JSON")
+    rebuild_parser = spec_subparsers.add_parser(
+        "rebuild", help="Replay archived spec deltas in archive order"
+    )
+    rebuild_parser.add_argument(
+        "--verify", action="store_true", help="Diff the result against openspec/specs"
+    )
+    rebuild_parser.add_argument(
+        "--output", metavar="DIR", help="Write rebuilt specs to DIR/<capability>/spec.md"
+    )
+    rebuild_parser.add_argument(
+        "--jobs", type=int, default=8, help="Capabilities replayed in parallel"
+    )
+    rebuild_parser.add_argument(
+        "--no-checkpoint", action="store_true", help="Replay everything, ignoring checkpoints"
+    )
+    rebuild_parser.add_argument("--json", action="store_true", help="Output as JSON")
 
     # validate command
     validate_parser = subparsers.add_parser("validate", help="Validate changes")
     validate_parser.add_argument(
         "change_id", nargs="?", help="Change ID to validate (omit for all)"
     )
+    validate_parser.add_argument("--strict", action="store_true", help="Strict validation mode")
+    # Evidence modes are a proposal-drafting aid; the workflow skill validates with them off.
+    validate_parser.set_defaults(evidence="off")
+    validate_parser.add_argument(
+        "--check-paths",
+        action="store_true",
+        help="Check that paths and tests cited by completed tasks exist in the repository",
+    )
+    validate_parser.add_argument(
+        "--diff-base",
+        metavar="REF",
+        help="With --check-paths, also flag cited files not changed since REF",
+    )
+    validate_parser.add_argument(
+        "--disable-rule",
+        action="append",
+        default=[],
+        metavar="RULE",
+        help="Skip a validation rule by ID (repeatable)",
+    )
+    validate_parser.add_argument(
+        "--enable-rule",
+        action="append",
+        default=[],
+        metavar="RULE",
+        help="Run a validation rule that is off by default (repeatable)",
+    )
+    validate_parser.add_argument(
+        "--rules-plugin",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="Load extra validation rules from a local Python file (repeatable)",
+    )
+    validate_parser.add_argument(
+        "--list-rules", action="store_true", help="List validation rules and exit"
+    )
+    validate_parser.add_argument(
+        "--rule-timings", action="store_true", help="Report CPU time per rule on stderr"
+    )
+    validate_parser.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Validate draft changes read from stdin as JSON "
+        '({"id": ..., "files": {"proposal.md": ..., ...}} or a list of them)',
+    )
+    validate_parser.add_argument(
+        "--roots", nargs="+", metavar="DIR", help="Validate several repository roots at once"
+    )
+    validate_parser.add_argument(
+        "--roots-from", metavar="FILE", help="Read repository roots from FILE ('-' for stdin)"
+    )
+    validate_parser.add_argument(
+        "--format",
+        choices=("text", "json", "junit", "jsonl", "sarif"),
+        default="text",
+        help="Output format: a combined report (text, json, junit) or streamed "
+        "diagnostics (jsonl, sarif)",
+    )
     validate_parser.add_argument(
-        "--strict", action="store_true", help="Strict validation mode"
+        "--jobs", type=int, default=8, help="Worker threads shared across roots"
     )
 
     # archive command
     archive_parser = subparsers.add_parser("archive", help="Archive a deployed change")
-    archive_parser.add_argument("change_id", help="Change ID to archive")
+    archive_parser.add_argument(
+        "change_id",
+        help="Change ID to archive, or 'compact' / 'unpack' to manage the archive pack",
+    )
+    archive_parser.add_argument(
+        "pack_ids", nargs="*", metavar="ID", help="Changes to restore with 'unpack' (default: all)"
+    )
+    archive_parser.add_argument(
+        "--older-than",
+        type=float,
+        metavar="DAYS",
+        help="With 'compact', only pack changes untouched for DAYS days",
+    )
     archive_parser.add_argument("--yes", action="store_true", help="Skip confirmation")
+    archive_parser.add_argument("--skip-specs", action="store_true", help="Skip spec updates")
     archive_parser.add_argument(
-        "--skip-specs", action="store_true", help="Skip spec updates"
+        "--incremental",
+        action="store_true",
+        help="Rewrite only affected requirement blocks of canonical specs",
     )
 
     args = parser.parse_args()
@@ -554,12 +4901,120 @@ def main():
         parser.print_help()
         return 1
 
-    manager = OpenSpecManager()
+    if args.command == "list" and args.all_worktrees and (args.specs or args.ref):
+        parser.error("--all-worktrees lists active changes of the work trees only")
+    if args.ref and args.command not in ("list", "show", "validate"):
+        parser.error("--ref only applies to list, show and validate")
+    if args.ref and args.command == "validate" and (args.check_paths or args.diff_base):
+        parser.error("--check-paths and --diff-base read the work tree; drop --ref")
+    if args.command == "show" and args.limit is not None and not args.open_tasks:
+        parser.error("--limit only applies with --open-tasks")
+    if args.command == "show" and args.open_tasks and args.budget is not None:
+        parser.error("--budget packs open tasks with the proposal; drop --open-tasks")
+
+    manager = OpenSpecManager(lock_timeout=args.lock_timeout)
+    # Commands that only report on the tree read caches but leave the disk untouched.
+    manager.read_only = args.command in ("list", "show", "next-task", "metrics", "validate") or (
+        args.command == "spec" and args.spec_command == "render"
+    )
+    if args.command == "list":
+        manager.writable_caches = {"spec-stats", "worktree-changes"}
+    elif args.command == "validate":
+        manager.writable_caches = {"requirement-index"}
 
     try:
-        if args.command == "list":
+        if args.ref:
+            manager = OpenSpecManager.at_ref(args.ref)
+
+        if args.command == "validate":
+            for plugin in args.rules_plugin:
+                load_rule_plugin(plugin)
+
+            def configure_validation(target: OpenSpecManager) -> None:
+                target.read_only = True
+                target.writable_caches = {"requirement-index"}
+                target.configure_rules(args.enable_rule, args.disable_rule)
+                if args.check_paths or args.diff_base:
+                    target.evidence_checker = EvidenceChecker(target.root_dir, args.diff_base)
+
+        if args.command == "list" and args.all_worktrees:
+            changes = manager.list_worktree_changes()
+            if args.json:
+                print(json.dumps(changes, indent=2))
+            else:
+                print_worktree_changes(changes)
+
+        elif args.command == "list":
             changes = manager.list_changes(show_specs=args.specs)
-            print_changes(changes, show_specs=args.specs)
+            if args.specs and args.sort != "name":
+                changes.sort(key=lambda spec: spec.get(args.sort, 0), reverse=True)
+            if args.json:
+                print(json.dumps(changes, indent=2))
+            else:
+                print_changes(changes, show_specs=args.specs)
+
+        elif args.command == "next-task" or (args.command == "show" and args.open_tasks):
+            limit = 1 if args.command == "next-task" else args.limit
+            tasks = manager.open_tasks(args.change_id, limit=limit)
+            if tasks is None:
+                print(
+                    f"{Colors.RED}Error: Change '{args.change_id}' not found{Colors.RESET}",
+                    file=sys.stderr,
+                )
+                return 1
+            if args.json:
+                payload = (tasks[0] if tasks else None) if args.command == "next-task" else tasks
+                print(json.dumps(payload, indent=2, ensure_ascii=False))
+            else:
+                print_open_tasks(tasks)
+
+        elif args.command == "metrics":
+            metrics = compute_progress_metrics(
+                manager.progress_journal.read(),
+                window_hours=args.window,
+                stall_hours=args.stall_hours,
+            )
+            if args.json:
+                print(json.dumps(metrics, indent=2))
+            else:
+                print_metrics(metrics)
+
+        elif args.command == "verify":
+            runner = VerificationRunner(manager, jobs=args.jobs, timeout=args.timeout)
+            if not args.run:
+                entries = runner.collect(args.change_id)
+                report = None if entries is None else {"id": args.change_id, "commands": entries}
+            else:
+                report = runner.run(args.change_id, use_cache=not args.no_cache)
+            if report is None:
+                print(
+                    f"{Colors.RED}Error: Change '{args.change_id}' not found{Colors.RESET}",
+                    file=sys.stderr,
+                )
+                return 1
+            if args.json:
+                print(json.dumps(report, indent=2, ensure_ascii=False))
+            else:
+                print_verification_report(report)
+            return 0 if report.get("passed", True) else 1
+
+        elif args.command == "task":
+            result = manager.check_task(
+                args.change_id,
+                args.target,
+                checked=args.task_command == "check",
+                expect=args.expect,
+            )
+            if args.json:
+                print(json.dumps(result, indent=2, ensure_ascii=False))
+            else:
+                mark = "x" if result["checked"] else " "
+                state = "" if result["changed"] else " (unchanged)"
+                print(
+                    f"{Colors.GREEN}✓ tasks.md:{result['line']}: [{mark}] "
+                    f"{result['text']}{state}{Colors.RESET}"
+                )
+                print(f"  Tasks: {result['tasks_completed']}/{result['tasks_total']}")
 
         elif args.command == "show":
             change = manager.show_change(
@@ -571,24 +5026,214 @@ def main():
                     file=sys.stderr,
                 )
                 return 1
+            if args.budget is not None:
+                packed = pack_change_context(change, args.budget)
+                if args.json:
+                    print(json.dumps(packed, indent=2, ensure_ascii=False))
+                else:
+                    print(packed["content"])
+                return 0
             print_change_detail(change, json_output=args.json)
 
+        elif args.command == "search":
+            hits = SearchIndex(manager).search(args.query, limit=args.limit)
+            if args.json:
+                print(json.dumps(hits, indent=2, ensure_ascii=False))
+            else:
+                print_search_hits(hits)
+
+        elif args.command == "similar":
+            if args.stdin == bool(args.change_id):
+                parser.error("similar takes either a change ID or --stdin")
+            index = SimilarityIndex(manager)
+            if args.stdin:
+                hits = index.similar(text=sys.stdin.read(), top=args.top, exclude=args.exclude)
+            else:
+                hits = index.similar(args.change_id, top=args.top, exclude=args.exclude)
+            if hits is None:
+                print(
+                    f"{Colors.RED}Error: Change '{args.change_id}' not found{Colors.RESET}",
+                    file=sys.stderr,
+                )
+                return 1
+            if args.json:
+                print(json.dumps(hits, indent=2))
+            else:
+                print_similar(hits)
+
+        elif args.command == "query":
+            filters = (args.incomplete, args.capability, args.requirement, args.since)
+            if args.sql and (any(filters) or args.min_tasks is not None or args.archived):
+                parser.error("--sql cannot be combined with the change filters")
+            since = args.since
+            if since == "month":
+                since = datetime.now().strftime("%Y-%m-01")
+            store = MetadataStore(manager)
+            try:
+                if not args.no_sync:
+                    store.sync()
+                if args.sql:
+                    rows = store.query(args.sql)
+                else:
+                    rows = store.find_changes(
+                        incomplete=args.incomplete,
+                        capability=args.capability,
+                        requirement=args.requirement,
+                        since=since,
+                        min_tasks=args.min_tasks,
+                        include_archived=args.archived,
+                    )
+            finally:
+                store.close()
+            if args.json:
+                print(json.dumps(rows, indent=2, ensure_ascii=False))
+            elif args.sql:
+                print_query_rows(rows)
+            else:
+                print_query_changes(rows)
+
+        elif args.command in ("spec", "specs") and args.spec_command == "rebuild":
+            report = manager.rebuild_specs(
+                verify=args.verify,
+                output_dir=args.output,
+                max_workers=args.jobs,
+                use_checkpoints=not args.no_checkpoint,
+            )
+            if args.json:
+                print(json.dumps(report, indent=2, ensure_ascii=False))
+            else:
+                print_rebuild_report(report)
+            return 0 if report.get("valid", True) else 1
+
+        elif args.command in ("spec", "specs"):
+            rendered = manager.render_spec(
+                args.capability, args.with_ids, include_active=args.with_active
+            )
+            if rendered is None:
+                print(
+                    f"{Colors.RED}Error: Spec '{args.capability}' not found{Colors.RESET}",
+                    file=sys.stderr,
+                )
+                return 1
+            if args.json:
+                print(json.dumps(rendered, indent=2, ensure_ascii=False))
+            else:
+                print(rendered["content"], end="")
+
+        elif args.command == "validate" and args.list_rules:
+            configure_validation(manager)
+            print_rules(manager)
+
+        elif args.command == "validate" and args.stdin:
+            if args.change_id or args.roots or args.roots_from:
+                parser.error("--stdin validates drafts; drop the change ID and roots")
+            if args.format not in ("text", "json"):
+                parser.error("--stdin supports --format text or json")
+            configure_validation(manager)
+            bundles = json.load(sys.stdin)
+            results = [
+                manager.validate_draft(bundle, strict=args.strict, evidence_mode=args.evidence)
+                for bundle in (bundles if isinstance(bundles, list) else [bundles])
+            ]
+            if args.rule_timings:
+                print_rule_timings(manager.rule_timing_report())
+            valid = all(result["valid"] for result in results)
+            if args.format == "json":
+                payload = results if isinstance(bundles, list) else results[0]
+                print(json.dumps(payload, indent=2, ensure_ascii=False))
+                return 0 if valid else 1
+            for warning in (warning for result in results for warning in result["warnings"]):
+                print(f"{Colors.YELLOW}! {warning}{Colors.RESET}", file=sys.stderr)
+            if valid:
+                print(f"{Colors.GREEN}✓ Validation passed{Colors.RESET}")
+                return 0
+            print(f"{Colors.RED}✗ Validation failed:{Colors.RESET}", file=sys.stderr)
+            for error in (error for result in results for error in result["errors"]):
+                print(f"  {error}", file=sys.stderr)
+            return 1
+
+        elif args.command == "validate" and (
+            args.roots or args.roots_from or args.format != "text"
+        ):
+            roots = list(args.roots or [])
+            if args.roots_from:
+                roots.extend(read_roots_file(args.roots_from))
+            roots = roots or ["."]
+            writer = None
+            if args.format in DIAGNOSTIC_WRITERS:
+                writer = DIAGNOSTIC_WRITERS[args.format](sys.stdout, roots)
+            report = validate_roots(
+                roots,
+                args.change_id,
+                strict=args.strict,
+                evidence_mode=args.evidence,
+                max_workers=args.jobs,
+                on_diagnostic=writer.write if writer else None,
+                configure=configure_validation,
+                ref=args.ref,
+            )
+            if args.rule_timings:
+                print_rule_timings(report["rule_timings"])
+            if writer:
+                writer.close(report)
+            elif args.format == "junit":
+                print(format_junit_report(report))
+            elif args.format == "json":
+                print(json.dumps(report, indent=2))
+            else:
+                print_roots_report(report)
+            return 0 if report["valid"] else 1
+
         elif args.command == "validate":
-            is_valid, errors = manager.validate_change(
-                args.change_id, strict=args.strict
+            configure_validation(manager)
+            results = manager.validate_changes(
+                args.change_id,
+                strict=args.strict,
+                evidence_mode=args.evidence,
             )
-            if is_valid:
+            if args.rule_timings:
+                print_rule_timings(manager.rule_timing_report())
+            for warning in (warning for result in results for warning in result["warnings"]):
+                print(f"{Colors.YELLOW}! {warning}{Colors.RESET}", file=sys.stderr)
+            errors = [error for result in results for error in result["errors"]]
+            if not errors:
                 print(f"{Colors.GREEN}✓ Validation passed{Colors.RESET}")
                 return 0
             else:
-                print(
-                    f"{Colors.RED}✗ Validation failed:{Colors.RESET}", file=sys.stderr
-                )
+                print(f"{Colors.RED}✗ Validation failed:{Colors.RESET}", file=sys.stderr)
                 for error in errors:
                     print(f"  {error}", file=sys.stderr)
                 return 1
 
+        elif args.command == "archive" and args.change_id in ("compact", "unpack") and not (
+            manager.changes_dir / args.change_id
+        ).is_dir():
+            if args.skip_specs or args.incremental:
+                parser.error(
+                    f"--skip-specs and --incremental do not apply to 'archive {args.change_id}'"
+                )
+            if args.change_id == "compact":
+                if args.pack_ids:
+                    parser.error("'archive compact' takes no change IDs; use --older-than")
+                packed = manager.compact_archive(older_than_days=args.older_than or 0)
+                print(f"{Colors.GREEN}✓ Packed {len(packed)} change(s){Colors.RESET}")
+                for change_id in packed:
+                    print(f"  {change_id}")
+            else:
+                if args.older_than is not None:
+                    parser.error("--older-than only applies to 'archive compact'")
+                restored = manager.unpack_archive(args.pack_ids or None)
+                print(f"{Colors.GREEN}✓ Restored {len(restored)} change(s){Colors.RESET}")
+                for change_id in restored:
+                    print(f"  {change_id}")
+            return 0
+
         elif args.command == "archive":
+            if args.pack_ids or args.older_than is not None:
+                parser.error(
+                    "extra change IDs and --older-than only apply to "
+                    "'archive compact' and 'archive unpack'"
+                )
             if not args.yes:
                 response = input(f"Archive change '{args.change_id}'? [y/N] ")
                 if response.lower() != "y":
@@ -596,7 +5241,7 @@ def main():
                     return 0
 
             success, message = manager.archive_change(
-                args.change_id, skip_specs=args.skip_specs
+                args.change_id, skip_specs=args.skip_specs, incremental_specs=args.incremental
             )
             if success:
                 print(f"{Colors.GREEN}✓ {message}{Colors.RESET}")
@@ -611,6 +5256,9 @@ def main():
         print(f"{Colors.RED}Error: {e}{Colors.RESET}", file=sys.stderr)
         return 1
 
+    finally:
+        manager.close()
+
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,757 @@
+#!/usr/bin/env python3
+"""
+Differential equivalence harness for cflx.py fast paths.
+
+Generates random and adversarial OpenSpec trees (excluded sections, nested
+bullets, CJK full stops in verification notes, CRLF and CR line endings,
+BOMs, packed archives) and runs a deliberately naive reference
+implementation of ``_count_tasks``, ``_validate_tasks_file``,
+``_validate_specs_dir`` and ``list_changes`` side by side with the
+implementation in cflx.py. The reference keeps the baseline semantics;
+behaviour added since then is listed in ``INTENDED_DIFFERENCES`` and only
+those additions are set aside before comparing. Every other difference is
+reported with the case that produced it, together with the throughput of
+both sides.
+
+``rebuild_specs`` is checked against a generated archive history instead:
+canonical specs are folded from well-formed deltas (whose first delta may
+already modify or remove pre-archive requirements), and replaying the
+archive must then verify as a match for every capability.
+
+Usage:
+    python3 tools/cflx_equivalence.py --cases 50 --seed 1
+    python3 tools/cflx_equivalence.py --module path/to/candidate/cflx.py
+    python3 tools/cflx_equivalence.py --seed 1 --case 17 --keep /tmp/case17
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_MODULE = Path(__file__).resolve().parent.parent / "cflx-proposal" / "scripts" / "cflx.py"
+
+TARGETS = (
+    "count_tasks",
+    "validate_tasks_file",
+    "validate_specs_dir",
+    "list_changes",
+    "rebuild_specs",
+)
+
+VALIDATION_MODES = ((False, "off"), (True, "off"), (True, "warn"), (True, "error"))
+
+# Behaviour added on purpose since the baseline. Each entry names the target,
+# says what changed and recognises the items it adds to the optimized result;
+# those items are removed before the result is compared with the reference.
+INTENDED_DIFFERENCES = (
+    (
+        "validate_specs_dir",
+        "CFLX305: a requirement without scenarios is reported on its own line",
+        lambda error: re.search(r": specs/[^/]+/spec\.md:\d+: Requirement has no scenarios: ", error),
+    ),
+    (
+        "validate_specs_dir",
+        "CFLX306: MODIFIED/REMOVED requirements must exist in the canonical spec",
+        lambda error: re.search(
+            r": specs/[^/]+/spec\.md:\d+: (MODIFIED|REMOVED) requirement not found in canonical",
+            error,
+        ),
+    ),
+    (
+        "validate_specs_dir",
+        "CFLX307: ADDED requirements must not already exist in the canonical spec",
+        lambda error: re.search(
+            r": specs/[^/]+/spec\.md:\d+: ADDED requirement already exists in canonical", error
+        ),
+    ),
+    (
+        "validate_specs_dir",
+        "CFLX308: a delta must not name the same requirement twice",
+        lambda error: re.search(
+            r": specs/[^/]+/spec\.md:\d+: Requirement named more than once \(", error
+        ),
+    ),
+    (
+        "list_changes",
+        "changes packed by 'archive compact' are listed from the pack",
+        lambda change: change.get("packed"),
+    ),
+)
+
+
+def set_aside_intended(target: str, result):
+    """Drop the items ``INTENDED_DIFFERENCES`` says ``target`` now adds to ``result``."""
+    checks = [matches for name, _, matches in INTENDED_DIFFERENCES if name == target]
+    if not checks or not isinstance(result, list):
+        return result
+    return [item for item in result if not any(matches(item) for matches in checks)]
+
+
+class Reference:
+    """Straight-line statement of the baseline behaviour, free of caches and fast paths.
+
+    Tasks follow the original line-by-line loops, spec deltas get only the
+    original marker and scenario checks, and listing walks change
+    directories. Later additions are declared in ``INTENDED_DIFFERENCES``.
+    """
+
+    BEHAVIOR_TASK_KEYWORDS = (
+        "add ",
+        "implement ",
+        "create ",
+        "update ",
+        "modify ",
+        "introduce ",
+        "wire ",
+        "integrate ",
+        "expose ",
+        "persist ",
+        "support ",
+        "build ",
+    )
+
+    EVIDENCE_HINTS = (
+        "src/",
+        "tests/",
+        "uv run ",
+        "pytest",
+        "make ",
+        "python ",
+        "python3 ",
+        "cflx validate",
+        ".py",
+        ".ts",
+        ".js",
+        ".rs",
+        ".go",
+        " --once",
+    )
+
+    EXCLUDED_SECTIONS = ("future work", "out of scope", "notes")
+
+    DELTA_MARKERS = ("## ADDED Requirements", "## MODIFIED Requirements", "## REMOVED Requirements")
+
+    def __init__(self, root_dir: Path):
+        self.root_dir = root_dir
+        self.changes_dir = root_dir / "openspec" / "changes"
+        self.archive_dir = self.changes_dir / "archive"
+        self.specs_dir = root_dir / "openspec" / "specs"
+
+    def count_tasks(self, tasks_file: Path) -> Dict:
+        return self.count_tasks_text(tasks_file.read_text(encoding="utf-8"))
+
+    def count_tasks_text(self, content: str) -> Dict:
+        in_excluded_section = False
+        completed = 0
+        total = 0
+        for line in content.split("\n"):
+            if line.startswith("##"):
+                section_name = line.lstrip("#").strip().lower()
+                in_excluded_section = any(name in section_name for name in self.EXCLUDED_SECTIONS)
+                continue
+            if in_excluded_section:
+                continue
+            if re.match(r"^\s*[-*]\s*\[[ x]\]", line):
+                total += 1
+                if re.match(r"^\s*[-*]\s*\[x\]", line):
+                    completed += 1
+        return {"tasks_completed": completed, "tasks_total": total}
+
+    def validate_tasks_file(
+        self, tasks_file: Path, change_id: str, strict: bool, evidence_mode: str
+    ) -> Tuple[List[str], List[str]]:
+        errors: List[str] = []
+        warnings: List[str] = []
+        evidence = errors if evidence_mode == "error" else warnings
+        in_excluded_section = False
+
+        for i, line in enumerate(tasks_file.read_text(encoding="utf-8").split("\n"), 1):
+            if line.startswith("##"):
+                section_name = line.lstrip("#").strip().lower()
+                in_excluded_section = any(name in section_name for name in self.EXCLUDED_SECTIONS)
+                continue
+
+            if in_excluded_section and re.match(r"^\s*[-*]\s*\[[ x]\]", line):
+                errors.append(
+                    f"{change_id}: tasks.md:{i}: Checkbox found in excluded section "
+                    "(should be removed)"
+                )
+                continue
+
+            checkbox = re.match(r"^\s*[-*]\s*\[([ x])\]\s+(.*)$", line)
+            if checkbox and not in_excluded_section:
+                text = checkbox.group(2).strip()
+                verification = re.search(
+                    r"\(verification:\s*(.+?)\)\s*[.。]?$", text, re.IGNORECASE
+                )
+                normalized = text.strip().lower()
+                if (
+                    strict
+                    and evidence_mode != "off"
+                    and any(keyword in normalized for keyword in self.BEHAVIOR_TASK_KEYWORDS)
+                ):
+                    if verification is None:
+                        evidence.append(
+                            f"{change_id}: tasks.md:{i}: Behavior-bearing task missing "
+                            "'(verification: ...)' note"
+                        )
+                    elif not any(
+                        hint in verification.group(1).strip().lower()
+                        for hint in self.EVIDENCE_HINTS
+                    ):
+                        evidence.append(
+                            f"{change_id}: tasks.md:{i}: Verification note should cite "
+                            "repository-verifiable evidence such as source paths, tests, "
+                            "or runnable commands"
+                        )
+
+            if not in_excluded_section and re.match(r"^\s*[-*]\s+[^[]", line) and line.strip():
+                if not line.strip().startswith(("##", "#", "---", "```")):
+                    errors.append(
+                        f"{change_id}: tasks.md:{i}: Possible task without checkbox: "
+                        f"{line.strip()[:50]}"
+                    )
+
+        return errors, warnings
+
+    def validate_specs_dir(self, specs_dir: Path, change_id: str) -> List[str]:
+        errors = []
+        for spec_dir in specs_dir.iterdir():
+            if not spec_dir.is_dir():
+                continue
+            spec_file = spec_dir / "spec.md"
+            if not spec_file.exists():
+                errors.append(f"{change_id}: Missing spec.md in {spec_dir.name}")
+                continue
+            content = spec_file.read_text(encoding="utf-8")
+            if not any(marker in content for marker in self.DELTA_MARKERS):
+                errors.append(
+                    f"{change_id}: {spec_dir.name}/spec.md missing delta markers "
+                    "(ADDED/MODIFIED/REMOVED)"
+                )
+            requirements = re.findall(r"^### Requirement:", content, re.MULTILINE)
+            scenarios = re.findall(r"^#### Scenario:", content, re.MULTILINE)
+            if requirements and not scenarios:
+                errors.append(
+                    f"{change_id}: {spec_dir.name}/spec.md has requirements but no scenarios"
+                )
+        return errors
+
+    def change_info(self, change_dir: Path, archived: bool) -> Dict:
+        info = {
+            "id": change_dir.name,
+            "path": str(change_dir.relative_to(self.root_dir)),
+            "archived": archived,
+        }
+        proposal_file = change_dir / "proposal.md"
+        if proposal_file.exists():
+            match = re.search(r"^#\s+(.+)$", proposal_file.read_text(encoding="utf-8"), re.M)
+            if match:
+                info["title"] = match.group(1).strip()
+        tasks_file = change_dir / "tasks.md"
+        if tasks_file.exists():
+            info.update(self.count_tasks(tasks_file))
+        return info
+
+    def list_changes(self) -> List[Dict]:
+        changes = []
+        if self.changes_dir.exists():
+            for item in self.changes_dir.iterdir():
+                if item.is_dir() and item.name != "archive":
+                    changes.append(self.change_info(item, archived=False))
+        if self.archive_dir.exists():
+            for item in self.archive_dir.iterdir():
+                if item.is_dir():
+                    changes.append(self.change_info(item, archived=True))
+
+        return sorted(changes, key=lambda change: change.get("id", ""))
+
+    @staticmethod
+    def fold_history(
+        baseline: Dict[str, str], deltas: List[List[Tuple[str, str, str]]]
+    ) -> Dict[str, str]:
+        """Apply (operation, name, block) deltas in order to a name -> block mapping."""
+        requirements = dict(baseline)
+        for delta in deltas:
+            for operation, name, block in delta:
+                if operation == "REMOVED":
+                    requirements.pop(name, None)
+                else:
+                    requirements[name] = block
+        return requirements
+
+
+class TreeGenerator:
+    """Random OpenSpec trees, biased towards the inputs that break parsers."""
+
+    WORDS = (
+        "add", "implement", "create", "update", "wire", "support", "refactor", "document",
+        "cache", "index", "parser", "login", "token", "spec", "archive", "同期", "検証",
+        "実装する", "naïve", "emoji🙂", "tab\there", "x",
+    )
+    VERIFICATIONS = (
+        "pytest tests/test_api.py",
+        "src/cflx/api.py",
+        "手動で確認",
+        "make test",
+        "cflx validate --strict",
+        "looked at it",
+        "",
+        " ",
+        "run (make test)",
+        "uv run pytest -k login",
+    )
+    SECTIONS = (
+        "## 1. Implementation",
+        "## 2. Tests",
+        "## Future Work",
+        "## Out of Scope",
+        "## Notes",
+        "## notes and caveats",
+        "## Future Workflow",
+        "##Future work",
+        "### Notes on testing",
+        "### 1.1 Subtasks",
+        "# Tasks",
+        "#### Deep heading",
+        "##",
+    )
+    REQUIREMENT_NAMES = (
+        "Login",
+        "Token refresh",
+        "Search ranking",
+        "Archive pack",
+        "同期処理",
+        "名前　",
+        "Trailing space ",
+        "",
+    )
+    CAPABILITIES = ("auth", "search", "billing", "通知")
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def words(self, low: int = 1, high: int = 6) -> str:
+        return " ".join(self.rng.choice(self.WORDS) for _ in range(self.rng.randint(low, high)))
+
+    def newline(self) -> str:
+        return self.rng.choices(("\n", "\r\n", "\r"), weights=(6, 3, 1))[0]
+
+    def join(self, lines: List[str]) -> str:
+        newline = self.newline()
+        text = newline.join(lines)
+        if self.rng.random() < 0.7:
+            text += newline
+        return text
+
+    def task_line(self) -> str:
+        rng = self.rng
+        kind = rng.random()
+        indent = rng.choice(("", "", "  ", "    ", "\t", " \t"))
+        bullet = rng.choice(("-", "-", "*"))
+        if kind < 0.55:
+            box = rng.choice(("[ ]", "[x]", "[x]", "[X]", "[]", "[  ]"))
+            gap = rng.choice((" ", " ", "", "  "))
+            after = rng.choice((" ", " ", "", "\t"))
+            text = self.words()
+            if rng.random() < 0.6:
+                note = rng.choice(self.VERIFICATIONS)
+                label = rng.choice(("verification", "Verification", "VERIFICATION", "verify"))
+                text += f" ({label}: {note}){rng.choice(('', '.', '。', ' 。', '  ', '..'))}"
+            return f"{indent}{bullet}{gap}{box}{after}{text}"
+        if kind < 0.75:
+            return f"{indent}{bullet}{rng.choice((' ', '  ', ''))}{self.words(0, 4)}"
+        return rng.choice(
+            (
+                "",
+                "",
+                "---",
+                "```",
+                "```python",
+                "1. numbered step",
+                "- [link](docs/x.md)",
+                "> quote",
+                "   ",
+                "-",
+                "* ",
+                "text without bullet",
+            )
+        )
+
+    def tasks(self) -> str:
+        lines = []
+        if self.rng.random() < 0.1:
+            lines.append("\ufeff# Tasks")
+        for _ in range(self.rng.randint(0, 40)):
+            if self.rng.random() < 0.15:
+                lines.append(self.rng.choice(self.SECTIONS))
+            else:
+                lines.append(self.task_line())
+        return self.join(lines)
+
+    def proposal(self) -> str:
+        title = self.rng.choice(
+            ("# Add login", "#No space title", "  # Indented", "#\tTabbed title", "# ", "#  x  ")
+        )
+        return self.join([title if self.rng.random() < 0.9 else "", "", self.words(0, 20)])
+
+    def requirement_lines(self, operation_heading: Optional[str]) -> List[str]:
+        rng = self.rng
+        lines = [operation_heading] if operation_heading else []
+        for _ in range(rng.randint(0, 4)):
+            gap = rng.choice(("", " ", "  "))
+            lines.append(f"### Requirement:{gap}{rng.choice(self.REQUIREMENT_NAMES)}")
+            lines.append(self.words(0, 8))
+            for _ in range(rng.choice((0, 0, 1, 2))):
+                lines.append(
+                    rng.choice(("#### Scenario: works", "#### Scenario:", "####Scenario: no"))
+                )
+                lines.append("- **WHEN** " + self.words())
+            if rng.random() < 0.2:
+                lines.append(rng.choice(("### Other heading", "# Top", "##### deep", "###", "## ")))
+        return lines
+
+    def spec_delta(self) -> str:
+        lines = []
+        if self.rng.random() < 0.3:
+            lines.append(f"# {self.words(1, 3)}")
+        for _ in range(self.rng.randint(0, 3)):
+            heading = self.rng.choice(
+                (
+                    "## ADDED Requirements",
+                    "## MODIFIED Requirements",
+                    "## REMOVED Requirements",
+                    "## ADDED Requirements  ",
+                    "## RENAMED Requirements",
+                    "##ADDED Requirements",
+                    "Text mentioning ## ADDED Requirements inline",
+                    "## Purpose",
+                    None,
+                )
+            )
+            lines.extend(self.requirement_lines(heading))
+        return self.join(lines)
+
+    def canonical_spec(self) -> str:
+        lines = [f"# {self.words(1, 2)} Specification", "", "## Purpose", self.words(), ""]
+        lines.extend(self.requirement_lines("## Requirements"))
+        return self.join(lines)
+
+    def requirement_block(self, name: str) -> str:
+        return (
+            f"### Requirement: {name}\nThe system SHALL {self.words()}.\n\n"
+            f"#### Scenario: {self.words(1, 2)}\n- **WHEN** {self.words()}\n- **THEN** it works"
+        )
+
+    def history(self, root: Path) -> Dict[str, Tuple[Dict[str, str], List]]:
+        """Archived deltas per capability over a pre-archive baseline of requirements.
+
+        Deltas are well formed (one operation per requirement, no duplicate
+        names), and the first one touches the baseline whenever it has any.
+        Archived change directories are written under ``root``; canonical
+        specs are left to the caller.
+        """
+        rng = self.rng
+        histories = {}
+        for number, capability in enumerate(rng.sample(self.CAPABILITIES, rng.randint(1, 3))):
+            names = [f"Requirement {index}" for index in range(8)]
+            baseline = {
+                name: self.requirement_block(name)
+                for name in rng.sample(names, rng.randint(0, 4))
+            }
+            live = set(baseline)
+            deltas = []
+            for index in range(rng.randint(1, 4)):
+                delta = []
+                pool = sorted(live)
+                touched = rng.randint(min(1, len(pool)) if index == 0 else 0, len(pool))
+                for name in rng.sample(pool, touched):
+                    operation = rng.choice(("MODIFIED", "REMOVED"))
+                    delta.append((operation, name, self.requirement_block(name)))
+                    if operation == "REMOVED":
+                        live.discard(name)
+                touched_names = {name for _, name, _ in delta}
+                fresh = [
+                    name
+                    for name in names
+                    if name not in live and name not in baseline and name not in touched_names
+                ]
+                for name in rng.sample(fresh, rng.randint(0, min(2, len(fresh)))):
+                    delta.append(("ADDED", name, self.requirement_block(name)))
+                    live.add(name)
+                if not delta:
+                    continue
+                sections = []
+                for operation in ("ADDED", "MODIFIED", "REMOVED"):
+                    blocks = [
+                        f"### Requirement: {name}" if operation == "REMOVED" else block
+                        for op, name, block in delta
+                        if op == operation
+                    ]
+                    if blocks:
+                        sections.append(f"## {operation} Requirements\n" + "\n\n".join(blocks))
+                change_dir = root / "openspec" / "changes" / "archive" / f"{number}-{index:03d}"
+                self.write(change_dir / "specs" / capability / "spec.md", "\n\n".join(sections))
+                deltas.append(delta)
+            if deltas:
+                histories[capability] = (baseline, deltas)
+        return histories
+
+    def write(self, path: Path, text: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Bytes keep CRLF and CR exactly as generated.
+        path.write_bytes(text.encode("utf-8"))
+
+    def change(self, change_dir: Path) -> None:
+        rng = self.rng
+        if rng.random() < 0.92:
+            self.write(change_dir / "proposal.md", self.proposal())
+        if rng.random() < 0.92:
+            self.write(change_dir / "tasks.md", self.tasks())
+        if rng.random() < 0.85:
+            (change_dir / "specs").mkdir(parents=True, exist_ok=True)
+            for capability in rng.sample(self.CAPABILITIES, rng.randint(0, 3)):
+                if rng.random() < 0.9:
+                    self.write(change_dir / "specs" / capability / "spec.md", self.spec_delta())
+                else:
+                    (change_dir / "specs" / capability).mkdir(parents=True, exist_ok=True)
+
+    def tree(self, root: Path, changes: int, module: types.ModuleType) -> None:
+        """Write canonical specs, packed and archived changes, then active ones."""
+        rng = self.rng
+        for capability in self.CAPABILITIES:
+            if rng.random() < 0.75:
+                spec_file = root / "openspec" / "specs" / capability / "spec.md"
+                self.write(spec_file, self.canonical_spec())
+        archive_dir = root / "openspec" / "changes" / "archive"
+        ids = [f"change-{index:03d}" for index in range(changes)]
+        rng.shuffle(ids)
+        packed, archived = ids[: changes // 4], ids[changes // 4 : changes // 2]
+        for change_id in packed:
+            self.change(archive_dir / change_id)
+        if packed:
+            module.OpenSpecManager(str(root)).compact_archive()
+        for change_id in archived:
+            self.change(archive_dir / change_id)
+        for change_id in ids[changes // 2 :]:
+            self.change(root / "openspec" / "changes" / change_id)
+        (root / "openspec" / "changes").mkdir(parents=True, exist_ok=True)
+
+
+class Harness:
+    """Run reference and optimized implementations over generated trees."""
+
+    def __init__(self, module: types.ModuleType, seed: str, changes: int):
+        self.module = module
+        self.seed = seed
+        self.changes = changes
+        self.differences: List[Dict] = []
+        self.timings = {
+            target: {"reference": [0.0, 0], "optimized": [0.0, 0]}
+            for target in TARGETS
+        }
+
+    def _timed(self, target: str, side: str, func: Callable, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        slot = self.timings[target][side]
+        slot[0] += time.perf_counter() - started
+        slot[1] += 1
+        return result
+
+    def _compare(self, case: int, target: str, subject: str, expected, actual) -> None:
+        actual = set_aside_intended(target, actual)
+        if json.dumps(expected, ensure_ascii=False) != json.dumps(actual, ensure_ascii=False):
+            self.differences.append(
+                {
+                    "case": case,
+                    "target": target,
+                    "subject": subject,
+                    "reference": expected,
+                    "optimized": actual,
+                }
+            )
+
+    def run_case(self, case: int, keep: Optional[str] = None) -> None:
+        rng = random.Random(f"{self.seed}:{case}")
+        generator = TreeGenerator(rng)
+        root = Path(keep) if keep else Path(tempfile.mkdtemp(prefix="cflx-equivalence-"))
+        if keep and root.exists():
+            shutil.rmtree(str(root))
+        root.mkdir(parents=True, exist_ok=True)
+        try:
+            generator.tree(root, self.changes, self.module)
+            self._check(case, root)
+            self._check_rebuild(case, root / "history", generator)
+        finally:
+            if not keep:
+                shutil.rmtree(str(root), ignore_errors=True)
+
+    def _check(self, case: int, root: Path) -> None:
+        """Compare every target on one tree."""
+        reference = Reference(root)
+        manager = self.module.OpenSpecManager(str(root))
+        changes_dir = root / "openspec" / "changes"
+        change_dirs = [path for path in changes_dir.iterdir() if path.name != "archive"]
+        if (changes_dir / "archive").is_dir():
+            change_dirs.extend((changes_dir / "archive").iterdir())
+
+        for change_dir in sorted(path for path in change_dirs if path.is_dir()):
+            subject = str(change_dir.relative_to(root))
+            tasks_file = change_dir / "tasks.md"
+            if tasks_file.exists():
+                expected = self._timed(
+                    "count_tasks", "reference", reference.count_tasks, tasks_file
+                )
+                actual = self._timed("count_tasks", "optimized", manager._count_tasks, tasks_file)
+                self._compare(case, "count_tasks", subject, expected, actual)
+                for strict, mode in VALIDATION_MODES:
+                    args = (tasks_file, change_dir.name, strict, mode)
+                    expected = self._timed(
+                        "validate_tasks_file", "reference", reference.validate_tasks_file, *args
+                    )
+                    actual = self._timed(
+                        "validate_tasks_file", "optimized", manager._validate_tasks_file, *args
+                    )
+                    self._compare(
+                        case, "validate_tasks_file", f"{subject} strict={strict} evidence={mode}",
+                        list(expected), list(actual),
+                    )
+            specs_dir = change_dir / "specs"
+            if specs_dir.is_dir():
+                args = (specs_dir, change_dir.name)
+                expected = self._timed(
+                    "validate_specs_dir", "reference", reference.validate_specs_dir, *args
+                )
+                actual = self._timed(
+                    "validate_specs_dir", "optimized", manager._validate_specs_dir, *args
+                )
+                self._compare(case, "validate_specs_dir", subject, expected, actual)
+
+        expected = self._timed("list_changes", "reference", reference.list_changes)
+        actual = self._timed("list_changes", "optimized", manager.list_changes)
+        self._compare(case, "list_changes", "openspec/changes", expected, actual)
+
+    def _check_rebuild(self, case: int, root: Path, generator: "TreeGenerator") -> None:
+        """Replaying a generated archive history must match the specs it produced."""
+        histories = generator.history(root)
+        for capability, (baseline, deltas) in histories.items():
+            requirements = self._timed(
+                "rebuild_specs", "reference", Reference.fold_history, baseline, deltas
+            )
+            generator.write(
+                root / "openspec" / "specs" / capability / "spec.md",
+                f"# {capability} Specification\n\n## Purpose\nGenerated.\n\n"
+                "## Requirements\n" + "\n\n".join(requirements.values()) + "\n",
+            )
+        manager = self.module.OpenSpecManager(str(root))
+        expected = {capability: "match" for capability in sorted(histories)}
+        # Cold, then writing and resuming from checkpoints.
+        for checkpoints in (False, True, True):
+            report = self._timed(
+                "rebuild_specs", "optimized", manager.rebuild_specs, True, None, 4, checkpoints
+            )
+            actual = {result["capability"]: result["status"] for result in report["capabilities"]}
+            subject = f"openspec/specs checkpoints={checkpoints}"
+            self._compare(case, "rebuild_specs", subject, expected, actual)
+
+    def report(self, cases: List[int]) -> Dict:
+        throughput = {}
+        for target, sides in self.timings.items():
+            throughput[target] = {
+                side: {
+                    "calls": calls,
+                    "seconds": round(seconds, 4),
+                    "per_second": round(calls / seconds, 1) if seconds else None,
+                }
+                for side, (seconds, calls) in sides.items()
+            }
+        return {
+            "seed": self.seed,
+            "cases": cases,
+            "changes_per_case": self.changes,
+            "equivalent": not self.differences,
+            "differences": self.differences,
+            "throughput": throughput,
+        }
+
+
+def load_module(path: Path) -> types.ModuleType:
+    """Import a cflx.py implementation from ``path``."""
+    spec = importlib.util.spec_from_file_location("cflx", str(path))
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot import {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["cflx"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def print_report(report: Dict, max_differences: int = 20):
+    """Print per-target verdicts, throughput and the first differences."""
+    counts: Dict[str, int] = {}
+    for difference in report["differences"]:
+        counts[difference["target"]] = counts.get(difference["target"], 0) + 1
+    print(
+        f"seed {report['seed']}, {len(report['cases'])} case(s), "
+        f"{report['changes_per_case']} changes per case"
+    )
+    for target, sides in report["throughput"].items():
+        verdict = f"{counts[target]} difference(s)" if target in counts else "equivalent"
+        rates = "  ".join(
+            f"{side} {stats['per_second']:>10,.0f}/s" if stats["per_second"] else f"{side} -"
+            for side, stats in sides.items()
+        )
+        print(f"  {target:<20} {verdict:<18} {rates}")
+
+    for difference in report["differences"][:max_differences]:
+        print()
+        print(f"case {difference['case']} {difference['target']}: {difference['subject']}")
+        print(f"  reference: {json.dumps(difference['reference'], ensure_ascii=False)}")
+        print(f"  optimized: {json.dumps(difference['optimized'], ensure_ascii=False)}")
+    hidden = len(report["differences"]) - max_differences
+    if hidden > 0:
+        print(f"\n... {hidden} more difference(s); use --json for all of them")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check cflx.py fast paths against a reference implementation"
+    )
+    parser.add_argument("--module", default=str(DEFAULT_MODULE), help="cflx.py to check")
+    parser.add_argument("--seed", default="0", help="Seed for the generated trees")
+    parser.add_argument("--cases", type=int, default=20, help="Number of generated trees")
+    parser.add_argument("--case", type=int, help="Run only this case (to reproduce a difference)")
+    parser.add_argument("--changes", type=int, default=24, help="Changes per generated tree")
+    parser.add_argument("--keep", metavar="DIR", help="With --case, leave the tree in DIR")
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    args = parser.parse_args()
+
+    if args.keep and args.case is None:
+        parser.error("--keep needs --case")
+
+    harness = Harness(load_module(Path(args.module)), args.seed, args.changes)
+    cases = [args.case] if args.case is not None else list(range(args.cases))
+    for case in cases:
+        harness.run_case(case, keep=args.keep)
+
+    report = harness.report(cases)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+    return 0 if report["equivalent"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
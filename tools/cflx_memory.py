@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: per-change dicts vs. slotted records in cflx.py.
+
+Builds a synthetic OpenSpec tree and measures, with tracemalloc, the
+memory retained by holding every change as
+
+- ``list_changes`` dicts vs. ``list_change_records`` ``ChangeInfo`` records,
+- ``show_change`` dicts (full file contents) vs. the same records, which
+  read contents on demand,
+- task dicts from ``open_tasks``-style parsing vs. ``TaskInfo`` records.
+
+Both representations are checked to produce the same JSON first.
+
+Usage:
+    python3 tools/cflx_memory.py --changes 10000
+    python3 tools/cflx_memory.py --changes 5000 --json
+"""
+
+import argparse
+import gc
+import importlib.util
+import json
+import random
+import shutil
+import sys
+import tempfile
+import tracemalloc
+import types
+from pathlib import Path
+from typing import Callable, Dict, List
+
+DEFAULT_MODULE = Path(__file__).resolve().parent.parent / "cflx-proposal" / "scripts" / "cflx.py"
+
+
+def load_module(path: Path) -> types.ModuleType:
+    """Import a cflx.py implementation from ``path``."""
+    spec = importlib.util.spec_from_file_location("cflx", str(path))
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot import {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["cflx"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_tree(root: Path, changes: int, seed: int) -> None:
+    """Write ``changes`` changes (a quarter archived) with proposals, tasks and one spec delta."""
+    rng = random.Random(seed)
+    changes_dir = root / "openspec" / "changes"
+    for index in range(changes):
+        parent = changes_dir / "archive" if index % 4 == 0 else changes_dir
+        change_dir = parent / f"change-{index:06d}"
+        (change_dir / "specs" / "auth").mkdir(parents=True)
+        (change_dir / "proposal.md").write_text(
+            f"# Change {index}\n\n## Why\n{'Motivation. ' * rng.randint(5, 40)}\n", encoding="utf-8"
+        )
+        tasks = ["## 1. Implementation"]
+        for task in range(rng.randint(3, 25)):
+            mark = "x" if rng.random() < 0.5 else " "
+            tasks.append(f"- [{mark}] 1.{task} Update module {task} (verification: make test)")
+        tasks.append("## Future Work\n- Later")
+        (change_dir / "tasks.md").write_text("\n".join(tasks) + "\n", encoding="utf-8")
+        (change_dir / "specs" / "auth" / "spec.md").write_text(
+            "## ADDED Requirements\n### Requirement: Login\n#### Scenario: ok\n", encoding="utf-8"
+        )
+
+
+def retained(build: Callable[[], object]) -> int:
+    """Bytes still allocated while the result of ``build`` is alive."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def run(module: types.ModuleType, root: Path) -> Dict:
+    manager = module.OpenSpecManager(str(root))
+    dicts = manager.list_changes()
+    records = manager.list_change_records()
+    if json.dumps(dicts) != json.dumps([record.to_dict() for record in records]):
+        raise RuntimeError("list_changes and list_change_records disagree")
+    ids = [change["id"] for change in dicts]
+
+    def task_dicts() -> List[Dict]:
+        return [
+            list(manager._iter_tasks(record.read("tasks.md").split("\n"))) for record in records
+        ]
+
+    def task_records() -> List[List]:
+        return [list(record.iter_tasks()) for record in records]
+
+    results = {
+        "list": (
+            retained(manager.list_changes),
+            retained(manager.list_change_records),
+        ),
+        "show": (
+            retained(lambda: [manager.show_change(change_id) for change_id in ids]),
+            retained(manager.list_change_records),
+        ),
+        "tasks": (retained(task_dicts), retained(task_records)),
+    }
+    items = {"list": len(ids), "show": len(ids), "tasks": sum(len(t) for t in task_dicts())}
+    return {
+        name: {
+            "items": items[name],
+            "dict_bytes": dict_bytes,
+            "record_bytes": record_bytes,
+            "dict_per_item": round(dict_bytes / max(items[name], 1), 1),
+            "record_per_item": round(record_bytes / max(items[name], 1), 1),
+            "ratio": round(dict_bytes / record_bytes, 2) if record_bytes else None,
+        }
+        for name, (dict_bytes, record_bytes) in results.items()
+    }
+
+
+def print_results(results: Dict, changes: int):
+    """Print retained memory per representation."""
+    print(f"{changes} changes")
+    print(f"  {'':<6} {'items':>8} {'dicts':>12} {'records':>12} {'per item':>18} {'ratio':>6}")
+    for name, row in results.items():
+        per_item = f"{row['dict_per_item']:.0f} -> {row['record_per_item']:.0f} B"
+        print(
+            f"  {name:<6} {row['items']:>8} {row['dict_bytes'] / 1e6:>10.2f}MB "
+            f"{row['record_bytes'] / 1e6:>10.2f}MB {per_item:>18} {row['ratio']:>5}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dict and slotted record memory use")
+    parser.add_argument("--module", default=str(DEFAULT_MODULE), help="cflx.py to measure")
+    parser.add_argument("--changes", type=int, default=10000, help="Changes in the synthetic tree")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic tree")
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    args = parser.parse_args()
+
+    module = load_module(Path(args.module))
+    root = Path(tempfile.mkdtemp(prefix="cflx-memory-"))
+    try:
+        build_tree(root, args.changes, args.seed)
+        results = run(module, root)
+    finally:
+        shutil.rmtree(str(root), ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results, args.changes)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())